@@ -1,10 +1,57 @@
+import gc
 import pickle
 import os
-from datetime import datetime
-from tabulate import tabulate
-from itertools import chain
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge, nsmallest
+from io import BytesIO
+from collections.abc import MutableMapping
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from importlib import import_module
 
 import myDates
+from mySearch import NgramIndex, QueryMatcher
+from mySketch import QuantileSketch
+from myProfiler import Profiler
+from myLocks import FileLock
+from myNumbers import str_is_integer
+
+# Obs.: 'tabulate' and the optional 'numpy' are only needed to print tasks, so they are imported on first use (see 'Tasks.tabulate_tasks' and 'Tasks.set_age').
+# '--add', '--done' and '--del' do not pay for them.
+
+
+def import_optional(module_name):
+    """ Imports an optional dependency on first use. Returns the module, or None if it is not installed"""
+    try:
+        return import_module(module_name)
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=1 << 16)
+def format_timestamp(ts, tz, dt_format, print_tz, long_format):
+    """ Converts a date stored in a Task (seconds since the epoch 'ts', position 'tz' of its timezone in 'Task.tz_table') to a string to be printed.
+    Memoized in a bounded LRU cache: due dates repeat across tasks and tasks are printed again by each report. 
+    The configuration is part of the key, so changing 'Tasks.dt_format' or 'Tasks.print_tz' never returns stale strings. See 'Tasks.ts_to_str'.
+    """
+    # on a miss, the date is converted with the (memoized) fixed offset of its day when there is one
+    tzinfo = fixed_timezone(ts // 86400, tz) or Task.tz_table[tz]
+    return Tasks.format_date(datetime.fromtimestamp(ts, tzinfo), dt_format, print_tz, long_format)
+
+
+@lru_cache(maxsize=1 << 16)
+def fixed_timezone(day, tz):
+    """ Returns the timezone 'Task.tz_table[tz]' during the UTC day starting at 'day * 86400' seconds since the epoch as a fixed-offset 
+    'datetime.timezone' with the same UTC offset and name, so dates print the same. Converting with it is done in C, unlike with 'dateutil' timezones.
+    Returns None if the offset or the name changes within the day (e.g., a daylight saving time transition).
+    """
+    tzinfo = Task.tz_table[tz]
+    start, end = datetime.fromtimestamp(day * 86400, tzinfo), datetime.fromtimestamp(day * 86400 + 86399, tzinfo)
+    if start.utcoffset() != end.utcoffset() or start.tzname() != end.tzname() or start.tzname() is None:
+        return None
+    return timezone(start.utcoffset(), start.tzname())
 
       
     
@@ -14,55 +61,678 @@ class Tasks(object):
     Attributes:
      - min_priority, max_priority (int): the minimum and maximum values allowed for the 'priority' attribute of 'Task' objects.
      - default_priority (int): the default value the 'priority' attribute of 'Task' objects
-     - filename (str): filename of the pickle file containing 'Tasks' object data
+     - filename (str): filename of the file containing 'Tasks' object data (the 'snapshot'). Kept as '.todo.pickle' for existing lists, whatever the format.
+     - snapshot_format (str): format the snapshot is written in: 'binary' (see TaskManagerStore.py: fixed-width columns, a string heap for the names and 
+                              one timezone table; loads several times faster) or 'pickle' (the 'Tasks' data pickled as is). Both formats are read.
+     - snapshot_compression (str|None): compression of a 'binary' snapshot with the stdlib: None, 'zlib' or 'lzma' (smaller files, slower loads).
 
      - dt_format (str): the date format adopted for the app. Applies to all dates in the app. If '%m/%d/%Y' is chosen, user inputs like 31/12/2022 or 31/dec/2022 will throw an error.
      - print_tz (bool): a boolean indicating to print timezones in reports. Useful to improve readibility when timezones are long words.
-     - tasks (list): a list of Task objects
-
-     - tasks_ID (list): a list containing only the ID of the Task objects. It is always synchronized with the 'tasks' list. 
-                        Useful for indexing regardless of the order of the objects in the 'tasks' list.  
+     - tasks (dict): the unfinished (active) Task objects keyed by their ID. Gives constant time lookup, completion and deletion by ID. 
+                     Obs.: the dict keeps insertion order, which is always ascending ID order (new tasks get 'max_ID + 1'; 'reset_IDs' keeps the order). 
+                     Iterating over 'tasks.values()' is therefore iterating over the tasks in ID order.
+                     Completed tasks are moved to the archive by 'done', so loading, '--list' and '--query' only process the open tasks.
+
+     - archive_filename (str): filename of the archive: the completed tasks, as an append-only file of pickled lists of records
+                               ('put', Task) and ('delete', task_ID). Only read when completed tasks are needed (see 'self.load_archive').
+                               Rewritten with the completed tasks only when its dead bytes pass 'archive_max_dead_bytes' (see 'self.compact_archive').
+     - archived_tasks (dict|None): the completed Task objects keyed by their ID (not kept in ID order). None until the archive is loaded.
+     - archive_pending (list): archive records not yet written to the archive file; appended to it by the next snapshot ('self.pickle_tasks').
+     - archive_offset, archive_size (int): start and end of the archive's records in the archive file when the snapshot was written. 
+                                           Bytes after the end (e.g., written before a crash) are ignored; bytes before the start are an archive replaced by 'reset_IDs'
+                                           or a compaction.
+     - archive_records, archive_dead (int): number of records of the archive (written or pending), and how many of them are dead: the 'put' of a deleted 
+                                            task and its 'delete'. Saved with the snapshot, so the dead bytes are estimated without loading the archive.
+     - archive_max_dead_bytes (int): the archive is compacted by the next snapshot once its dead bytes (see 'self.archive_dead_bytes') pass this 
+                                     and half the file, so a compaction costs as much as the dead records written since the previous one.
+     - archive_min_ID, archive_max_ID (int): minimum and maximum IDs in the archive (0 if empty). Saved with the snapshot, so 'min_ID' and 'max_ID' 
+                                             are known without loading the archive.
+
+     - tasks_ID (list): the IDs of all Task objects (open and completed), in ascending order. Loads the archive.
      - age_updated(bool): Indicates if the 'age' attribute of the 'Task' objects for the app's current run.  
-     - min_ID, max_ID (int): minimum and maximum IDs in the 'tasks' list in the app's current run. Useful for error-handling print statements.  
+     - min_ID, max_ID (int): minimum and maximum IDs of all tasks (open and completed) in the app's current run. Useful for error-handling print statements.  
+                             Maintained on each mutation instead of computed over all IDs.
+
+     - journal_mode (bool): if True, each mutation appends a small record to 'journal_filename' instead of rewriting the whole pickle file.
+     - journal_filename (str): filename of the append-only journal replayed over the pickle file (the 'snapshot') when the app starts.
+     - journal_max_bytes (int): size threshold of the journal; when passed, the journal is folded back into a fresh snapshot (compaction).
+     - generation (int): number of the current snapshot. The journal is only replayed over the snapshot generation it was written for.
+     - deferred_writes (bool): if True, mutations are only kept in 'pending_records' until 'flush()' is called. 
+                               Used by long-lived processes (see todo_daemon.py) to coalesce many mutations into one write.
+     - pending_records (list): mutations not yet saved to the disk.
+
+     - query_index (mySearch.NgramIndex): inverted index of the n-grams of the tasks' names, by ID. Used by '--query' to only check tasks that may match. 
+                                          Saved with the snapshot and updated on each 'add'/'delete'.
+     - query_ngram (int): length of the n-grams in 'query_index'.
+     - open_order (list): sort keys of the unfinished tasks (see 'self.order_key'), kept sorted by bisection on each 'add'/'done'/'delete'. 
+                          Walking it gives the unfinished tasks in the '--list' order without sorting. Saved with the snapshot.
+     - created_epochs (array.array): contiguous array of the tasks' 'created_dt' as UTC seconds since the epoch. 
+                                     Each Task object keeps its position in the array ('Task.slot'). Used to compute ages in one operation. Saved with the snapshot.
+     - page_size (int): number of tasks in a page of '--page' when no '--limit' is given.
+     - date_cache (bool): if True, the dates printed in the tables are formatted through the LRU caches of 'format_timestamp'. Set to False to bypass them.
+     - output_cache (bool): if True, the output of '--list' and '--report' is cached on disk ('cache_dirname', see myCache.py) and printed again
+                            without loading the tasks while they do not change ('store_version'), nor the day, the date format or any age printed
+                            ('age_expiry'). Only with the 'pickle' backend. Set to False (or use '--no-cache' in todo.py) to bypass it.
+     - cache_dirname (str): directory of the output cache.
+     - version_filename (str): file with a random token replaced before each write of the tasks to the disk (see 'self.new_version'), part of 'store_version'.
+     - cache_max_bytes (int): bound of the size of the output cache; the least recently used outputs are evicted past it.
+     - age_expiry (float|None): time (seconds since the epoch) the first of the ages set by 'set_age' in this run changes, as tasks complete one more day.
+     - use_numpy (bool): if True and 'numpy' is installed, 'set_age' computes the ages of all tasks in one vectorized operation.
+     - column_store (bool): if True, 'tasks' is a 'TaskColumns' column store (typed arrays, no Task objects kept) instead of a dict. 
+                            Uses less memory for very large lists; Task objects are built when accessed. 'created_epochs' is then its 'created' column.
+
+     - profiler (myProfiler.Profiler): measures the wall time, calls and allocated memory of the phases of a run (loading, selecting, 'set_age', sorting, 
+                                       tabulating...). Disabled by default, then costing close to nothing; see '--profile' in todo.py.
+                                       Example: Tasks.profiler = Profiler(); Tasks.profiler.start(); Tasks().report_tasks(); print(Tasks.profiler.summary())
+
+     - lock_filename (str): lock file serializing the processes using the tasks (see 'self.lock'). todo.py holds it from loading the tasks to saving them,
+                            so concurrent runs (e.g., cron jobs and the user) never overwrite each other's changes.
+     - lock_timeout (float): seconds to wait for the lock before giving up (raises 'myErrors.LockTimeoutError').
+     - sync_mode (str|None): durability of the saved mutations. None: written, flushed to the disk by the system later (fastest).
+                             'fsync': each write is forced to the disk ('os.fsync') before returning.
+                             'group': group commit; the journal is forced to the disk by 'self.sync()' after the lock is released, so the writes of 
+                             concurrent processes within 'group_commit_window' seconds share one 'os.fsync'.
+     - group_commit_window (float): seconds a writer waits in 'self.sync()' for other writers to join its 'os.fsync'.
+     - sync_filename (str): file with the generation and size of the journal last forced to the disk, shared by the processes in 'group' mode.
+     - journal_end (int): size of the journal after the last write of this process not yet forced to the disk by 'self.sync()' (0 if none).
+
+     - statistics (TaskStats|None): counts of the tasks and a sketch of the times to complete them, for '--stats'. Updated by each mutation 
+                                    ('self.apply_record', so also when the journal is replayed) and saved with the snapshot. 
+                                    None if the snapshot was written by a previous version of the app, until computed (see 'self.load_statistics').
+
+     - aliases (dict): the IDs of the tasks before the last 'reset_IDs' (old ID: (new ID, expiry in seconds since the epoch)). 
+                       '--done' and '--del' accept an old ID until it expires, if no task has it now (see 'self.resolve_ID'). Saved with the snapshot.
+     - alias_expiry (int): seconds an old ID stays usable after 'reset_IDs'. Set to 0 to keep no aliases.
+
+     - export_fields (list): fields of the records written by '--export' (see 'self.export_tasks') and read by '--import'.
+     - max_import_errors (int): number of invalid records of '--import' listed in its message (the others are only counted).
+     - import_chunk_size (int): number of records of '--import' parsed before they are applied to the tasks (see 'self.import_tasks').
+
+     - backend (str): storage backend returned by 'open_tasks()'. 'pickle' (default) keeps the tasks in 'filename' and 'journal_filename'; 
+                      'sqlite' keeps them in the SQLite database 'sqlite_filename' (see TaskManagerSQLite.py).
      
     """
 
     min_priority, max_priority = (1, 3)
     default_priority = 1
     filename = ".todo.pickle"
+    snapshot_format = "binary"
+    snapshot_compression = None
+    journal_filename = ".todo.journal"
+    archive_filename = ".todo.archive"
+    archive_max_dead_bytes = 1 << 20
+    alias_expiry = 7 * 86400
+    export_fields = ["id", "name", "priority", "due", "created", "completed"]
+    max_import_errors = 20
+    import_chunk_size = 50000
+    lock_filename = ".todo.lock"
+    lock_timeout = 30
+    sync_mode = None
+    group_commit_window = 0.002
+    sync_filename = ".todo.sync"
+    journal_mode = True
+    journal_max_bytes = 1 << 20
+    backend = "pickle"
+    sqlite_filename = ".todo.sqlite"
+    query_ngram = 3
+    column_store = False
+    use_numpy = True
+    page_size = 20
+    date_cache = True
+    output_cache = True
+    cache_dirname = ".todo.cache"
+    version_filename = ".todo.version"
+    cache_max_bytes = 16 << 20
+    profiler = Profiler()
     dt_format = '%m/%d/%Y'
     print_tz = True
     
     def __init__(self):
-        """  Read pickled tasks file and ID data into lists; initializes auxiliary variables"""
+        """  Read pickled tasks file into the ID-keyed 'tasks' dict; initializes auxiliary variables"""
 
         # tests if a pickle file containing 'Tasks' data already exists; if not, initialize a 'Tasks' object from scrap.
         if os.path.isfile(self.filename):
-            with open(self.filename, 'rb') as file:
-                Tasks_data = pickle.load(file)
+            with self.profiler.phase("load snapshot"), open(self.filename, 'rb') as file:
+                # obs.: imported here, as it imports this module
+                import TaskManagerStore
+
+                # the loaded objects hold no reference cycles; the garbage collector would only scan them again and again while they are created
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    if TaskManagerStore.is_binary_snapshot(file):
+                        Tasks_data = TaskManagerStore.load_snapshot(file, self.column_store)
+                    else:
+                        Tasks_data = pickle.load(file)
+                finally:
+                    if gc_enabled:
+                        gc.enable()
                 self.tasks = Tasks_data["tasks"]
-                self.tasks_ID = Tasks_data["tasks_ID"]
-                self.min_ID = min(self.tasks_ID)
-                self.max_ID = max(self.tasks_ID)
+                self.generation = Tasks_data.get("generation", 0)
+                self.query_index = Tasks_data.get("query_index")
+                self.open_order = Tasks_data.get("open_order")
+                self.created_epochs = Tasks_data.get("created_epochs")
+                self.archive_offset, self.archive_size = Tasks_data.get("archive_offset", 0), Tasks_data.get("archive_size")
+                self.archive_records, self.archive_dead = Tasks_data.get("archive_records", (0, 0))
+                self.aliases = Tasks_data.get("aliases", {})
+                self.archive_min_ID, self.archive_max_ID = Tasks_data.get("archive_IDs", (0, 0))
+                self.statistics = Tasks_data.get("statistics")
+
+            # files written by previous versions of the app hold a list of tasks (plus a list of IDs); rebuilds the index by ID
+            if isinstance(self.tasks, list):
+                self.tasks = {task.task_ID: task for task in self.tasks}
+
+            # switches between the dict and the column store if 'column_store' changed since the file was saved
+            if self.column_store and not isinstance(self.tasks, TaskColumns):
+                self.tasks = TaskColumns(self.tasks.values())
+                self.created_epochs = None
+            elif not self.column_store and isinstance(self.tasks, TaskColumns):
+                self.tasks = {task.task_ID: task for task in self.tasks.values()}
+                self.created_epochs = None
+
+            self.archived_tasks = None
+            self.archive_pending = []
+
+            # files written by previous versions of the app have no archive: the completed tasks are moved to it (written with the next snapshot)
+            if self.archive_size is None:
+                self.archive_size = 0
+                self.archived_tasks = {}
+                completed_IDs = [task_ID for task_ID, task in self.tasks.items() if task.completed_ts is not None]
+                if completed_IDs:
+                    for task_ID in completed_IDs:
+                        self.archive_task(self.tasks.pop(task_ID))
+                    self.query_index = self.open_order = self.created_epochs = None
+
+            # files written by previous versions of the app have no query index
+            if self.query_index is None or self.query_index.n != self.query_ngram:
+                self.build_query_index()
+            if self.open_order is None:
+                self.build_open_order()
+            if self.created_epochs is None or self.created_epochs.typecode != 'q':
+                self.build_created_epochs()
         else:
-            self.tasks = []
-            self.tasks_ID = []
-            self.min_ID = 0
-            self.max_ID = 0
+            self.tasks = TaskColumns() if self.column_store else {}
+            self.generation = 0
+            self.query_index = NgramIndex(self.query_ngram)
+            self.open_order = []
+            self.created_epochs = self.tasks.created if self.column_store else array('q')
+            self.archived_tasks = None
+            self.archive_pending = []
+            self.archive_offset, self.archive_size = 0, 0
+            self.archive_records, self.archive_dead = 0, 0
+            self.archive_min_ID, self.archive_max_ID = 0, 0
+            self.aliases = {}
+            self.statistics = TaskStats()
+
+        # replays the mutations journaled since the last snapshot was written
+        self.min_ID, self.max_ID = 0, 0
+        with self.profiler.phase("replay journal"):
+            self.replay_journal()
+
+        # the first and last keys are the minimum and maximum open IDs (see the 'tasks' attribute); the archive's are saved with the snapshot
+        self.min_ID = min(filter(None, (next(iter(self.tasks), 0), self.archive_min_ID)), default=0)
+        self.max_ID = max(next(reversed(self.tasks), 0), self.archive_max_ID)
 
         self.age_updated = False
+        self.age_expiry = None
+        self.deferred_writes = False
+        self.pending_records = []
+        self.journal_end = 0
         
 #===========================================================================
 #SECTION File processing methods
 #===========================================================================
-    def pickle_tasks(self):
-        """Pickle relevant data for the 'Tasks' object into a file.
-        Currently saves: (i) list of Task objects, (ii) list of Task IDs
-        Path to save is given by 'self.filename'. """
+    @classmethod
+    def lock(cls, exclusive=True):
+        """ Returns the lock of the tasks files ('cls.lock_filename') as a context manager. 
+        Hold it exclusive from loading the tasks to saving the changes, or shared to only read them. See 'myLocks.FileLock'.
 
-        with open(self.filename, 'wb') as file:
-            Tasks_data = {"tasks":self.tasks, "tasks_ID":self.tasks_ID}
-            pickle.dump(Tasks_data, file)
+        Examples:
+            with Tasks.lock():
+                tasks = Tasks(); tasks.add("walk dog")
+            tasks.sync()
+        """
+        return FileLock(cls.lock_filename, exclusive, cls.lock_timeout)
+
+    def fsync(self, file):
+        """ Forces a written file to the disk if 'self.sync_mode' is set"""
+        if self.sync_mode is not None:
+            file.flush()
+            os.fsync(file.fileno())
+
+    def pickle_tasks(self, rewrite_archive=False):
+        """Pickle relevant data for the 'Tasks' object into a file (the 'snapshot').
+        Currently saves: (i) dict of Task objects by ID, (ii) the snapshot generation, (iii) the query index, (iv) the order of unfinished tasks, 
+        (v) the array of created dates, (vi) the size of the archive file and its minimum and maximum IDs, (vii) the statistics of '--stats'
+        Path to save is given by 'self.filename'. Any journal written for the previous snapshot is discarded. 
+        The tasks archived since the previous snapshot are first appended to the archive file ('self.write_archive'), or the archive is compacted 
+        ('self.compact_archive') if 'rewrite_archive' is set (see 'self.reset_IDs') or its dead bytes pass 'self.archive_max_dead_bytes'.
+        The snapshot is written to a temporary file renamed over 'self.filename', so a crash mid-write leaves the previous snapshot whole.
+        Written in 'self.snapshot_format': pickled, or in the binary format of TaskManagerStore.py (same data)."""
+
+        # drops the positions of deleted (or archived) tasks from the array of created dates
+        if len(self.created_epochs) != len(self.tasks):
+            self.build_created_epochs()
+        self.load_statistics()
+
+        self.new_version()
+        if rewrite_archive or self.archive_compaction_due():
+            self.compact_archive()
+        else:
+            self.write_archive()
+
+        # expired aliases are dropped
+        now = time.time()
+        self.aliases = {old_ID: alias for old_ID, alias in self.aliases.items() if alias[1] > now}
+
+        # a new generation makes journal records written for the previous snapshot stale, even if the journal removal below fails
+        self.generation += 1
+        temporary_filename = self.filename + ".tmp"
+        with self.profiler.phase("save snapshot"), open(temporary_filename, 'wb') as file:
+            if self.snapshot_format == "binary":
+                import TaskManagerStore
+                TaskManagerStore.dump_snapshot(self, file, self.snapshot_compression)
+            else:
+                Tasks_data = {"tasks":self.tasks, "generation":self.generation, "query_index":self.query_index, "open_order":self.open_order,
+                              "created_epochs":self.created_epochs, "archive_offset":self.archive_offset, "archive_size":self.archive_size, 
+                              "archive_records":(self.archive_records, self.archive_dead),
+                              "archive_IDs":(self.archive_min_ID, self.archive_max_ID), "aliases":self.aliases, "statistics":self.statistics}
+                pickle.dump(Tasks_data, file)
+            self.fsync(file)
+        os.replace(temporary_filename, self.filename)
+
+        # the rename itself is saved to the disk with the directory
+        if self.sync_mode is not None:
+            directory = os.open(os.path.dirname(os.path.abspath(self.filename)), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+        if os.path.isfile(self.journal_filename):
+            os.remove(self.journal_filename)
+        self.trim_archive()
+
+        # the snapshot already holds any mutation not yet journaled
+        self.pending_records = []
+
+    def new_version(self):
+        """ Replaces the token of 'self.version_filename' by a new random one. Called before each write of the tasks to the disk, so the version
+        of the tasks read by 'store_version' changes with every write, even if the files keep the same size and modification time 
+        (e.g., on file systems with coarse timestamps). Obs.: written first, so a run stopped mid-write at worst changes the version only"""
+        with open(self.version_filename, 'wb') as file:
+            file.write(os.urandom(16))
+
+    def persist(self, record):
+        """ Saves a mutation of the 'Tasks' data to the disk, unless 'self.deferred_writes' is set (then saved by the next 'self.flush()').
+
+        Args: record (tuple): the mutation, as in ('add', Task), ('done', task_ID, completed_dt), ('delete', task_ID) or ('import', [Task, ...])
+        """
+        self.pending_records.append(record)
+        if not self.deferred_writes:
+            self.flush()
+
+    def flush(self):
+        """ Saves the pending mutations to the disk. 
+        In journal mode, appends them to the journal in a single write and compacts it when it passes 'self.journal_max_bytes'; 
+        otherwise rewrites the whole snapshot.
+        """
+        if not self.pending_records:
+            return
+
+        if not self.journal_mode:
+            self.pickle_tasks()
+            return
+
+        # a new journal starts with a header binding it to the current snapshot generation
+        records = self.pending_records
+        if not os.path.isfile(self.journal_filename):
+            records = [("generation", self.generation)] + records
+        data = b"".join(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL) for record in records)
+
+        self.new_version()
+        with self.profiler.phase("save journal"), open(self.journal_filename, 'ab') as file:
+            file.write(data)
+            journal_size = file.tell()
+            # in 'group' mode, the journal is forced to the disk later by 'self.sync()'
+            if self.sync_mode == "group":
+                self.journal_end = journal_size
+            else:
+                self.fsync(file)
+        self.pending_records = []
+
+        if journal_size > self.journal_max_bytes:
+            self.pickle_tasks()
+
+    def sync(self):
+        """ Group commit ('sync_mode' 'group'): forces the journal written by this process to the disk, unless a concurrent process already did.
+        Called after the lock is released (see todo.py). Waits 'self.group_commit_window' seconds for other writers, then takes the lock of 
+        'self.sync_filename': if the journal was forced to the disk past this process' last write ('self.journal_end'), returns; 
+        otherwise calls 'os.fsync' once for the writes of all the processes so far and records the size forced to the disk.
+        """
+        if self.sync_mode != "group" or not self.journal_end:
+            return
+
+        time.sleep(self.group_commit_window)
+        with self.profiler.phase("group commit"), FileLock(self.sync_filename, True, self.lock_timeout):
+            try:
+                file = open(self.journal_filename, 'rb')
+            except FileNotFoundError:
+                # the journal was folded into a snapshot, which was forced to the disk
+                self.journal_end = 0
+                return
+
+            with file:
+                # a journal of another generation means ours was folded into a snapshot too
+                try:
+                    header = pickle.load(file)
+                except Exception:
+                    header = None
+                if header != ("generation", self.generation):
+                    self.journal_end = 0
+                    return
+
+                with open(self.sync_filename, 'r+') as sync_file:
+                    synced = sync_file.read().split()
+                    if len(synced) == 2 and synced[0] == str(self.generation) and int(synced[1]) >= self.journal_end:
+                        self.journal_end = 0
+                        return
+
+                    size = os.fstat(file.fileno()).st_size
+                    os.fsync(file.fileno())
+                    sync_file.seek(0)
+                    sync_file.truncate()
+                    sync_file.write(f"{self.generation} {size}")
+        self.journal_end = 0
+
+    def write_archive(self, rewrite=False):
+        """ Appends the pending archive records ('self.archive_pending') to the archive file in a single write, and updates 'self.archive_size'.
+        Bytes after 'self.archive_size' are cut first: they were written for a snapshot that was never saved, and their records are in the journal.
+
+        Args: rewrite (bool): the pending records replace the whole archive (see 'self.reset_IDs'). They are written where they do not overwrite 
+                              the archive of the snapshot on disk (at the start of the file if they fit before it, otherwise after it), 
+                              so the new archive only replaces it when the next snapshot is saved.
+        """
+        if not self.archive_pending and not rewrite:
+            return
+
+        data = pickle.dumps(self.archive_pending, protocol=pickle.HIGHEST_PROTOCOL)
+        start = self.archive_size
+        if rewrite and len(data) <= self.archive_offset:
+            start = 0
+
+        with self.profiler.phase("save archive"), open(self.archive_filename, 'r+b' if os.path.isfile(self.archive_filename) else 'wb') as file:
+            if start == self.archive_size:
+                file.truncate(self.archive_size)
+            file.seek(start)
+            file.write(data)
+            self.fsync(file)
+
+        if rewrite:
+            self.archive_offset = start
+            self.archive_records, self.archive_dead = len(self.archive_pending), 0
+        self.archive_size = start + len(data)
+        self.archive_pending = []
+
+    def compact_archive(self):
+        """ Rewrites the archive with a 'put' record for each completed task, in ID order, dropping the dead records (deleted tasks) and the archives 
+        replaced before 'self.archive_offset'. Loads the archive. As with any rewrite, the new archive is written where it does not overwrite the 
+        one of the snapshot on disk (see 'self.write_archive'), so it takes effect with the next snapshot; the file is then cut ('self.trim_archive').
+        Obs.: when the new archive does not fit before the current one, it is written after it, and the next compaction moves it to the start."""
+        with self.profiler.phase("compact archive"):
+            archived_tasks = self.load_archive()
+            self.archive_pending = [("put", archived_tasks[task_ID]) for task_ID in sorted(archived_tasks)]
+            self.write_archive(rewrite=True)
+
+    def archive_dead_bytes(self):
+        """ Estimates the bytes of the archive file that hold no completed task, without loading it: the archives replaced before 'self.archive_offset', 
+        and the share of dead records ('self.archive_dead') of the bytes after it"""
+        if not self.archive_records:
+            return self.archive_offset
+        return self.archive_offset + (self.archive_size - self.archive_offset) * self.archive_dead // self.archive_records
+
+    def archive_compaction_due(self):
+        """ Returns True if the dead bytes of the archive pass 'self.archive_max_dead_bytes' and half the archive file"""
+        dead_bytes = self.archive_dead_bytes()
+        return dead_bytes > self.archive_max_dead_bytes and 2 * dead_bytes > self.archive_size
+
+    def trim_archive(self):
+        """ Cuts the archive file after 'self.archive_size' (e.g., the end of an archive replaced by a compaction written at the start of the file). 
+        Obs.: only once the snapshot referring to the archive is saved; until then, the bytes may hold the archive of the previous snapshot."""
+        try:
+            if os.path.getsize(self.archive_filename) > self.archive_size:
+                os.truncate(self.archive_filename, self.archive_size)
+        except FileNotFoundError:
+            pass
+
+    def load_archive(self):
+        """ Returns the completed tasks ('self.archived_tasks'), reading the archive file on first use.
+        The records not yet written ('self.archive_pending') are applied over the file's.
+        """
+        if self.archived_tasks is not None:
+            return self.archived_tasks
+
+        archived_tasks = {}
+        with self.profiler.phase("load archive"):
+            data = b""
+            if os.path.isfile(self.archive_filename):
+                with open(self.archive_filename, 'rb') as file:
+                    file.seek(self.archive_offset)
+                    data = file.read(self.archive_size - self.archive_offset)
+
+            stream = BytesIO(data)
+            n_records = len(self.archive_pending)
+            while stream.tell() < len(data):
+                records = pickle.load(stream)
+                n_records += len(records)
+                self.apply_archive_records(archived_tasks, records)
+            self.apply_archive_records(archived_tasks, self.archive_pending)
+
+        # the exact counts of records, as the archive is read
+        self.archive_records, self.archive_dead = n_records, n_records - len(archived_tasks)
+        self.archived_tasks = archived_tasks
+        return archived_tasks
+
+    @staticmethod
+    def apply_archive_records(archived_tasks, records):
+        """ Applies archive records, as in ('put', Task) or ('delete', task_ID), to a dict of archived tasks by ID"""
+        for operation, value in records:
+            if operation == "put":
+                archived_tasks[value.task_ID] = value
+            else:
+                archived_tasks.pop(value, None)
+
+    def archive_task(self, task):
+        """ Moves a completed task (already removed from 'self.tasks' and its indexes) to the archive"""
+        task.slot = None
+        self.archive_pending.append(("put", task))
+        self.archive_records += 1
+        if self.archived_tasks is not None:
+            self.archived_tasks[task.task_ID] = task
+        self.archive_min_ID = min(self.archive_min_ID or task.task_ID, task.task_ID)
+        self.archive_max_ID = max(self.archive_max_ID, task.task_ID)
+
+    def update_archive_IDs(self):
+        """ Computes 'self.archive_min_ID' and 'self.archive_max_ID' over the archived tasks. Loads the archive."""
+        archived_tasks = self.load_archive()
+        self.archive_min_ID, self.archive_max_ID = min(archived_tasks, default=0), max(archived_tasks, default=0)
+
+    def archive_values(self):
+        """ Returns the archived Task objects in ID order. Loads the archive."""
+        archived_tasks = self.load_archive()
+        return [archived_tasks[task_ID] for task_ID in sorted(archived_tasks)]
+
+    def all_tasks(self):
+        """ Iterates over all Task objects, open and archived, in ID order. Loads the archive."""
+        return merge(self.tasks.values(), self.archive_values(), key=lambda task: task.task_ID)
+
+    def replay_journal(self):
+        """ Applies the records of the journal over the 'Tasks' data loaded from the snapshot.
+        A journal written for another snapshot generation is stale and discarded. 
+        A partially written last record (e.g., the app was killed mid-write) is ignored and cut from the journal.
+        """
+        if not os.path.isfile(self.journal_filename):
+            return
+
+        valid_offset = 0
+        with open(self.journal_filename, 'rb') as file:
+            try:
+                header = pickle.load(file)
+            except Exception:
+                header = None
+
+            if header == ("generation", self.generation):
+                valid_offset = file.tell()
+                while True:
+                    try:
+                        record = pickle.load(file)
+                    except EOFError:
+                        break
+                    except Exception:
+                        # torn write at the end of the journal; keeps only the records before it
+                        break
+                    self.apply_record(record)
+                    valid_offset = file.tell()
+
+        if valid_offset == 0:
+            os.remove(self.journal_filename)
+        elif valid_offset < os.path.getsize(self.journal_filename):
+            os.truncate(self.journal_filename, valid_offset)
+
+    def apply_record(self, record):
+        """ Applies one journal record to the 'Tasks' data. See 'self.persist' for the records format."""
+        operation = record[0]
+
+        if operation == "add":
+            task = record[1]
+            self.tasks[task.task_ID] = task
+            self.query_index.add(task.task_ID, task.name)
+            if self.statistics is not None:
+                self.statistics.add(task)
+            if task.completed_ts is None:
+                insort(self.open_order, self.order_key(task))
+            # obs.: the column store keeps 'created_epochs' itself
+            if not self.column_store:
+                task.slot = len(self.created_epochs)
+                self.created_epochs.append(task.created_ts)
+            # the new task has no 'age' yet
+            self.age_updated = False
+            self.max_ID = task.task_ID
+            if not self.min_ID:
+                self.min_ID = task.task_ID
+
+        elif operation == "import":
+            # many new tasks, in ascending ID order above 'max_ID' (see 'self.import_tasks'): the completed ones go to the archive.
+            # The '--list' order is sorted once for all of them, merging two sorted runs, instead of inserting each key by bisection.
+            new_keys = []
+            for task in record[1]:
+                if self.statistics is not None:
+                    self.statistics.add(task)
+                if task.completed_ts is not None:
+                    self.archive_task(task)
+                    continue
+                self.tasks[task.task_ID] = task
+                self.query_index.add(task.task_ID, task.name)
+                new_keys.append(self.order_key(task))
+                if not self.column_store:
+                    task.slot = len(self.created_epochs)
+                    self.created_epochs.append(task.created_ts)
+            self.open_order += sorted(new_keys)
+            self.open_order.sort()
+            if record[1]:
+                self.age_updated = False
+                self.max_ID = record[1][-1].task_ID
+                if not self.min_ID:
+                    self.min_ID = record[1][0].task_ID
+
+        elif operation == "done":
+            # the completed task moves from the active tasks to the archive
+            _, task_ID, completed_dt = record
+            task = self.tasks.pop(task_ID)
+            self.query_index.remove(task_ID, task.name)
+            self.remove_open_order(task)
+            if self.statistics is not None:
+                self.statistics.remove(task)
+            task.completed_dt = completed_dt
+            if self.statistics is not None:
+                self.statistics.add(task)
+            self.archive_task(task)
+
+        elif operation == "delete":
+            task_ID = record[1]
+            if task_ID in self.tasks:
+                task = self.tasks.pop(task_ID)
+                self.query_index.remove(task_ID, task.name)
+                self.remove_open_order(task)
+                if self.statistics is not None:
+                    self.statistics.remove(task)
+            else:
+                # a completed task: removed from the archive
+                if self.statistics is not None:
+                    self.statistics.remove(self.load_archive()[task_ID])
+                self.archive_pending.append(("delete", task_ID))
+                self.archive_records += 1
+                self.archive_dead += 2
+                if self.archived_tasks is not None:
+                    self.archived_tasks.pop(task_ID, None)
+                if task_ID in (self.archive_min_ID, self.archive_max_ID):
+                    self.update_archive_IDs()
+
+            # if the minimum ID was deleted, 'min_ID' is recomputed from the first open ID and the archive's minimum, as when loading, so the archive 
+            # is not read. Obs.: 'max_ID' is kept, as new IDs continue from it.
+            if task_ID == self.min_ID:
+                self.min_ID = min(filter(None, (next(iter(self.tasks), 0), self.archive_min_ID)), default=0)
+
+    def build_query_index(self):
+        """ Builds 'self.query_index' from all the tasks' names"""
+        self.query_index = NgramIndex(self.query_ngram)
+        for task_ID, task in self.tasks.items():
+            self.query_index.add(task_ID, task.name)
+
+    @staticmethod
+    def order_key(task):
+        """ Sort key of a task in '--list' order: tasks with no due date last, 'due_dt' ascending, 'priority' descending, then ID. 
+        Same order as 'self.sort_tasks(..., due_dt_order='ascending', priority_order='descending')' over tasks in ID order."""
+        if task.due_ts is None:
+            return (True, 0, -task.priority, task.task_ID)
+        return (False, task.due_ts, -task.priority, task.task_ID)
+
+    def build_open_order(self):
+        """ Builds 'self.open_order' from all the unfinished tasks"""
+        self.open_order = sorted(self.order_key(task) for task in self.tasks.values() if task.completed_ts is None)
+
+    def build_created_epochs(self):
+        """ Builds 'self.created_epochs' from all the tasks, in ID order, and updates the position ('slot') of each task in it"""
+
+        # the column store keeps the created dates in its own column; its rows are the slots
+        if self.column_store:
+            self.tasks.compact()
+            self.created_epochs = self.tasks.created
+            return
+
+        self.created_epochs = array('q', (task.created_ts for task in self.tasks.values()))
+        for slot, task in enumerate(self.tasks.values()):
+            task.slot = slot
+
+    def remove_open_order(self, task):
+        """ Removes a task from 'self.open_order' (if unfinished), finding its key by bisection"""
+        if task.completed_ts is None:
+            del self.open_order[bisect_left(self.open_order, self.order_key(task))]
+
+    @property
+    def tasks_ID(self):
+        """ IDs of all the 'Task' objects (open and archived), in ascending order"""
+        return list(merge(self.tasks, sorted(self.load_archive())))
+
+    def get_task(self, task_ID):
+        """ Retrieves a 'Task' object by its ID. Obs.: assumes the ID is valid (see 'self.valid_ID'). The archive is only loaded for completed tasks."""
+        if task_ID in self.tasks:
+            return self.tasks[task_ID]
+        return self.load_archive()[task_ID]
+
+    def ID_exists(self, task_ID):
+        """ Returns True if a 'Task' object with ID 'task_ID' is stored. The archive is only loaded if the ID is not an open task."""
+        return task_ID in self.tasks or task_ID in self.load_archive()
 
 
 #\SECTION
@@ -94,10 +764,16 @@ class Tasks(object):
         if task_ID < self.min_ID or task_ID > self.max_ID:
             return False, f"\nPlease input a task task_ID between {self.min_ID} and {self.max_ID}\nTip: To retrieve information about tasks (including ID numbers), use --query to retrieve search tasks by name.\n"
 
-        if task_ID not in self.tasks_ID:
+        if not self.ID_exists(task_ID):
             return False, f"\nTask ID not found.\nTip: To retrieve information about tasks (including ID numbers), --query allows to retrieve information about tasks (including IDs) by name.\n"
 
         return True, None
+
+    def valid_cursor(self, task_ID):
+        """ Checks the '--after' input given by the user: None (no cursor) or the ID of a stored task. See 'self.valid_ID'."""
+        if task_ID is None:
+            return True, None
+        return self.valid_ID(task_ID)
 #\SECTION
 
 
@@ -107,7 +783,7 @@ class Tasks(object):
     
     def add(self, name, priority = None, due_dt = None):
         """ Implements the command-line '--add' option. 
-        If sucessful, adds a 'Task' object and its ID to 'self.tasks' and 'self.tasks_ID' lists.
+        If sucessful, adds a 'Task' object to 'self.tasks' under its ID.
   
         Args:
           name(str): name of the task entered by the user in the terminal.
@@ -125,27 +801,27 @@ class Tasks(object):
         # checks if 'priority' input is valid; accumulate an error msg if not
         if priority:
             if not self.valid_priority(priority):
-                msg += f"\nFor 'priority' please a whole number between {self.min_priority} and {self.max_priority}\n"
+                msg += f"\nFor 'priority' please input a whole number between {self.min_priority} and {self.max_priority}\n"
 
-        # checks if 'due date' input is valid; accumulate an error msg if not
+        # checks if 'due date' input is valid (parsing it once); accumulate an error msg if not
         if due_dt:
-            if not myDates.valid_date(due_dt, remove_whitespace=True, dt_format=self.dt_format):
+            due_dt, error = myDates.parse_date(due_dt, remove_whitespace=True, dt_format=self.dt_format)
+            if error:
                 msg += f"\nFor 'due date' please input a date in the format mm/dd/yyyy. Examples: 12/31/2022, 12/1/2022, 01/1/2022, 1/1/2022\n"
 
         # if no error, adds the task to the list
         if len(msg)==0:
-           # attributes a new ID to the new 'Task' and updates max_ID
-           self.max_ID += 1
-           task_id = self.max_ID
+           # attributes a new ID to the new 'Task'; max_ID is updated when the 'Task' is included
+           task_id = self.max_ID + 1
 
-           # includes the new 'Task' object and its ID in the 'Tasks' lists
-           self.tasks.append(Task(name, priority, due_dt, task_id))
-           self.tasks_ID.append(task_id)
+           # includes the new 'Task' object in the 'Tasks' dict
+           record = ("add", Task(name, priority, due_dt, task_id))
+           self.apply_record(record)
 
            # msg and boolean indicating success; saves updated 'Tasks' data to the disk.
            msg+= f"\nCreated task {task_id}\n"
            worked = True
-           self.pickle_tasks()
+           self.persist(record)
         return msg, worked
 
 
@@ -162,15 +838,15 @@ class Tasks(object):
         msg=""
         worked=False
 
+        # an ID from before the last '--resetID' is translated to the current one
+        task_ID, msg = self.resolve_ID(task_ID)
+
         # checks if 'ID' input is valid; accumulate an error msg if not
         valid_id, error_msg = self.valid_ID(task_ID)
         if not valid_id:
             msg += error_msg
         else:
-            # retrieves 'Task' object from 'self.tasks' through the position of it's unique ID in 'self.tasks_ID'.
-                # obs: 'self.tasks_ID' contains 'Task' objects IDs in the same order they appear in the 'self.tasks list'.
-                #      'Task' objects may be in any order in the 'self.tasks list' (regardless of their ID numbers).
-            curr_task = self.tasks[self.tasks_ID.index(task_ID)]
+            curr_task = self.get_task(task_ID)
 
             # if the task was already complete, print a message for the user
             if curr_task.completed_dt:
@@ -178,19 +854,20 @@ class Tasks(object):
             else:
                 # updates the 'completed_dt' datetime attribute of the specified 'Task' object with the current day and time.
                 # in adding the datetime, ensures the date and time are in the user's local timezone.  
-                curr_task.completed_dt = myDates.date_localtz(datetime.now())
+                record = ("done", task_ID, myDates.date_localtz(datetime.now()))
+                self.apply_record(record)
 
                 # msg and boolean indicating success; saves updated 'Tasks' data to the disk.
                 msg += f"\nCompleted task {task_ID}, '{curr_task.name}'\n"
                 worked = True
                 
-                self.pickle_tasks()
+                self.persist(record)
             
         return msg, worked
 
     def delete(self, task_ID):
         """ Implements the command-line '--del' option. 
-        If sucessful, the specified 'Task' object and its ID are removed from 'self.tasks' and 'self.tasks_ID' lists.
+        If sucessful, the specified 'Task' object is removed from 'self.tasks'.
 
         Args:
             task_ID (int): unique identifier of the 'Task' object entered by the user in the terminal.
@@ -202,48 +879,178 @@ class Tasks(object):
         msg=""
         worked=False
 
+        # an ID from before the last '--resetID' is translated to the current one
+        task_ID, msg = self.resolve_ID(task_ID)
+
         # checks if 'ID' input is valid; accumulate an error msg if not
         valid_id, error_msg = self.valid_ID(task_ID)
         if not valid_id:
             msg += error_msg
 
         else:
-            # retrieves and delete 'Task' object from 'self.tasks' through the position of it's unique ID in 'self.tasks_ID'.
-                # obs: 'self.tasks_ID' contains 'Task' objects IDs in the same order they appear in the 'self.tasks list'.
-                #      'Task' objects may be in any order in the 'self.tasks list' (regardless of their ID numbers).
-            del self.tasks[self.tasks_ID.index(task_ID)]
-            self.tasks_ID.remove(task_ID)
+            # deletes the 'Task' object from the 'Tasks' dict
+            record = ("delete", task_ID)
+            self.apply_record(record)
 
             # msg and boolean indicating success; saves updated 'Tasks' data to the disk.
             msg+= f"Deleted task {task_ID}"
             worked = True
-            self.pickle_tasks()
+            self.persist(record)
         return msg, worked
 
+    def import_tasks(self, filename):
+        """ Implements the command-line '--import' option. 
+        Adds the tasks of a CSV or JSON Lines file (see 'myRecords'), read one record at a time. Fields: 'name', and optionally 'priority', 
+        'due' (in 'self.dt_format'), 'created' and 'completed' (ISO 8601 dates, as written by '--export'); any 'id' is ignored.
+        Records are validated as with '--add'; invalid ones are reported and skipped. The valid ones get the IDs after 'max_ID', in file order.
+        They are applied in chunks of 'self.import_chunk_size' tasks as the file is read ('self.apply_import'), so the parsed records held at once
+        are bounded; all the chunks are saved at once at the end ('self.save_import'). 
+        Obs.: with the pickle backend the imported tasks join the store, which is kept in memory; the SQLite backend only holds a chunk.
+        If the file cannot be read to the end, the tasks read before the error are imported.
+
+        Args: filename (str): path of the file (.csv for CSV, JSON Lines otherwise)
+
+        Returns:
+            msg (str): A message to print in the terminal indicating sucess or failure of the command (with the first invalid records, if any).
+            worked(bool): 'True' if any task was imported, 'False' if none
+        """
+        from myRecords import read_records
+
+        chunk, errors, n_errors = [], [], 0
+        first_ID = task_ID = self.max_ID
+        read_error = None
+        # the tasks of an import are created at the same time
+        now = myDates.date_localtz(datetime.now())
+        # the new tasks hold no reference cycles; the garbage collector would only scan them again and again while they are created (as in loading)
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for line_number, record in read_records(filename):
+                task, error_msg = self.record_to_task(record, task_ID + 1, now)
+                if error_msg:
+                    n_errors += 1
+                    if len(errors) < self.max_import_errors:
+                        errors.append(f"Line {line_number}: {error_msg.strip()}")
+                    continue
+                task_ID += 1
+                chunk.append(task)
+                if len(chunk) >= self.import_chunk_size:
+                    self.apply_import(chunk)
+                    chunk = []
+        except (OSError, UnicodeDecodeError) as error:
+            read_error = error
+        finally:
+            if gc_enabled:
+                gc.enable()
+        if chunk:
+            self.apply_import(chunk)
+
+        n_imported = task_ID - first_ID
+        msg = ""
+        if n_imported:
+            self.save_import(n_imported)
+            msg += f"\nImported {n_imported} tasks (IDs {first_ID + 1} to {task_ID})\n"
+        elif read_error is None:
+            msg += f"\nNo task imported from {filename}\n"
+
+        if read_error is not None:
+            msg += f"\nCould not read {filename}: {read_error}\n"
+        if n_errors:
+            msg += f"\n{n_errors} invalid records skipped:\n" + "\n".join(errors)
+            msg += f"\n... and {n_errors - len(errors)} more\n" if n_errors > len(errors) else "\n"
+        return msg, n_imported > 0
+
+    def apply_import(self, tasks_chunk):
+        """ Applies a chunk of the new tasks of '--import' (see 'self.import_tasks'). Its record is kept in 'self.pending_records' until 'self.save_import'."""
+        record = ("import", tasks_chunk)
+        self.apply_record(record)
+        self.pending_records.append(record)
+
+    def save_import(self, n_imported):
+        """ Saves the chunks applied by 'self.apply_import', unless 'self.deferred_writes' is set (then saved by the next 'self.flush()').
+        In journal mode, more tasks than fit in 'self.journal_max_bytes' (a pickled task takes more than 64 bytes) are saved with a snapshot: 
+        journaled, they would be folded into one right away."""
+        if self.deferred_writes:
+            return
+        if self.journal_mode and n_imported * 64 > self.journal_max_bytes:
+            self.pickle_tasks()
+        else:
+            self.flush()
+
+    def record_to_task(self, record, task_ID, now):
+        """ Validates a record of '--import' and builds its 'Task' object (see 'self.import_tasks').
+
+        Args:
+            record (dict|None): the record read from the file (None if the line was not a valid record)
+            task_ID (int): ID of the new task
+            now (datetime): created date of a task with no 'created' field (aware, in the local timezone)
+
+        Returns:
+            task (Task|None): the new task, or None if the record is not valid
+            error_msg (str): a string containing an appropriate error message in case the record is not valid
+        """
+        if record is None:
+            return None, "not a valid record"
+
+        name = record.get("name")
+        if name is None or not str(name).strip():
+            return None, "please input the 'name' of the task"
+
+        # only whole numbers: booleans and floats are not truncated into priorities
+        priority = record.get("priority")
+        if priority is not None:
+            if isinstance(priority, str) and str_is_integer(priority, False, False):
+                priority = int(priority)
+            elif isinstance(priority, bool) or not isinstance(priority, int):
+                priority = None
+            if priority is None or not self.valid_priority(priority):
+                return None, f"For 'priority' please input a whole number between {self.min_priority} and {self.max_priority}"
+
+        due_dt = record.get("due")
+        if due_dt is not None and not myDates.valid_date(str(due_dt), remove_whitespace=True, dt_format=self.dt_format):
+            return None, f"For 'due' please input a date in the format mm/dd/yyyy, not '{due_dt}'"
+
+        # exported dates keep their UTC offset; dates with none are taken as local dates
+        dates = {}
+        for field in ("created", "completed"):
+            if record.get(field) is not None:
+                try:
+                    date = datetime.fromisoformat(str(record[field]))
+                except ValueError:
+                    return None, f"For '{field}' please input an ISO 8601 date (e.g., 2022-12-31T18:30:00-03:00), not '{record[field]}'"
+                dates[field] = date if date.tzinfo is not None else myDates.date_localtz(date)
+
+        # obs.: the due date was parsed (memoized) by 'myDates.valid_date'
+        task = Task.restore(str(name), priority or self.default_priority, task_ID, dates.get("created", now),
+                            myDates.date_localtz(myDates.parse_date(str(due_dt), True, self.dt_format)[0]) if due_dt is not None else None,
+                            dates.get("completed"))
+        return task, ""
+
 #\SECTION
 
 #===========================================================================
 #SECTION methods for printing/reporting to the user
 #===========================================================================
      
-    def list_tasks(self):
-        """ Implements the command-line '--del' option.
+    def list_tasks(self, limit=None, offset=0, after=None):
+        """ Implements the command-line '--list' option.
         Lists all unfinished tasks data. Sort by priority (higher-low) then by due date (closer to furthest in time).
 
+        Args:
+            limit (int, optional): maximum number of tasks to print (a page). Defaults to all.
+            offset (int): number of tasks to skip before the page.
+            after (int, optional): cursor; ID of a task after which the page starts (e.g., the last ID of the previous page).
+
         Returns:
             (str): A formatted table containing data for the unfinished tasks. Obs.: if no unfinished tasks, table still returned only with headers.
         """
 
-        # updates the 'age' attribute of each 'Task' object ('age' of Task = timedelta(now, Task.created_dt))
-        if not self.age_updated:
-            self.set_age()
-            self.age_updated = True
-            
-        # sort tasks: 'priority' higher-low ; 'due date' closer to furthest. If no 'due date', goes to the end of the list.
-        sorted_tasks = self.sort_tasks(self.tasks, due_dt_order = 'ascending', priority_order = 'descending')
+        valid_cursor, error_msg = self.valid_cursor(after)
+        if not valid_cursor:
+            return error_msg
 
-        # filter out completed tasks from the list
-        sorted_tasks = filter(lambda task: task.completed_dt is None, sorted_tasks)
+        # unfinished tasks sorted by: 'priority' higher-low ; 'due date' closer to furthest. If no 'due date', goes to the end of the list.
+        sorted_tasks, remaining = self.select_page(open_only=True, limit=limit, offset=offset, after=after)
 
         # Printing of the list of tasks: a dictionary is passed to 'self.tabulate_tasks()' that implements
         # the formatting of the table and returns a string ready to be printed in the terminal
@@ -257,23 +1064,24 @@ class Tasks(object):
                             'Task':'name'}
 
         # returns the output table as a string to be printed in the terminal 
-        return self.tabulate_tasks(header_attributes, sorted_tasks)
+        return self.tabulate_tasks(header_attributes, sorted_tasks) + self.page_footer(sorted_tasks, remaining, limit)
 
-    def report_tasks(self):
-        """ Implements the command-line '--del' option.
+    def report_tasks(self, limit=None, offset=0, after=None):
+        """ Implements the command-line '--report' option.
         Lists all tasks data. Sort by priority (higher-low) then by due date (closer to furthest in time).
 
+        Args: limit, offset, after: select a page of the tasks; see 'self.list_tasks'.
+
         Returns:
             (str): A formatted table containing data for all tasks. Obs.: if no data, table still returned only with headers.
         """
 
-        # updates the 'age' attribute of each 'Task' object ('age' of Task = timedelta(now, Task.created_dt))
-        if not self.age_updated:
-            self.set_age()
-            self.age_updated = True
+        valid_cursor, error_msg = self.valid_cursor(after)
+        if not valid_cursor:
+            return error_msg
 
         # sort tasks: 'priority' higher-low ; 'due date' closer to furthest. If no 'due date', goes to the end of the list.
-        sorted_tasks = self.sort_tasks(self.tasks,  due_dt_order = 'ascending', priority_order = 'descending')
+        sorted_tasks, remaining = self.select_page(limit=limit, offset=offset, after=after)
 
         # Printing of the task's report: a dictionary is passed to 'self.tabulate_tasks()' that implements
         # the formatting of the table and returns a string ready to be printed in the terminal.
@@ -287,40 +1095,37 @@ class Tasks(object):
                             'Task':'name', 'Created Date':'created_dt_str', 'Completed Date': 'completed_dt_str'}
 
         # returns the output table as a string to be printed in the terminal.
-        return self.tabulate_tasks(header_attributes, sorted_tasks)
+        return self.tabulate_tasks(header_attributes, sorted_tasks) + self.page_footer(sorted_tasks, remaining, limit)
 
 
-    def query_tasks(self, queries, sort_list=False):
+    def query_tasks(self, queries, sort_list=False, limit=None, offset=0, after=None, archived=False, ignore_case=False, regex=False):
         """ Implements the command-line '--query' option. 
         Search for unfinished tasks that match the search terms and list their data.
+        All the terms are compiled into one matcher (see 'mySearch.QueryMatcher'), so each name is tested once, whatever the number of terms.
 
         Args:
            queries (list): a list containing the search ters entered by the user in the terminal
            sort_list (bool): Sort the resulting list of tasks? If True, sort by priority (higher-low) then by due date (closer to furthest in time).      
+           limit, offset, after: select a page of the tasks found; see 'self.list_tasks'. Without 'sort_list', pages follow the ID order.
+           archived (bool): search the completed tasks in the archive instead (the '--archived' option).
+           ignore_case (bool): match the terms regardless of case (the '--ignore-case' option).
+           regex (bool): the terms are regular expressions, searched anywhere in the names (the '--regex' option).
         Returns:
-            msg (str): A formatted table containing data for all tasks found. If no task was found, an error message
+            msg (str): A formatted table containing data for all tasks found. If no task was found (or a regular expression is not valid), an error message
         """
 
-        # updates the 'age' attribute of each 'Task' object ('age' of Task = timedelta(now, Task.created_dt))
-        if not self.age_updated:
-            self.set_age()
-            self.age_updated = True
-            
-        if sort_list:
-            # sort tasks: 'priority' higher-low ; 'due date' closer to furthest. If no 'due date', goes to the end of the list.
-            sorted_tasks = self.sort_tasks(self.tasks, due_dt_order = 'ascending', priority_order = 'descending')
-        else:
-            sorted_tasks = self.task
+        valid_cursor, error_msg = self.valid_cursor(after)
+        if not valid_cursor:
+            return error_msg, False
 
-        # loop: search for each term in the list of Tasks, returning the Task object if term found and Task not complete
-        filtered_tasks = [] 
-        for query in queries:
-            filtered_list = list(filter(lambda task: query in task.name and task.completed_dt is None, sorted_tasks))
-            filtered_tasks.append(filtered_list)
-     
-        # flatten the list of filtered 'Task' objects and keep only the unique matches
-        filtered_tasks = set(list(chain(*filtered_tasks)))
-        
+        try:
+            QueryMatcher(queries, ignore_case, regex)
+        except ValueError as error:
+            return str(error), False
+
+        # unfinished tasks matching any of the search terms
+        filtered_tasks, remaining = self.select_page(open_only=not archived, queries=queries, sort_list=sort_list, limit=limit, offset=offset, after=after, 
+                                                     archived=archived, ignore_case=ignore_case, regex=regex)
 
         if len(filtered_tasks)>0:
             # Printing of the task's report: a dictionary is passed to 'self.tabulate_tasks()' that implements
@@ -332,9 +1137,11 @@ class Tasks(object):
                 # Example: {'Priority will be printed like this: Task.priority'}
             header_attributes = {'ID': 'task_ID', 'Age': 'age', 'Due Date': 'due_dt_str', 'Priority': 'priority', 
                             'Task':'name'}
+            if archived:
+                header_attributes['Completed Date'] = 'completed_dt_str'
 
             # string with table of tasks to print in the terminal and boolean indicating success.
-            msg = self.tabulate_tasks(header_attributes, filtered_tasks)
+            msg = self.tabulate_tasks(header_attributes, filtered_tasks) + self.page_footer(filtered_tasks, remaining, limit)
             worked = True
         else:
             # string and boolean indicating failure.
@@ -342,22 +1149,342 @@ class Tasks(object):
             worked = False
         return msg, worked
 
+    def report_stats(self, rebuild=False):
+        """ Implements the command-line '--stats' option. 
+        Summarizes the tasks: unfinished tasks (by priority), overdue tasks, completed tasks and the time they took to complete (median, 
+        90th percentile and mean of 'completed_dt - created_dt'). Read from 'self.statistics', kept up to date by each mutation, so no task 
+        is read: the summary takes the same time whatever the size of the list (the overdue tasks are counted by bisection, see 'self.count_overdue').
+
+        Args: rebuild (bool): first recompute the statistics in one pass over all the tasks, to verify the kept ones (see 'self.rebuild_statistics')
+
+        Returns:
+            msg (str): A table with the statistics, after the result of the rebuild (if any).
+            worked(bool): 'True', unless the rebuilt statistics did not match the kept ones
+        """
+        msg, worked = "", True
+        if rebuild:
+            msg, worked = self.rebuild_statistics()
+
+        statistics = self.load_statistics()
+        completion_time = statistics.completion_time
+        rows = [["Open tasks", statistics.open]]
+        rows += [[f"Open tasks, priority {priority}", statistics.open_by_priority[priority]] for priority in sorted(statistics.open_by_priority, reverse=True)]
+        rows += [["Overdue tasks", self.count_overdue()], 
+                 ["Completed tasks", statistics.completed],
+                 ["Time to complete, median", self.format_duration(completion_time.quantile(0.5))],
+                 ["Time to complete, 90th percentile", self.format_duration(completion_time.quantile(0.9))],
+                 ["Time to complete, mean", self.format_duration(completion_time.mean())]]
+
+        with self.profiler.phase("tabulate"):
+            from tabulate import tabulate
+            return msg + "\n" + tabulate(rows, headers=["Statistic", "Value"], numalign="center") + "\n", worked
+
 #\SECTION        
 #===========================================================================
 #SECTION auxiliary methods to process and extract data from the Tasks list
 #===========================================================================
-    def set_age(self):
-        """ Sets the 'age' attribute of the Tasks objects. Task.age = timedelta(now, Task.created_dt)
+    def due_tasks(self, due_before=None, due_after=None, overdue=False, limit=None, offset=0, after=None):
+        """ Implements the command-line '--due-before', '--due-after' and '--overdue' options.
+        Lists the unfinished tasks due in a range of dates, in the order of '--list'. The range is a slice of 'self.open_order' (see 'self.select_page'),
+        so only the tasks in it are read and formatted. Tasks with no due date are after all dates, as in 'self.sort_tasks': 
+        they are listed by '--due-after' alone, never by '--due-before' or '--overdue'.
+
+        Args:
+            due_before, due_after (str|datetime, optional): the last and first due dates listed (both included), in 'self.dt_format' or as a datetime
+            overdue (bool): list only tasks whose due date has passed (before today)
+            limit, offset, after: select a page of the tasks; see 'self.list_tasks'.
+
+        Returns:
+            msg (str): A formatted table containing data for the tasks due in the range, or an error message.
+            worked(bool): 'True' if the tasks were listed, 'False' if an error ocurred
         """
-        # user's current LOCAL time
-        today = myDates.date_localtz(datetime.now())
+        valid_cursor, error_msg = self.valid_cursor(after)
+        if not valid_cursor:
+            return error_msg, False
 
-        # for each Task object, calculates updates the 'age' attribute. 
-        # time deltas are computed in UTC terms to prevent problems with timing conventions.
-        for task in self.tasks:
-            age = myDates.date_diff_absolute(today, task.created_dt).days
-            task.age = f"{age}d"
-        self.age_updated = True
+        due_range, error_msg = self.due_range(due_before, due_after, overdue)
+        if error_msg:
+            return error_msg, False
+
+        sorted_tasks, remaining = self.select_page(open_only=True, limit=limit, offset=offset, after=after, due_range=due_range)
+        header_attributes = {'ID': 'task_ID', 'Age': 'age', 'Due Date': 'due_dt_str', 'Priority': 'priority', 'Task':'name'}
+        return self.tabulate_tasks(header_attributes, sorted_tasks) + self.page_footer(sorted_tasks, remaining, limit), True
+
+    def due_range(self, due_before=None, due_after=None, overdue=False):
+        """ Converts the dates of 'self.due_tasks' to a range of due dates in UTC seconds since the epoch (as 'Task.due_ts'): 
+        from the start of the local day 'due_after' to the start of the day after 'due_before' (or of today, if 'overdue').
+
+        Returns:
+            due_range (tuple|None): (start, end): start included, end excluded, None if unbounded
+            error_msg (str): a string containing an appropriate error message in case a date is not valid
+        """
+        def day_start(date, days=0):
+            if isinstance(date, str):
+                date, error = myDates.parse_date(date, remove_whitespace=True, dt_format=self.dt_format)
+                if error:
+                    return None
+            date = datetime(date.year, date.month, date.day) + timedelta(days=days)
+            return int(myDates.date_localtz(date).timestamp())
+
+        start_ts = end_ts = None
+        if due_after is not None:
+            start_ts = day_start(due_after)
+            if start_ts is None:
+                return None, f"\nFor 'due after' please input a date in the format mm/dd/yyyy. Examples: 12/31/2022, 1/1/2022\n"
+        if due_before is not None:
+            end_ts = day_start(due_before, days=1)
+            if end_ts is None:
+                return None, f"\nFor 'due before' please input a date in the format mm/dd/yyyy. Examples: 12/31/2022, 1/1/2022\n"
+        if overdue:
+            today_ts = day_start(datetime.now())
+            end_ts = today_ts if end_ts is None else min(end_ts, today_ts)
+        return (start_ts, end_ts), ""
+
+    def load_statistics(self):
+        """ Returns 'self.statistics'. Snapshots written by previous versions of the app have none: they are then computed on first use, 
+        in one pass over all the tasks (loading the archive), and kept up to date and saved from then on."""
+        if self.statistics is None:
+            with self.profiler.phase("rebuild statistics"):
+                self.statistics = TaskStats(self.all_tasks())
+        return self.statistics
+
+    def rebuild_statistics(self):
+        """ Implements the command-line '--stats --rebuild' option.
+        Recomputes 'self.statistics' in one pass over all the tasks (loads the archive) and compares them with the ones kept by the mutations. 
+        If they differ, the recomputed ones replace them and are saved ('self.save_statistics').
+
+        Returns:
+            msg (str): A message to print in the terminal telling if the statistics matched.
+            worked(bool): 'True' if the kept statistics matched the recomputed ones, 'False' if they were replaced
+        """
+        with self.profiler.phase("rebuild statistics"):
+            statistics = TaskStats(self.all_tasks())
+        if statistics == self.load_statistics():
+            return "\nStatistics rebuilt from all the tasks: they match the kept ones\n", True
+
+        self.statistics = statistics
+        self.save_statistics()
+        return "\nStatistics rebuilt from all the tasks: they did not match the kept ones, and were replaced\n", False
+
+    def save_statistics(self):
+        """ Saves 'self.statistics' after they were replaced (not by a mutation, so not journaled): with a new snapshot"""
+        self.pickle_tasks()
+
+    def count_overdue(self):
+        """ Returns the number of unfinished tasks due before today: the position of the first task due today in 'self.open_order', found by bisection"""
+        today_ts = self.due_range(overdue=True)[0][1]
+        return bisect_left(self.open_order, (False, today_ts))
+
+    def export_tasks(self, filename):
+        """ Implements the command-line '--export' option. 
+        Writes all the tasks (open and completed) to a CSV or JSON Lines file, in the order of '--report', one record at a time (see 'self.sorted_tasks'
+        for the memory used).
+        Fields: 'id', 'name', 'priority', 'due' (in 'self.dt_format'), 'created' and 'completed' (ISO 8601 dates with their UTC offset). 
+        The file can be read back with '--import'.
+
+        Args: filename (str): path of the file (.csv for CSV, JSON Lines otherwise), replaced if it exists
+
+        Returns:
+            msg (str): A message to print in the terminal indicating sucess or failure of the command.
+            worked(bool): 'True' if the file was written, 'False' if an error ocurred
+        """
+        from myRecords import write_records
+        try:
+            n_records = write_records(filename, map(self.task_to_record, self.sorted_tasks()), self.export_fields)
+        except OSError as error:
+            return f"\nCould not write {filename}: {error}\n", False
+        return f"\nExported {n_records} tasks to {filename}\n", True
+
+    def sorted_tasks(self):
+        """ Iterates over all the tasks (open and completed) in the order of '--report' ('self.order_key') without sorting the open tasks: 
+        they are walked in 'self.open_order' and merged with the archived ones, sorted. 
+        Obs.: loads the archive, so memory grows with the archived tasks: its records are in the order the tasks were completed, not in this one.
+        The SQLite backend streams all the tasks from the database instead (see 'SQLiteTasks.sorted_tasks')."""
+        open_tasks = (self.tasks[key[-1]] for key in self.open_order)
+        return merge(open_tasks, sorted(self.load_archive().values(), key=self.order_key), key=self.order_key)
+
+    def task_to_record(self, task):
+        """ Converts a 'Task' object to a record of '--export' (see 'self.export_tasks')"""
+        def iso_date(ts):
+            # converted with the (memoized) fixed offset of its day when there is one, as the printed dates
+            return None if ts is None else datetime.fromtimestamp(ts, fixed_timezone(ts // 86400, task.tz) or Task.tz_table[task.tz]).isoformat()
+
+        due_dt = None
+        if task.due_ts is not None:
+            due_dt = datetime.fromtimestamp(task.due_ts, fixed_timezone(task.due_ts // 86400, task.tz) or Task.tz_table[task.tz]).strftime(self.dt_format)
+        return {"id": task.task_ID, "name": task.name, "priority": task.priority, "due": due_dt,
+                "created": iso_date(task.created_ts), "completed": iso_date(task.completed_ts)}
+
+    def select_tasks(self, open_only=False, queries=None, sort_list=True, archived=False, ignore_case=False, regex=False):
+        """ Retrieves the 'Task' objects to print to the user, with their 'age' attribute updated.
+
+        Args:
+            open_only (bool): keep only unfinished tasks?
+            queries (list, optional): if given, keep only tasks whose name contains any of the search terms.
+            sort_list (bool): Sort the tasks? If True, sort by priority (higher-low) then by due date (closer to furthest in time).
+            archived (bool): keep only the archived (completed) tasks?
+            ignore_case, regex (bool): how the 'queries' match the names; see 'self.query_tasks'.
+        Returns:
+            list: the selected 'Task' objects.
+        """
+        return self.select_page(open_only, queries, sort_list, archived=archived, ignore_case=ignore_case, regex=regex)[0]
+
+    def select_page(self, open_only=False, queries=None, sort_list=True, limit=None, offset=0, after=None, archived=False, due_range=None, 
+                    ignore_case=False, regex=False):
+        """ Retrieves one page of the 'Task' objects to print to the user. Only the tasks in the page have their 'age' attribute updated.
+        With a 'limit', the page is selected with a heap of 'offset + limit' tasks instead of sorting all the matches.
+        The archive (completed tasks) is only loaded if they are selected: not with 'open_only'.
+
+        Args:
+            open_only, queries, sort_list: see 'self.select_tasks'.
+            archived (bool): select the archived (completed) tasks only.
+            due_range (tuple, optional): select the tasks due in a range (start, end) of UTC seconds since the epoch: start included, end excluded,
+                                         None if unbounded (see 'self.due_range'). Tasks with no due date are after all dates, as in 'self.sort_tasks'.
+            ignore_case, regex (bool): how the 'queries' match the names; see 'self.query_tasks'. 
+                                       Obs.: assumes valid regular expressions (raises ValueError if not; see 'mySearch.QueryMatcher').
+            limit (int, optional): maximum number of tasks in the page. Defaults to all.
+            offset (int): number of tasks to skip before the page.
+            after (int, optional): cursor; ID of a task after which the page starts, in the order of the listing (ID order if not 'sort_list').
+                                   Obs.: assumes the ID is valid (see 'self.valid_cursor').
+        Returns:
+            list: the 'Task' objects in the page.
+            int: the number of selected tasks after the page.
+        """
+
+        # unfinished tasks in order: the page is a slice of the sorted 'self.open_order'; the cursor is found by bisection.
+        # 'self.open_order' is sorted by due date first, so it is also the index of the tasks by due date: a range of due dates is 
+        # a range of it, [low, high), found by bisection (O(log n + k)). Tasks with no due date are at its end, after all dates.
+        if open_only and sort_list and not queries and not archived:
+            low, high = 0, len(self.open_order)
+            if due_range is not None:
+                start_ts, end_ts = due_range
+                if start_ts is not None:
+                    low = bisect_left(self.open_order, (False, start_ts))
+                if end_ts is not None:
+                    high = bisect_left(self.open_order, (False, end_ts))
+
+            start = low
+            if after is not None:
+                start = max(low, bisect_right(self.open_order, self.order_key(self.get_task(after))))
+            start += offset
+            stop = high if limit is None else min(start + limit, high)
+            with self.profiler.phase("select open order"):
+                selected_tasks = [self.tasks[key[-1]] for key in self.open_order[start:stop]]
+            remaining = max(high - stop, 0)
+
+        else:
+            # search the terms in the query index of the open tasks: only tasks sharing n-grams with a term have their name checked, once for all the terms. 
+            # The index holds the names as written, so names are all checked for terms ignoring case or regular expressions. So are the archive's (no index).
+            # Matches are kept in ID order.
+            matcher = QueryMatcher(queries, ignore_case, regex) if queries else None
+            if queries and not archived:
+                if matcher.literal:
+                    with self.profiler.phase("query index"):
+                        matched_IDs = self.query_index.search(queries, lambda task_ID: self.tasks[task_ID].name, matcher.match)
+                        selected_tasks = [self.tasks[task_ID] for task_ID in sorted(matched_IDs)]
+                else:
+                    with self.profiler.phase("query scan"):
+                        selected_tasks = [task for task in self.tasks.values() if matcher.match(task.name)]
+                if not open_only:
+                    selected_tasks = merge(selected_tasks, self.search_archive(matcher), key=lambda task: task.task_ID)
+            elif queries:
+                selected_tasks = self.search_archive(matcher)
+
+            # obs.: the open tasks are the active ones ('self.tasks'), so no completed task has to be filtered out
+            elif archived:
+                selected_tasks = self.archive_values()
+            elif open_only:
+                selected_tasks = self.tasks.values()
+            else:
+                selected_tasks = self.all_tasks()
+
+            # keep only tasks due in the range
+            if due_range is not None:
+                start_ts, end_ts = due_range
+                selected_tasks = filter(lambda task: (start_ts is None or task.due_ts is None or task.due_ts >= start_ts) and 
+                                                     (end_ts is None or (task.due_ts is not None and task.due_ts < end_ts)), selected_tasks)
+
+            # keep only tasks after the cursor
+            if after is not None and sort_list:
+                after_key = self.order_key(self.get_task(after))
+                selected_tasks = filter(lambda task: self.order_key(task) > after_key, selected_tasks)
+            elif after is not None:
+                selected_tasks = filter(lambda task: task.task_ID > after, selected_tasks)
+
+            # obs.: the filters are lazy; they run here
+            with self.profiler.phase("filter"):
+                selected_tasks = list(selected_tasks)
+            n_selected = len(selected_tasks)
+
+            # sort tasks: 'priority' higher-low ; 'due date' closer to furthest. If no 'due date', goes to the end of the list.
+            # With a limit, only the first 'offset + limit' tasks are kept, in a heap ('self.order_key' gives the same order as 'self.sort_tasks')
+            if sort_list and limit is not None:
+                with self.profiler.phase("sort (heap)"):
+                    selected_tasks = nsmallest(offset + limit, selected_tasks, key=self.order_key)
+            elif sort_list:
+                with self.profiler.phase("sort_tasks"):
+                    selected_tasks = self.sort_tasks(selected_tasks, due_dt_order = 'ascending', priority_order = 'descending')
+
+            stop = n_selected if limit is None else offset + limit
+            selected_tasks = selected_tasks[offset:stop]
+            remaining = max(n_selected - stop, 0)
+
+        # updates the 'age' attribute of the selected 'Task' objects ('age' of Task = timedelta(now, Task.created_dt))
+        if not self.age_updated:
+            self.set_age(selected_tasks)
+        return selected_tasks, remaining
+
+    def search_archive(self, matcher):
+        """ Returns the archived tasks whose name matches the search terms compiled in 'matcher' (a 'mySearch.QueryMatcher'), in ID order. Loads the archive."""
+        with self.profiler.phase("search archive"):
+            match = matcher.match
+            return [task for task in self.archive_values() if match(task.name)]
+
+    def set_age(self, tasks_list=None):
+        """ Sets the 'age' attribute of the Tasks objects: whole days since 'Task.created_dt', as in '3d'.
+        Ages are computed from 'self.created_epochs' in UTC seconds, so timezones do not matter. 
+        If 'use_numpy' is set and 'numpy' is installed, the ages of all tasks are computed in one vectorized subtraction; only the tasks in 'tasks_list' get their string.
+        Archived tasks are not in 'self.created_epochs'; their ages are computed from their own created dates.
+
+        Also lowers 'self.age_expiry' to the time the first of the ages set changes (a task completes one more day), for the output cache.
+
+        Args: tasks_list (list, optional): the 'Task' objects to update (e.g., the rows to print). Defaults to all tasks, open and archived 
+                                           (then sets 'self.age_updated', unless 'self.column_store' is set).
+        """
+        with self.profiler.phase("set_age"):
+            if tasks_list is None:
+                tasks_list = list(self.all_tasks())
+                # obs.: the Task objects of a column store are built for each access, so the ages set here are not kept
+                self.age_updated = not self.column_store
+
+            # longest time since the last day completed by any of the tasks (see 'self.age_expiry')
+            now = time.time()
+            day_elapsed = -1
+            if any(task.completed_ts is not None for task in tasks_list):
+                for task in tasks_list:
+                    if task.completed_ts is not None:
+                        elapsed = now - task.created_ts
+                        task.age = f"{int(elapsed // 86400)}d"
+                        day_elapsed = max(day_elapsed, elapsed % 86400)
+                tasks_list = [task for task in tasks_list if task.completed_ts is None]
+
+            numpy = import_optional("numpy") if self.use_numpy else None
+            if numpy is not None:
+                slots = numpy.fromiter((task.slot for task in tasks_list), dtype=numpy.intp, count=len(tasks_list))
+                elapsed = now - numpy.frombuffer(self.created_epochs, dtype=numpy.int64)[slots]
+                for task, age in zip(tasks_list, (elapsed // 86400).astype(numpy.int64).tolist()):
+                    task.age = f"{age}d"
+                if len(tasks_list):
+                    day_elapsed = max(day_elapsed, float((elapsed % 86400).max()))
+            else:
+                created_epochs = self.created_epochs
+                for task in tasks_list:
+                    elapsed = now - created_epochs[task.slot]
+                    task.age = f"{int(elapsed // 86400)}d"
+                    day_elapsed = max(day_elapsed, elapsed % 86400)
+
+            if day_elapsed >= 0:
+                self.age_expiry = min(self.age_expiry or float("inf"), now + 86400 - day_elapsed)
 
     def sort_tasks(self, tasks_list, due_dt_order = 'ascending', priority_order = 'descending'):
         """ Sorts a list of 'Task' objects.
@@ -381,87 +1508,140 @@ class Tasks(object):
 
         # The sorting is made by passing a tuple of Task attributes to the 'sorted' method. 
         # Exampl: ascending 'due_dt_order' and descending 'priority_order'
-            #   'task.due_dt is None': returns True if a Task has no due date, putting any of them at the end of the list (1>0, ascending order)
-            #   'task.due_dt': datetime attribute, ordered ascending (earlier to latest)
+            #   'task.due_ts is None': returns True if a Task has no due date, putting any of them at the end of the list (1>0, ascending order)
+            #   'task.due_ts': due date in seconds since the epoch, ordered ascending (earlier to latest)
             #   '-task.priority': reverse the value of the 'priority' attribute, so when ordered ascending, 3 comes first than 1 (same as descending priority)
             # To remember: tuples are ordered from 'left' to 'right' each at a time; this guarantees the method works
 
         if due_dt_order=='ascending':
             if priority_order == 'descending':
-                return sorted(tasks_list, key = lambda task: (task.due_dt is None, task.due_dt, -task.priority))
+                return sorted(tasks_list, key = lambda task: (task.due_ts is None, task.due_ts, -task.priority))
             if priority_order == 'ascending':
-                return sorted(tasks_list, key = lambda task: (task.due_dt is None, task.due_dt, task.priority))
+                return sorted(tasks_list, key = lambda task: (task.due_ts is None, task.due_ts, task.priority))
             else: # just order by due_date
-                return sorted(tasks_list, key = lambda task: (task.due_dt is None, task.due_dt))
+                return sorted(tasks_list, key = lambda task: (task.due_ts is None, task.due_ts))
 
         if due_dt_order=='descending':
             if priority_order == 'descending':
-                return sorted(tasks_list, key = lambda task: (task.due_dt is not None, task.due_dt, task.priority), reverse=True)
+                return sorted(tasks_list, key = lambda task: (task.due_ts is not None, task.due_ts, task.priority), reverse=True)
             if priority_order == 'ascending':
-                return sorted(tasks_list, key = lambda task: (task.due_dt is not None, task.due_dt, -task.priority), reverse=True)
+                return sorted(tasks_list, key = lambda task: (task.due_ts is not None, task.due_ts, -task.priority), reverse=True)
             else: # just order by due_date
-                return sorted(tasks_list, key = lambda task: (task.due_dt is not None, task.due_dt), reverse=True)
+                return sorted(tasks_list, key = lambda task: (task.due_ts is not None, task.due_ts), reverse=True)
 
         # just order by priority 
         if priority_order=='descending':
-            return sorted(tasks_list, key = lambda task: (task.due_dt is None, -task.priority))
+            return sorted(tasks_list, key = lambda task: (task.due_ts is None, -task.priority))
 
         if priority_order=='ascending':
-            return sorted(tasks_list, key = lambda task: (task.due_dt is None, -task.priority))
+            return sorted(tasks_list, key = lambda task: (task.due_ts is None, -task.priority))
 
         # do not order at all (all ordering inputs == None)
         return tasks_list
 
     def reset_IDs(self):
-        """ Reset the task_ID attribute of the all the Task objects to integers between [1, len(self.tasks)]. 
-        Updates 'self.tasks_ID', 'self.tasks' accordingly. 
+        """ Reset the task_ID attribute of the all the Task objects (open and archived) to integers between [1, number of tasks]. 
+        Updates the keys of 'self.tasks', the archive, 'self.min_ID', 'self.max_ID' and the indexes accordingly, then saves them with a single snapshot 
+        (plus one write of the renumbered archive). The old IDs are kept as aliases for 'self.alias_expiry' seconds (see 'self.resolve_ID').
         Obs.: Useful to 'reindex' tasks after many are added/deleted. Prefered overreindexing each time the app runs, as user might have IDs memorized.
         """
 
-        self.tasks_ID = [None]*len(self.tasks)
-        for i, task in enumerate(self.tasks):
-            task.task_ID = i+1
-            self.tasks_ID[i] = i+1
-            self.pickle_tasks()
+        # the tasks keep their (ID) order, so the new keys are also in ascending order
+        archived_tasks = self.load_archive()
+        new_IDs = {task_ID: new_ID for new_ID, task_ID in enumerate(merge(self.tasks, sorted(archived_tasks)), start=1)}
+        if self.column_store:
+            self.tasks.renumber(new_IDs)
+        else:
+            self.tasks = {new_IDs[task_ID]: task for task_ID, task in self.tasks.items()}
+            for task_ID, task in self.tasks.items():
+                task.task_ID = task_ID
+        self.min_ID = 1 if new_IDs else 0
+        self.max_ID = len(new_IDs)
+
+        self.archived_tasks = {new_IDs[task_ID]: task for task_ID, task in archived_tasks.items()}
+        for task_ID, task in self.archived_tasks.items():
+            task.task_ID = task_ID
+        self.update_archive_IDs()
+
+        # as the order of IDs is kept, replacing the IDs in the sort keys keeps 'self.open_order' sorted
+        self.open_order = [key[:-1] + (new_IDs[key[-1]],) for key in self.open_order]
+        self.build_query_index()
+
+        # old IDs resolve to the new ones until they expire; aliases of a previous reset are carried over to the new IDs
+        now = time.time()
+        self.aliases = {old_ID: (new_IDs[task_ID], expiry) for old_ID, (task_ID, expiry) in self.aliases.items() if expiry > now and task_ID in new_IDs}
+        if self.alias_expiry > 0:
+            self.aliases.update((old_ID, (new_ID, now + self.alias_expiry)) for old_ID, new_ID in new_IDs.items() if old_ID != new_ID)
+
+        # saves everything at once: the renumbered archive is written beside the current one, then a single snapshot replaces the previous one
+        self.pickle_tasks(rewrite_archive=True)
         return "IDs successfully reseted", True
 
+    def resolve_ID(self, task_ID):
+        """ Translates an ID given by the user from before the last 'reset_IDs' to the current ID of its task, using 'self.aliases'.
+        IDs of existing tasks always win: an alias is only used if no task has the ID now and it did not expire.
+
+        Returns:
+            (int): the current ID of the task (the input if it has no alias)
+            (str): a message telling the user the ID was translated ('' if not)
+        """
+        alias = self.aliases.get(task_ID)
+        if alias is None or alias[1] <= time.time() or self.ID_exists(task_ID):
+            return task_ID, ""
+        return alias[0], f"\nTask {task_ID} is now task {alias[0]} (IDs were reset)\n"
+
 
 #===========================================================================
 #SECTION auxiliar methods to format printing
 #===========================================================================
 
-    def due_dt_to_str(self,date):
-        """ Convert a Task 'due_dt' datetime attribute to a string to be printed in the terminal
+    @staticmethod
+    def format_date(date, dt_format, print_tz, long_format):
+        """ Converts a datetime to a string to be printed in the terminal.
+
+        Args:
+            date (datetime|None): the date to convert. If None, returns "-"
+            dt_format (str): format of short dates (e.g., due dates), as in 'self.dt_format'
+            print_tz (bool): include the timezone in long dates? As in 'self.print_tz'
+            long_format (bool): if True, prints the date and time (e.g., created and completed dates); if False, the date in 'dt_format'
         """
         if date is None:
             return "-"
+        if not long_format:
+            return date.strftime(dt_format)
+
+        # choose wether to include the user's timezone when printing to the terminal
+        if print_tz:
+            return date.strftime(f"%a %b %d %H:%M:%S {date.tzname()} %Y")
         else:
-            return date.strftime(self.dt_format)
+            return date.strftime(f"%a %b %d %H:%M:%S %Y")
+
+    def due_dt_to_str(self,date):
+        """ Convert a Task 'due_dt' datetime attribute to a string to be printed in the terminal
+        """
+        return self.format_date(date, self.dt_format, self.print_tz, long_format=False)
 
 
     def created_dt_to_str(self, date):
         """ Convert a Task 'created_dt' attribute from datetime to string to be printed in the terminal
         """
-        if date is None:
-            return "-"
-        else:
-            # choose wether to include the user's timezone when printing to the terminal
-            if self.print_tz:
-                return date.strftime(f"%a %b %d %H:%M:%S {date.tzname()} %Y")
-            else:
-                return date.strftime(f"%a %b %d %H:%M:%S %Y")
+        return self.format_date(date, self.dt_format, self.print_tz, long_format=True)
 
     def completed_dt_to_str(self,date):
         """ Convert a Task 'created_dt' attribute from datetime to string to be printed in the terminal
         """
-        if date is None:
-            return "-"      
-        else:
-            # choose wether to include the user's timezone when printing to the terminal
-            if self.print_tz:
-                return date.strftime(f"%a %b %d %H:%M:%S {date.tzname()} %Y")
-            else:
-                return date.strftime(f"%a %b %d %H:%M:%S %Y")
+        return self.format_date(date, self.dt_format, self.print_tz, long_format=True)
+
+    @classmethod
+    def ts_to_str(cls, ts, tz, long_format=False):
+        """ Converts a date stored in a Task (seconds since the epoch and position of its timezone in 'Task.tz_table') to a string to be printed.
+        Same strings as 'due_dt_to_str' (or 'created_dt_to_str' if 'long_format'), memoized by 'format_timestamp' unless 'cls.date_cache' is False.
+        """
+        if ts is None:
+            return "-"
+        if cls.date_cache:
+            return format_timestamp(ts, tz, cls.dt_format, cls.print_tz, long_format)
+        return cls.format_date(datetime.fromtimestamp(ts, Task.tz_table[tz]), cls.dt_format, cls.print_tz, long_format)
 
 
     def tabulate_tasks(self, header_attributes:dict, tasks_list):
@@ -489,13 +1669,73 @@ class Tasks(object):
         dict_print = {header:[] for header in header_attributes}
 
         # loop: for each Task object, retrieves the desired 'attribute' and puts below the appropriate 'header' column in the table
-        for task in tasks_list:
-            for header, attribute in header_attributes.items():
-                task_attribute = task.__getattribute__(attribute)
-                dict_print[header].append(task_attribute)
+        with self.profiler.phase("tabulate_tasks (cells)"):
+            for task in tasks_list:
+                for header, attribute in header_attributes.items():
+                    task_attribute = task.__getattribute__(attribute)
+                    dict_print[header].append(task_attribute)
 
         # returns the formatted table as string ready to be printed to the terminal; numbers are centered; extra lines "\n" for redability 
-        return "\n" + tabulate(dict_print, headers="keys", numalign="center") + "\n"
+        with self.profiler.phase("tabulate"):
+            from tabulate import tabulate
+            return "\n" + tabulate(dict_print, headers="keys", numalign="center") + "\n"
+
+    @staticmethod
+    def format_duration(seconds):
+        """ Converts a duration in seconds to a string to be printed in the terminal: in minutes, hours or days (e.g., '45m', '5.2h', '3.1d'), "-" if None"""
+        if seconds is None:
+            return "-"
+        if seconds < 3600:
+            return f"{seconds / 60:.0f}m"
+        if seconds < 86400:
+            return f"{seconds / 3600:.1f}h"
+        return f"{seconds / 86400:.1f}d"
+
+    @classmethod
+    def store_version(cls):
+        """ Returns the version of the tasks on disk, read without loading them: the token of 'cls.version_filename', replaced before each write
+        of the tasks (see 'self.new_version'), along with the identity (inode), size and modification time of the snapshot and of the journal."""
+        try:
+            with open(cls.version_filename, 'rb') as file:
+                version = [file.read()]
+        except FileNotFoundError:
+            version = [None]
+        for filename in (cls.filename, cls.journal_filename):
+            try:
+                stat = os.stat(filename)
+                version.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+    @classmethod
+    def output_cache_key(cls, command):
+        """ Returns the key of the output of a command printing tasks in the output cache, or None if the output is not cached (see 'cls.output_cache').
+        The output depends on the tasks (their version on disk, see 'cls.store_version'), the local date, the format of the dates and the options.
+
+        Args: command (dict): the options of the command, as in {'list': True, 'limit': 10}
+        """
+        if not cls.output_cache or cls.backend != "pickle":
+            return None
+        return repr((cls.store_version(), datetime.now().date().isoformat(), cls.dt_format, cls.print_tz, cls.page_size, sorted(command.items())))
+
+    @classmethod
+    def cached_output(cls, key):
+        """ Returns the messages printed by the command of a key of 'cls.output_cache_key' if they are cached (and their ages did not change), or None.
+        Obs.: called before loading the tasks, so a hit does not read them"""
+        from myCache import FileCache
+        return FileCache(cls.cache_dirname, cls.cache_max_bytes).get(key)
+
+    def cache_output(self, key, msgs):
+        """ Caches the messages printed by the command of a key of 'self.output_cache_key', until the first age printed changes ('self.age_expiry')"""
+        from myCache import FileCache
+        FileCache(self.cache_dirname, self.cache_max_bytes).put(key, msgs, self.age_expiry)
+
+    def page_footer(self, tasks_list, remaining, limit):
+        """ Returns a line telling how many tasks are left after a printed page and how to get the next one ('' if none are left)"""
+        if remaining <= 0 or not tasks_list:
+            return ""
+        return f"\n{remaining} more task{'s' if remaining > 1 else ''}. Next page: --limit {limit} --after {tasks_list[-1].task_ID}\n"
 
     
 
@@ -506,7 +1746,7 @@ class Tasks(object):
 #SECTION Task subclass and its methods
 #===========================================================================    
 
-class Task(Tasks):
+class Task(object):
     """Representation of a task
 
     Attributes:
@@ -514,40 +1754,328 @@ class Task(Tasks):
   
       priority (int, optional): Task priority as entered with the '--priority'. Can be any integer between Tasks.min_priority and Tasks.max_priority.
                                   Priority is in descending order: 3 higher priority than 1. Defaults to 'Tasks.default_priority'.
-      due_dt (datetime, optional): Due date as entered with '--due'. Format in day/month/year follows 'Tasks.dt_format'.  Defaults to None. 
+      due_dt (datetime|str, optional): Due date as entered with '--due', parsed by 'myDates.parse_date' (or a string in 'Tasks.dt_format').  Defaults to None. 
   
       created_dt (datetime): Automatially assigned the first time the Task is created. Format in 'day/month/year' follows 'Tasks.dt_format'.
   
       completed_dt (datetime, optional): Due date as entered with '--done'. Format in day/month/year follows 'Tasks.dt_format'. Deafults to None.
   
       task_ID (int): Uniqued ID identifying the task. Automatically assigned when by the parent Tasks class when the Task is created.
+
+      slot (int): position of the task in 'Tasks.created_epochs'. age (str): days since creation, set by 'Tasks.set_age'.
+
+    Obs.: to keep large lists of tasks small, a Task has no per-instance '__dict__' ('__slots__') and stores its dates as integer seconds since the epoch
+          ('created_ts', 'due_ts', 'completed_ts') plus the position ('tz') of their timezone in 'Task.tz_table', a table shared by all tasks.
+          The 'created_dt', 'due_dt' and 'completed_dt' properties convert them from/to aware datetime objects.
     """
+    __slots__ = ("name", "task_ID", "priority", "created_ts", "due_ts", "completed_ts", "tz", "slot", "age")
+
+    # timezones of the tasks' dates; each one is stored once and shared by all tasks
+    tz_table = []
+
     def __init__(self, name, priority, due_dt, task_ID):
         self.name = name
         self.task_ID = task_ID
         self.priority = priority if priority else Tasks.default_priority
+        self.slot = None
 
         # assigns the created date in the user's LOCAL current time
         self.created_dt = myDates.date_localtz(datetime.now())        
 
-        # if a due date is passed, parses it using 'Tasks.dt_format' and assigns in the user's LOCAL current time
-        self.due_dt = myDates.date_localtz(datetime.strptime(due_dt, Tasks.dt_format)) if due_dt else None
+        # if a due date is passed (parsed by 'Tasks.add', or a string in 'Tasks.dt_format'), assigns it in the user's LOCAL current time
+        if isinstance(due_dt, str):
+            due_dt = myDates.parse_date(due_dt, remove_whitespace=True, dt_format=Tasks.dt_format)[0]
+        self.due_dt = myDates.date_localtz(due_dt) if due_dt else None
         self.completed_dt = None
 
+    @classmethod
+    def restore(cls, name, priority, task_ID, created_dt, due_dt=None, completed_dt=None):
+        """ Re-creates a stored 'Task' object from its attributes, without assigning a new created date or parsing the due date."""
+        task = cls.__new__(cls)
+        task.name = name
+        task.task_ID = task_ID
+        task.priority = priority
+        task.slot = None
+        task.created_dt = created_dt
+        task.due_dt = due_dt
+        task.completed_dt = completed_dt
+        return task
+
+    @classmethod
+    def tz_index(cls, tzinfo):
+        """ Returns the position of 'tzinfo' in the shared 'Task.tz_table', adding it to the table if new"""
+        for index, tz in enumerate(cls.tz_table):
+            if tz is tzinfo or tz == tzinfo:
+                return index
+        cls.tz_table.append(tzinfo)
+        return len(cls.tz_table) - 1
+
+    def date_to_ts(self, date):
+        """ Converts an aware datetime to integer seconds since the epoch, keeping its timezone as the task's timezone"""
+        if date is None:
+            return None
+        self.tz = self.tz_index(date.tzinfo)
+        return int(date.timestamp())
+
+    def ts_to_date(self, ts):
+        """ Converts integer seconds since the epoch to a datetime in the task's timezone"""
+        if ts is None:
+            return None
+        return datetime.fromtimestamp(ts, self.tz_table[self.tz])
+
+    @property
+    def created_dt(self):
+        return self.ts_to_date(self.created_ts)
+
+    @created_dt.setter
+    def created_dt(self, date):
+        self.created_ts = self.date_to_ts(date)
+
+    @property
+    def due_dt(self):
+        return self.ts_to_date(self.due_ts)
+
+    @due_dt.setter
+    def due_dt(self, date):
+        self.due_ts = self.date_to_ts(date)
+
+    @property
+    def completed_dt(self):
+        return self.ts_to_date(self.completed_ts)
+
+    @completed_dt.setter
+    def completed_dt(self, date):
+        self.completed_ts = self.date_to_ts(date)
+
+    # pickling: the timezone is saved as an object (pickled once per file, as all tasks share it) and looked up in 'Task.tz_table' when loaded
+    def __getstate__(self):
+        return (self.name, self.task_ID, self.priority, self.created_ts, self.due_ts, self.completed_ts, self.tz_table[self.tz], self.slot)
+
+    def __setstate__(self, state):
+        # Task objects pickled by previous versions of the app hold a '__dict__' with datetime attributes
+        if isinstance(state, dict):
+            self.name, self.task_ID, self.priority = state["name"], state["task_ID"], state["priority"]
+            self.created_dt, self.due_dt, self.completed_dt = state["created_dt"], state["due_dt"], state["completed_dt"]
+            self.slot = state.get("slot")
+            return
+
+        self.name, self.task_ID, self.priority, self.created_ts, self.due_ts, self.completed_ts, tzinfo, self.slot = state
+        self.tz = self.tz_index(tzinfo)
+
     # get methods for the dates attributes in string format.
-    # update each time attribute is called to be in line with the app's current configurations.
+    # update each time attribute is called to be in line with the app's current configurations (memoized, see 'Tasks.ts_to_str').
     @property 
     def created_dt_str(self):
-        return Tasks.created_dt_to_str(Tasks,self.created_dt)
+        return Tasks.ts_to_str(self.created_ts, self.tz, long_format=True)
 
     @property
     def due_dt_str(self):
-        return Tasks.due_dt_to_str(Tasks, self.due_dt)
+        return Tasks.ts_to_str(self.due_ts, self.tz)
 
     @property 
     def completed_dt_str(self):
-        return Tasks.completed_dt_to_str(Tasks,self.completed_dt)
-    
+        return Tasks.ts_to_str(self.completed_ts, self.tz, long_format=True)
+
+
+class TaskColumns(MutableMapping):
+    """ Column store of Task objects keyed by ID. Used as 'Tasks.tasks' when 'Tasks.column_store' is True, in place of a dict.
+
+    IDs, priorities, dates (integer seconds since the epoch) and timezones (positions in 'Task.tz_table') are kept in typed arrays, 
+    with one entry ('row') per task, and names in a list. No Task object is kept: 'columns[task_ID]' builds one from its row 
+    and 'columns[task_ID] = task' writes a task back to its row.
+
+    Rows are in ascending ID order, as the 'Tasks.tasks' dict, so an ID is found by bisection on the 'IDs' array.
+    Deleted rows are only marked (name set to None) until 'compact()'.
+    """
+
+    # stands for a missing date in the date arrays
+    NONE = -2**63
+
+    def __init__(self, tasks=()):
+        self.IDs = array('q')
+        self.priorities = array('b')
+        self.created = array('q')
+        self.due = array('q')
+        self.completed = array('q')
+        self.tzs = array('B')
+        self.names = []
+        self.deleted = 0
+        for task in tasks:
+            self[task.task_ID] = task
+
+    def row(self, task_ID, include_deleted=False):
+        """ Returns the row of an ID, or None if not stored"""
+        row = bisect_left(self.IDs, task_ID)
+        if row < len(self.IDs) and self.IDs[row] == task_ID and (include_deleted or self.names[row] is not None):
+            return row
+        return None
+
+    def task_at(self, row):
+        """ Builds the Task object of a row"""
+        task = Task.__new__(Task)
+        task.name, task.task_ID, task.priority = self.names[row], self.IDs[row], self.priorities[row]
+        task.created_ts = self.created[row]
+        task.due_ts = None if self.due[row] == self.NONE else self.due[row]
+        task.completed_ts = None if self.completed[row] == self.NONE else self.completed[row]
+        task.tz = self.tzs[row]
+        task.slot = row
+        return task
+
+    def __getitem__(self, task_ID):
+        row = self.row(task_ID)
+        if row is None:
+            raise KeyError(task_ID)
+        return self.task_at(row)
+
+    def __setitem__(self, task_ID, task):
+        row = self.row(task_ID, include_deleted=True)
+        if row is None:
+            # new rows go at the end, so their ID must be above all the others (even deleted ones, which are then dropped)
+            if self.IDs and task_ID <= self.IDs[-1]:
+                self.compact()
+                if self.IDs and task_ID <= self.IDs[-1]:
+                    raise ValueError(f"\nTask IDs must be added in ascending order: {task_ID} after {self.IDs[-1]}\n")
+            row = len(self.IDs)
+            self.IDs.append(task_ID)
+            self.priorities.append(0)
+            self.created.append(0)
+            self.due.append(0)
+            self.completed.append(0)
+            self.tzs.append(0)
+            self.names.append(None)
+
+        elif self.names[row] is None:
+            # a deleted row with the same ID is reused
+            self.deleted -= 1
+
+        self.names[row] = task.name
+        self.priorities[row] = task.priority
+        self.created[row] = task.created_ts
+        self.due[row] = self.NONE if task.due_ts is None else task.due_ts
+        self.completed[row] = self.NONE if task.completed_ts is None else task.completed_ts
+        self.tzs[row] = task.tz
+        task.slot = row
+
+    def __delitem__(self, task_ID):
+        row = self.row(task_ID)
+        if row is None:
+            raise KeyError(task_ID)
+        self.names[row] = None
+        self.deleted += 1
+
+    def __len__(self):
+        return len(self.names) - self.deleted
+
+    def __contains__(self, task_ID):
+        return self.row(task_ID) is not None
+
+    def __iter__(self):
+        return (task_ID for task_ID, name in zip(self.IDs, self.names) if name is not None)
+
+    def __reversed__(self):
+        return (self.IDs[row] for row in range(len(self.IDs)-1, -1, -1) if self.names[row] is not None)
+
+    def values(self):
+        return (self.task_at(row) for row, name in enumerate(self.names) if name is not None)
+
+    def items(self):
+        return ((task.task_ID, task) for task in self.values())
+
+    def compact(self):
+        """ Drops the deleted rows. Obs.: arrays are changed in place, so references to them (e.g., 'Tasks.created_epochs') stay valid"""
+        if not self.deleted:
+            return
+        live_rows = [row for row, name in enumerate(self.names) if name is not None]
+        for column in (self.IDs, self.priorities, self.created, self.due, self.completed, self.tzs):
+            column[:] = array(column.typecode, (column[row] for row in live_rows))
+        self.names = [self.names[row] for row in live_rows]
+        self.deleted = 0
+
+    def renumber(self, new_IDs=None):
+        """ Gives the tasks new IDs, keeping their order: 'new_IDs' maps each ID to its new one (ascending). Defaults to IDs between [1, number of tasks]"""
+        self.compact()
+        if new_IDs is None:
+            self.IDs[:] = array('q', range(1, len(self.IDs)+1))
+        else:
+            self.IDs[:] = array('q', (new_IDs[task_ID] for task_ID in self.IDs))
+
+    # pickling: the timezone table is saved along, so positions can be translated to the 'Task.tz_table' of the process loading the columns
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["tz_table"] = list(Task.tz_table)
+        return state
+
+    def __setstate__(self, state):
+        saved_table = state.pop("tz_table")
+        self.__dict__.update(state)
+        positions = [Task.tz_index(tzinfo) for tzinfo in saved_table]
+        if positions != list(range(len(saved_table))):
+            self.tzs[:] = array('B', (positions[tz] for tz in self.tzs))
 
 
+#\SECTION
+
+#===========================================================================
+#SECTION statistics of the tasks
+#===========================================================================
+
+class TaskStats(object):
+    """ Statistics of the tasks for '--stats', kept up to date by each mutation (see 'Tasks.apply_record') and saved with the tasks, 
+    so the summary is read without going over the tasks. Built in one pass over all the tasks by 'TaskStats(tasks)' (see 'Tasks.rebuild_statistics').
+
+    Attributes:
+     - open_by_priority (dict): number of unfinished tasks by priority. Priorities with no task are dropped.
+     - completed (int): number of completed tasks
+     - completion_time (mySketch.QuantileSketch): seconds from the creation to the completion of each completed task ('completed_dt - created_dt')
+    """
+
+    def __init__(self, tasks=()):
+        self.open_by_priority = {}
+        self.completed = 0
+        self.completion_time = QuantileSketch()
+        for task in tasks:
+            self.add(task)
+
+    def add(self, task, n=1):
+        """ Counts a task (in its current state) 'n' times; a negative 'n' removes it"""
+        if task.completed_ts is None:
+            count = self.open_by_priority.get(task.priority, 0) + n
+            if count:
+                self.open_by_priority[task.priority] = count
+            else:
+                del self.open_by_priority[task.priority]
+        else:
+            self.completed += n
+            self.completion_time.add(max(task.completed_ts - task.created_ts, 0), n)
+
+    def remove(self, task):
+        """ Removes a task counted before, in the same state (e.g., before it is completed)"""
+        self.add(task, -1)
+
+    @property
+    def open(self):
+        return sum(self.open_by_priority.values())
+
+    def __eq__(self, other):
+        return isinstance(other, TaskStats) and vars(self) == vars(other)
+
+#\SECTION
+
+#===========================================================================
+#SECTION storage backends
+#===========================================================================
+
+def open_tasks():
+    """ Returns the 'Tasks' object of the storage backend chosen in 'Tasks.backend'.
+
+    Raises: ValueError: in case of an unknown backend
+    """
+    if Tasks.backend == "pickle":
+        return Tasks()
+
+    if Tasks.backend == "sqlite":
+        # imported here so the default backend does not pay for it
+        from TaskManagerSQLite import SQLiteTasks
+        return SQLiteTasks()
 
+    raise ValueError(f"\nUnknown storage backend '{Tasks.backend}'. Please choose 'pickle' or 'sqlite'\n")
@@ -0,0 +1,269 @@
+import os
+import pickle
+import sqlite3
+import time
+
+import myDates
+from TaskManager import Tasks, Task, TaskStats
+from mySearch import QueryMatcher
+
+
+class SQLiteTasks(Tasks):
+    """A list of `Task` objects kept in a local SQLite database instead of pickled lists. Selected with Tasks.backend = 'sqlite'.
+
+    Filtering and ordering for '--list', '--report' and '--query' are pushed down to the database, so only the tasks to be printed are loaded.
+    Dates are stored as seconds since the epoch (UTC), so ordering by 'due_dt' is done on numbers.
+
+    Attributes:
+     - connection (sqlite3.Connection): connection to the database file given by 'Tasks.sqlite_filename'
+     - schema (tuple): SQL statements creating the 'tasks' table and its indexes:
+        - 'tasks_open': unfinished tasks ('completed_dt IS NULL') in the app's order: no due date last, 'due_dt' ascending, 'priority' descending.
+        - 'tasks_order': all tasks in the app's order. Used by '--report'.
+        - 'stats': the pickled 'statistics' (see 'Tasks.statistics'), written in the same transaction as the mutations.
+     - min_ID, max_ID (int): as in 'Tasks'.
+
+    Obs.: the first time the database is created, tasks in an existing 'Tasks.filename' pickle file (and its journal) are migrated to it.
+    """
+
+    schema = (
+        """CREATE TABLE IF NOT EXISTS tasks (
+               task_ID INTEGER PRIMARY KEY,
+               name TEXT NOT NULL,
+               priority INTEGER NOT NULL,
+               created_dt REAL NOT NULL,
+               due_dt REAL,
+               completed_dt REAL)""",
+        """CREATE INDEX IF NOT EXISTS tasks_open ON tasks (due_dt IS NULL, due_dt, priority DESC, task_ID)
+               WHERE completed_dt IS NULL""",
+        """CREATE INDEX IF NOT EXISTS tasks_order ON tasks (due_dt IS NULL, due_dt, priority DESC, task_ID)""",
+        """CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, value BLOB NOT NULL)""",
+    )
+
+    columns = "name, priority, task_ID, created_dt, due_dt, completed_dt"
+    order_by = "due_dt IS NULL, due_dt, priority DESC, task_ID"
+
+    def __init__(self):
+        """ Connects to the database, creating it (and migrating the pickled tasks) if it does not exist yet"""
+
+        new_database = not os.path.isfile(self.sqlite_filename)
+        # obs.: the connection may be used by another thread (see todo_daemon.py); calls are serialized by the caller
+        self.connection = sqlite3.connect(self.sqlite_filename, check_same_thread=False)
+        with self.connection:
+            for statement in self.schema:
+                self.connection.execute(statement)
+
+        if new_database and (os.path.isfile(self.filename) or os.path.isfile(self.journal_filename)):
+            self.migrate_pickle()
+
+        self.min_ID, self.max_ID = self.connection.execute(
+            "SELECT COALESCE(MIN(task_ID), 0), COALESCE(MAX(task_ID), 0) FROM tasks").fetchone()
+
+        # databases created by previous versions of the app (or just migrated) have no statistics: computed once over all the tasks
+        row = self.connection.execute("SELECT value FROM stats WHERE key = 'statistics'").fetchone()
+        if row is not None:
+            self.statistics = pickle.loads(row[0])
+        else:
+            self.statistics = TaskStats(self.all_tasks())
+            self.save_statistics()
+
+        self.age_updated = False
+        self.deferred_writes = False
+        self.pending_records = []
+        self.journal_end = 0
+        # obs.: this backend keeps no aliases of the IDs before '--resetID' (see 'Tasks.resolve_ID')
+        self.aliases = {}
+
+#===========================================================================
+#SECTION File processing methods
+#===========================================================================
+
+    def migrate_pickle(self):
+        """ One-shot migration: copies the tasks of the pickle backend ('Tasks.filename' and its journal) into the database.
+        The pickle files are left untouched."""
+
+        legacy_tasks = Tasks()
+        with self.connection:
+            self.connection.executemany(f"INSERT INTO tasks ({self.columns}) VALUES (?, ?, ?, ?, ?, ?)",
+                                        map(self.task_to_row, legacy_tasks.all_tasks()))
+
+    def flush(self):
+        """ Commits the mutations applied by 'self.apply_record' to the database, along with the updated statistics"""
+        if self.pending_records:
+            self.write_statistics()
+        self.connection.commit()
+        self.pending_records = []
+
+    def apply_import(self, tasks_chunk):
+        """ Inserts a chunk of the new tasks of '--import' (see 'Tasks.import_tasks'). The rows stay in the open transaction, committed by 
+        'self.save_import', so only the chunk is held in memory and an import is saved whole."""
+        self.apply_record(("import", tasks_chunk))
+
+    def save_import(self, n_imported):
+        """ Commits the chunks inserted by 'self.apply_import' (see 'Tasks.save_import'). There is no snapshot: the database is the store."""
+        # the rows are already in the transaction; the record only marks it as pending (see 'self.flush')
+        self.persist(("import", []))
+
+    def write_statistics(self):
+        """ Writes 'self.statistics' to the 'stats' table (committed with the current transaction)"""
+        self.connection.execute("INSERT OR REPLACE INTO stats (key, value) VALUES ('statistics', ?)", 
+                                (pickle.dumps(self.statistics, protocol=pickle.HIGHEST_PROTOCOL),))
+
+    def save_statistics(self):
+        """ Saves 'self.statistics' after they were replaced (see 'Tasks.save_statistics')"""
+        with self.connection:
+            self.write_statistics()
+
+    def apply_record(self, record):
+        """ Applies one mutation to the database. See 'Tasks.persist' for the records format."""
+        operation = record[0]
+
+        if operation == "add":
+            task = record[1]
+            self.connection.execute(f"INSERT INTO tasks ({self.columns}) VALUES (?, ?, ?, ?, ?, ?)", self.task_to_row(task))
+            self.statistics.add(task)
+            self.max_ID = max(self.max_ID, task.task_ID)
+            self.min_ID = self.min_ID or task.task_ID
+
+        elif operation == "import":
+            tasks = record[1]
+            self.connection.executemany(f"INSERT INTO tasks ({self.columns}) VALUES (?, ?, ?, ?, ?, ?)", map(self.task_to_row, tasks))
+            for task in tasks:
+                self.statistics.add(task)
+            if tasks:
+                self.max_ID = tasks[-1].task_ID
+                self.min_ID = self.min_ID or tasks[0].task_ID
+
+        elif operation == "done":
+            _, task_ID, completed_dt = record
+            task = self.get_task(task_ID)
+            self.statistics.remove(task)
+            self.connection.execute("UPDATE tasks SET completed_dt = ? WHERE task_ID = ?", (myDates.date_to_epoch(completed_dt), task_ID))
+            task.completed_dt = completed_dt
+            self.statistics.add(task)
+
+        elif operation == "delete":
+            self.statistics.remove(self.get_task(record[1]))
+            self.connection.execute("DELETE FROM tasks WHERE task_ID = ?", (record[1],))
+
+    def get_task(self, task_ID):
+        """ Retrieves a 'Task' object by its ID. Obs.: assumes the ID is valid (see 'self.valid_ID')."""
+        row = self.connection.execute(f"SELECT {self.columns} FROM tasks WHERE task_ID = ?", (task_ID,)).fetchone()
+        return self.row_to_task(row)
+
+    def all_tasks(self):
+        """ Iterates over all the 'Task' objects in ID order, streamed from the database"""
+        return map(self.row_to_task, self.connection.execute(f"SELECT {self.columns} FROM tasks ORDER BY task_ID"))
+
+    def ID_exists(self, task_ID):
+        """ Returns True if a 'Task' object with ID 'task_ID' is stored."""
+        return self.connection.execute("SELECT 1 FROM tasks WHERE task_ID = ?", (task_ID,)).fetchone() is not None
+
+#\SECTION
+
+#===========================================================================
+#SECTION auxiliary methods to process and extract data from the database
+#===========================================================================
+
+    def select_page(self, open_only=False, queries=None, sort_list=True, limit=None, offset=0, after=None, archived=False, due_range=None, 
+                    ignore_case=False, regex=False):
+        """ Retrieves one page of the 'Task' objects to print to the user, with their 'age' attribute updated. See 'Tasks.select_page'.
+        Filtering, ordering and paging are done by the database ('LIMIT'/'OFFSET'); only the tasks in the page are loaded.
+        Obs.: there is no separate archive; open tasks are read through the partial index 'tasks_open', completed ones ('archived') by a scan."""
+
+        conditions, parameters = [], []
+
+        # obs.: the condition must be written exactly as in the 'tasks_open' index for SQLite to use it
+        if open_only:
+            conditions.append("completed_dt IS NULL")
+        elif archived:
+            conditions.append("completed_dt IS NOT NULL")
+
+        # range of due dates; tasks with no due date are after all dates (see 'Tasks.due_range')
+        if due_range is not None:
+            start_ts, end_ts = due_range
+            if start_ts is not None:
+                conditions.append("(due_dt IS NULL OR due_dt >= ?)")
+                parameters.append(start_ts)
+            if end_ts is not None:
+                conditions.append("due_dt < ?")
+                parameters.append(end_ts)
+
+        # 'instr' is a case-sensitive substring search, as the 'in' operator of the pickle backend. 
+        # Terms ignoring case or regular expressions are compiled into one matcher (as in 'Tasks.select_page'), called by SQLite as a function
+        if queries and not (ignore_case or regex):
+            conditions.append("(" + " OR ".join(["instr(name, ?) > 0"] * len(queries)) + ")")
+            parameters.extend(queries)
+        elif queries:
+            match = QueryMatcher(queries, ignore_case, regex).match
+            self.connection.create_function("query_match", 1, lambda name: bool(match(name)), deterministic=True)
+            conditions.append("query_match(name)")
+
+        # cursor: rows after the given task in the order of the listing (the row value has the same order as 'Tasks.order_key')
+        if after is not None and sort_list:
+            conditions.append("(due_dt IS NULL, COALESCE(due_dt, 0), -priority, task_ID) > (?, ?, ?, ?)")
+            parameters.extend(self.order_key(self.get_task(after)))
+        elif after is not None:
+            conditions.append("task_ID > ?")
+            parameters.append(after)
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        sql = f"SELECT {self.columns} FROM tasks{where}"
+        sql += f" ORDER BY {self.order_by}" if sort_list else " ORDER BY task_ID"
+        sql += " LIMIT ? OFFSET ?"
+
+        # obs.: a negative LIMIT means no limit in SQLite
+        with self.profiler.phase("select (sqlite)"):
+            selected_tasks = [self.row_to_task(row) for row in self.connection.execute(sql, parameters + [-1 if limit is None else limit, offset])]
+            remaining = 0
+            if limit is not None:
+                n_selected = self.connection.execute(f"SELECT COUNT(*) FROM tasks{where}", parameters).fetchone()[0]
+                remaining = max(n_selected - offset - len(selected_tasks), 0)
+
+        self.set_age(selected_tasks)
+        return selected_tasks, remaining
+
+    def count_overdue(self):
+        """ Returns the number of unfinished tasks due before today, counted on the 'tasks_open' index (see 'Tasks.count_overdue')"""
+        today_ts = self.due_range(overdue=True)[0][1]
+        return self.connection.execute("SELECT COUNT(*) FROM tasks WHERE completed_dt IS NULL AND due_dt < ?", (today_ts,)).fetchone()[0]
+
+    def sorted_tasks(self):
+        """ Iterates over all the tasks in the order of '--report', streamed from the database (see 'Tasks.sorted_tasks')"""
+        return map(self.row_to_task, self.connection.execute(f"SELECT {self.columns} FROM tasks ORDER BY {self.order_by}"))
+
+    def set_age(self, tasks_list=None):
+        """ Sets the 'age' attribute of the Tasks objects: whole days since 'Task.created_dt', as in '3d'. 
+        Obs.: the database backend only loads the tasks to print, so 'tasks_list' is required"""
+        with self.profiler.phase("set_age"):
+            now = time.time()
+            for task in tasks_list:
+                task.age = f"{int((now - task.created_dt.timestamp()) // 86400)}d"
+
+    def reset_IDs(self):
+        """ Reset the task_ID of all the tasks to integers between [1, number of tasks], keeping their order. See 'Tasks.reset_IDs'."""
+
+        # IDs are first made negative so the renumbering never collides with an existing (positive) ID
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE new_IDs AS SELECT task_ID AS old_ID, ROW_NUMBER() OVER (ORDER BY task_ID) AS new_ID FROM tasks")
+            self.connection.execute("UPDATE tasks SET task_ID = -(SELECT new_ID FROM new_IDs WHERE old_ID = tasks.task_ID)")
+            self.connection.execute("UPDATE tasks SET task_ID = -task_ID")
+            self.connection.execute("DROP TABLE new_IDs")
+
+        self.min_ID, self.max_ID = self.connection.execute(
+            "SELECT COALESCE(MIN(task_ID), 0), COALESCE(MAX(task_ID), 0) FROM tasks").fetchone()
+        return "IDs successfully reseted", True
+
+    @staticmethod
+    def task_to_row(task):
+        """ Converts a 'Task' object to a database row (columns in the order of 'self.columns')"""
+        return (task.name, task.priority, task.task_ID, myDates.date_to_epoch(task.created_dt),
+                myDates.date_to_epoch(task.due_dt), myDates.date_to_epoch(task.completed_dt))
+
+    @staticmethod
+    def row_to_task(row):
+        """ Converts a database row (columns in the order of 'self.columns') to a 'Task' object"""
+        name, priority, task_ID, created_dt, due_dt, completed_dt = row
+        return Task.restore(name, priority, task_ID, myDates.epoch_to_date(created_dt),
+                            myDates.epoch_to_date(due_dt), myDates.epoch_to_date(completed_dt))
+
+#\SECTION
@@ -0,0 +1,250 @@
+# Moises Shalimay Andrade
+# Binary snapshot format of the 'Tasks' data (see 'Tasks.snapshot_format' in TaskManager.py), and a converter of existing snapshots
+# Usage: python TaskManagerStore.py [--format binary|pickle] [--compression zlib|lzma]   converts the snapshot in the current directory
+
+import argparse
+import os
+import pickle
+import struct
+from array import array
+from itertools import accumulate
+
+from TaskManager import Tasks, Task, TaskColumns
+from mySearch import NgramIndex
+
+#===========================================================================
+#SECTION binary snapshot format
+#===========================================================================
+
+# Layout (version 1), all integers little-endian:
+#   header: magic (8 bytes), version (uint16), compression (uint8: 0 none, 1 zlib, 2 lzma), reserved (uint8)
+#   body (compressed as a whole if set):
+#     - metadata: length (uint64) + pickled dict of the small fields (generation, archive offsets, record counts and IDs, aliases, timezone table, n-gram length,
+#                 statistics of '--stats')
+#     - tasks: count n (uint64), then fixed-width columns of n entries each, in ID order: IDs (int64), priorities (int8), created, due and completed
+#              dates (int64 seconds since the epoch, 'TaskColumns.NONE' if missing), timezones (uint8, positions in the timezone table)
+#     - names: string heap (see 'pack_strings')
+#     - open order: count m (uint64), then the columns of the m sort keys of the unfinished tasks, in '--list' order (see 'Tasks.order_key'):
+#                   no due date (int8), due date (int64), minus the priority (int8), ID (int64)
+#     - query index: n-grams (string heap), number of IDs posted under each (int64), typecode of the IDs (1 byte: 'I' uint32, or 'q' int64 
+#                    if an ID does not fit), then the IDs
+# A string heap is: count n (uint64), n+1 character offsets (int64), length in bytes (uint64) and the UTF-8 text of the strings joined.
+
+magic = b"TODOSNAP"
+version = 1
+header = struct.Struct("<8sHBB")
+compressions = {None: 0, "zlib": 1, "lzma": 2}
+
+
+def compressor(code):
+    """ Returns the stdlib module compressing with a compression code of the header (imported on first use)"""
+    return __import__({1: "zlib", 2: "lzma"}[code])
+
+
+def is_binary_snapshot(file):
+    """ Tells if an open snapshot file is in the binary format. The file is left at its start"""
+    start = file.read(len(magic))
+    file.seek(0)
+    return start == magic
+
+
+def pack_array(typecode, values):
+    return array(typecode, values).tobytes()
+
+
+def pack_strings(strings):
+    """ Packs a list of strings into a string heap"""
+    text = "".join(strings).encode("utf-8", "surrogatepass")
+    offsets = array('q', accumulate(map(len, strings), initial=0))
+    return b"".join([struct.pack("<Q", len(strings)), offsets.tobytes(), struct.pack("<Q", len(text)), text])
+
+
+class Reader(object):
+    """ Reads the sections of a snapshot body in order. Arrays are copied out of the body in one call each ('array.frombytes')"""
+
+    def __init__(self, body):
+        self.body = memoryview(body)
+        self.position = 0
+
+    def read(self, size):
+        data = self.body[self.position:self.position+size]
+        self.position += size
+        return data
+
+    def integer(self):
+        return struct.unpack("<Q", self.read(8))[0]
+
+    def array(self, typecode, n):
+        values = array(typecode)
+        values.frombytes(self.read(n * values.itemsize))
+        return values
+
+    def strings(self):
+        """ Reads a string heap. Returns the list of strings"""
+        n = self.integer()
+        offsets = self.array('q', n + 1)
+        text = str(self.read(self.integer()), "utf-8", "surrogatepass")
+        return [text[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+def dump_snapshot(tasks, file, compression=None):
+    """ Writes the data of a 'Tasks' object (the 'snapshot', as in 'Tasks.pickle_tasks') to an open file in the binary format.
+
+    Args:
+        tasks (TaskManager.Tasks): the tasks, with 'created_epochs' up to date
+        file (file object): file open for binary writing
+        compression (str, optional): None, 'zlib' or 'lzma'
+    """
+    if isinstance(tasks.tasks, TaskColumns):
+        columns = tasks.tasks
+        columns.compact()
+    else:
+        # the columns of the Task objects, built without a 'TaskColumns' (which would move the tasks' 'slot')
+        NONE, values = TaskColumns.NONE, list(tasks.tasks.values())
+        columns = TaskColumns()
+        columns.IDs, columns.priorities = array('q', [task.task_ID for task in values]), array('b', [task.priority for task in values])
+        columns.created = array('q', [task.created_ts for task in values])
+        columns.due = array('q', [NONE if task.due_ts is None else task.due_ts for task in values])
+        columns.completed = array('q', [NONE if task.completed_ts is None else task.completed_ts for task in values])
+        columns.tzs, columns.names = array('B', [task.tz for task in values]), [task.name for task in values]
+
+    metadata = {"generation": tasks.generation, "archive_offset": tasks.archive_offset, "archive_size": tasks.archive_size,
+                "archive_records": (tasks.archive_records, tasks.archive_dead),
+                "archive_IDs": (tasks.archive_min_ID, tasks.archive_max_ID), "aliases": tasks.aliases,
+                "tz_table": list(Task.tz_table), "query_ngram": tasks.query_index.n, "statistics": tasks.statistics}
+    metadata = pickle.dumps(metadata, protocol=pickle.HIGHEST_PROTOCOL)
+
+    open_order = tasks.open_order
+    grams = list(tasks.query_index.postings)
+    postings = [tasks.query_index.postings[gram] for gram in grams]
+    posting_typecode = 'I' if not columns.IDs or (min(columns.IDs) >= 0 and max(columns.IDs) < 2**32) else 'q'
+
+    body = b"".join([struct.pack("<Q", len(metadata)), metadata,
+                     struct.pack("<Q", len(columns.IDs)), columns.IDs.tobytes(), columns.priorities.tobytes(), columns.created.tobytes(),
+                     columns.due.tobytes(), columns.completed.tobytes(), columns.tzs.tobytes(),
+                     pack_strings(columns.names),
+                     struct.pack("<Q", len(open_order)), pack_array('b', [key[0] for key in open_order]), pack_array('q', [key[1] for key in open_order]),
+                     pack_array('b', [key[2] for key in open_order]), pack_array('q', [key[3] for key in open_order]),
+                     pack_strings(grams), pack_array('q', map(len, postings)), 
+                     posting_typecode.encode(), pack_array(posting_typecode, (task_ID for keys in postings for task_ID in keys))])
+
+    code = compressions[compression]
+    if code:
+        body = compressor(code).compress(body)
+    file.write(header.pack(magic, version, code, 0))
+    file.write(body)
+
+
+def load_snapshot(file, column_store=False):
+    """ Reads a snapshot written by 'dump_snapshot'.
+
+    Args:
+        file (file object): file open for binary reading, at its start
+        column_store (bool): return the tasks as a 'TaskColumns' column store instead of a dict of Task objects (see 'Tasks.column_store')
+
+    Returns: Tasks_data (dict): the same keys as a pickled snapshot (see 'Tasks.pickle_tasks')
+
+    Raises: ValueError: if the file is not a binary snapshot, or was written by a newer version of the app
+    """
+    file_magic, file_version, code, _ = header.unpack(file.read(header.size))
+    if file_magic != magic:
+        raise ValueError(f"\n{file.name} is not a binary snapshot\n")
+    if file_version > version:
+        raise ValueError(f"\n{file.name} was written by a newer version of the app (format version {file_version})\n")
+
+    body = file.read()
+    if code:
+        body = compressor(code).decompress(body)
+    reader = Reader(body)
+
+    Tasks_data = pickle.loads(reader.read(reader.integer()))
+    query_ngram = Tasks_data.pop("query_ngram")
+
+    # the timezone positions are translated to the 'Task.tz_table' of this process
+    columns = TaskColumns()
+    n = reader.integer()
+    columns.IDs, columns.priorities = reader.array('q', n), reader.array('b', n)
+    columns.created, columns.due, columns.completed = reader.array('q', n), reader.array('q', n), reader.array('q', n)
+    columns.tzs = reader.array('B', n)
+    positions = [Task.tz_index(tzinfo) for tzinfo in Tasks_data.pop("tz_table")]
+    if positions != list(range(len(positions))):
+        columns.tzs = array('B', (positions[tz] for tz in columns.tzs))
+    columns.names = reader.strings()
+
+    if column_store:
+        tasks = columns
+    else:
+        # obs.: the columns are converted to lists first, and the Task objects filled with one attribute per statement (the fastest way found)
+        tasks = {}
+        NONE, new_task = TaskColumns.NONE, Task.__new__
+        due = [None if due_ts == NONE else due_ts for due_ts in columns.due]
+        completed = [None if completed_ts == NONE else completed_ts for completed_ts in columns.completed]
+        for row, task_ID, name, priority, created_ts, due_ts, completed_ts, tz in zip(range(n), columns.IDs.tolist(), columns.names, columns.priorities.tolist(), 
+                                                                                       columns.created.tolist(), due, completed, columns.tzs.tolist()):
+            task = new_task(Task)
+            task.name = name
+            task.task_ID = task_ID
+            task.priority = priority
+            task.created_ts = created_ts
+            task.due_ts = due_ts
+            task.completed_ts = completed_ts
+            task.tz = tz
+            task.slot = row
+            tasks[task_ID] = task
+
+    # the sort keys of the unfinished tasks, in order, zipped from their columns
+    m = reader.integer()
+    open_order = list(zip(map(bool, reader.array('b', m)), reader.array('q', m), reader.array('b', m), reader.array('q', m)))
+
+    query_index = NgramIndex(query_ngram)
+    grams = reader.strings()
+    counts = reader.array('q', len(grams))
+    keys = reader.array(str(reader.read(1), "ascii"), sum(counts)).tolist()
+    query_index.postings = {gram: set(keys[start:end]) for gram, start, end in zip(grams, accumulate(counts, initial=0), accumulate(counts))}
+
+    Tasks_data.update(tasks=tasks, query_index=query_index, open_order=open_order,
+                      created_epochs=columns.created if column_store else array('q', columns.created))
+    return Tasks_data
+
+#\SECTION
+
+#===========================================================================
+#SECTION converter
+#===========================================================================
+
+def convert(snapshot_format="binary", compression=None):
+    """ Rewrites the snapshot of the tasks in the current directory (e.g., an existing '.todo.pickle') in another format, folding in its journal.
+
+    Args:
+        snapshot_format (str): 'binary' or 'pickle' (see 'Tasks.snapshot_format')
+        compression (str, optional): compression of a binary snapshot: None, 'zlib' or 'lzma'
+
+    Returns:
+        msg (str): A message to print in the terminal indicating sucess or failure of the conversion.
+        worked(bool): 'True' if the snapshot was converted, 'False' if there was none
+    """
+    if not os.path.isfile(Tasks.filename):
+        return f"\nThere is no snapshot ({Tasks.filename}) to convert in this directory\n", False
+
+    size = os.path.getsize(Tasks.filename)
+    with Tasks.lock():
+        tasks = Tasks()
+        tasks.snapshot_format, tasks.snapshot_compression = snapshot_format, compression
+        tasks.pickle_tasks()
+    return f"\nConverted {Tasks.filename} to the {snapshot_format} format: {size:,} -> {os.path.getsize(Tasks.filename):,} bytes\n", True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Converts the snapshot of the todo app tasks in the current directory to another format')
+    parser.add_argument('--format', type = str, default = 'binary', choices = ['binary', 'pickle'], help = 'Format of the converted snapshot. Defaults to binary')
+    parser.add_argument('--compression', type = str, choices = ['zlib', 'lzma'], help = 'Compression of a binary snapshot. Defaults to none')
+    args = parser.parse_args()
+
+    msg, worked = convert(args.format, args.compression)
+    print(msg)
+
+
+if __name__ == "__main__":
+    main()
+
+#\SECTION
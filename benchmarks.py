@@ -0,0 +1,649 @@
+# Benchmarks for the 'todo' app
+# Usage: python benchmarks.py <benchmark> [--tasks N]. Run 'python benchmarks.py --help' for the available benchmarks.
+#        python benchmarks.py suite [--sizes 1000,10000,100000] [--output FILE] [--baseline FILE] [--threshold 0.25]
+#        runs the suite of the 'Tasks' engine over several store sizes; results are saved as JSON and compared against a baseline (see 'run_suite').
+# Benchmarks run in a temporary directory, so the app's files in the current directory are not touched.
+
+import argparse
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from dateutil.tz import tzlocal
+
+import myDates
+import TaskManager
+
+
+#===========================================================================
+#SECTION auxiliary functions
+#===========================================================================
+
+def synthetic_rows(n_tasks, seed=0):
+    """ Yields 'n_tasks' random tasks as tuples (name, priority, task_ID, created_ts, due_ts, completed_ts), dates in seconds since the epoch.
+    Tasks are created over the last 3 years; ~70% are finished, ~40% have a due date (at midnight, as entered with '--due').
+    """
+    rng = random.Random(seed)
+    words = ["walk", "dog", "buy", "eggs", "study", "finals", "call", "mom", "pay", "bills", "gym", "report", "travel", "gift", "clean"]
+    now = int(time.time())
+
+    for task_ID in range(1, n_tasks+1):
+        created_ts = now - rng.randint(0, 3*365*86400)
+        due_ts = (created_ts // 86400 + rng.randint(1, 60)) * 86400 if rng.random() < 0.4 else None
+        completed_ts = created_ts + rng.randint(0, 30*86400) if rng.random() < 0.7 else None
+        name = " ".join(rng.choices(words, k=rng.randint(1, 4)))
+        yield name, rng.randint(1, 3), task_ID, created_ts, due_ts, completed_ts
+
+
+def synthetic_task(row, tz=None):
+    """ Builds a 'Task' object from a row of 'synthetic_rows'. 'tz': index of the time zone in 'Task.tz_table'; defaults to the local one"""
+    name, priority, task_ID, created_ts, due_ts, completed_ts = row
+    task = TaskManager.Task.__new__(TaskManager.Task)
+    task.name, task.priority, task.task_ID, task.slot = name, priority, task_ID, None
+    task.created_ts, task.due_ts, task.completed_ts = created_ts, due_ts, completed_ts
+    task.tz = tz if tz is not None else TaskManager.Task.tz_index(myDates.date_localtz(datetime.now()).tzinfo)
+    return task
+
+
+def synthetic_tasks(n_tasks, seed=0):
+    """ Returns a 'Tasks' object with the 'n_tasks' tasks of 'synthetic_rows', kept in memory only (finished ones in the archive). 
+    Obs.: must be called in an empty directory."""
+    tasks = TaskManager.Tasks()
+    tasks.archived_tasks = {}
+    tz = TaskManager.Task.tz_index(myDates.date_localtz(datetime.now()).tzinfo)
+    for row in synthetic_rows(n_tasks, seed):
+        task = synthetic_task(row, tz)
+        if task.completed_ts is None:
+            tasks.tasks[task.task_ID] = task
+        else:
+            tasks.archive_task(task)
+
+    tasks.min_ID, tasks.max_ID = (1, n_tasks) if n_tasks else (0, 0)
+    # the statistics of '--stats' are computed on first use (see 'Tasks.load_statistics')
+    tasks.statistics = None
+    tasks.build_open_order()
+    tasks.build_created_epochs()
+    tasks.build_query_index()
+    return tasks
+
+
+def time_it(function, repeat=3):
+    """ Returns the best wall time (seconds) of 'repeat' calls of 'function'"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+#\SECTION
+
+#===========================================================================
+#SECTION benchmarks
+#===========================================================================
+
+def bench_set_age(n_tasks):
+    """ Ages of all tasks: per-task datetime arithmetic (previous implementation) vs. 'Tasks.set_age' on the epoch array,
+    with and without numpy; and ages for the 50 rows of a printed page only"""
+    tasks = synthetic_tasks(n_tasks)
+
+    def set_age_datetime():
+        today = myDates.date_localtz(datetime.now())
+        for task in tasks.all_tasks():
+            task.age = f"{myDates.date_diff_absolute(today, task.created_dt).days}d"
+
+    def set_age_array():
+        tasks.use_numpy = False
+        try:
+            tasks.set_age()
+        finally:
+            del tasks.use_numpy
+
+    page = list(tasks.tasks.values())[:50]
+    results = {"datetime arithmetic (previous)": time_it(set_age_datetime),
+               "epoch array('q')": time_it(set_age_array)}
+    if TaskManager.import_optional("numpy") is not None:
+        results["epoch array + numpy"] = time_it(tasks.set_age)
+    results["50 printed rows only"] = time_it(lambda: tasks.set_age(page))
+    return results
+
+
+def bench_report(n_tasks):
+    """ '--report' and '--list' output: all the tasks vs. a page of 50 tasks ('--limit 50'), selected with a heap or from the open order"""
+    tasks = synthetic_tasks(n_tasks)
+
+    def report(**paging):
+        tasks.age_updated = False
+        return tasks.report_tasks(**paging)
+
+    def list_tasks(**paging):
+        tasks.age_updated = False
+        return tasks.list_tasks(**paging)
+
+    return {"--report, all tasks": time_it(report),
+            "--report --limit 50": time_it(lambda: report(limit=50)),
+            "--list, all tasks": time_it(list_tasks),
+            "--list --limit 50": time_it(lambda: list_tasks(limit=50))}
+
+
+def bench_dates(n_tasks):
+    """ Date columns of '--report' ('due_dt_str', 'created_dt_str', 'completed_dt_str' of all tasks), and '--report --limit 1000',
+    formatted without the cache ('Tasks.date_cache = False'), with an empty cache and with the cache filled by a previous report"""
+    tasks = synthetic_tasks(n_tasks)
+    tasks.set_age()
+
+    def date_columns():
+        return [(task.due_dt_str, task.created_dt_str, task.completed_dt_str) for task in tasks.all_tasks()]
+
+    def page():
+        return tasks.report_tasks(limit=1000)
+
+    def cold(function):
+        def run():
+            TaskManager.format_timestamp.cache_clear()
+            function()
+        return run
+
+    results = {}
+    for name, function in [("--report date columns", date_columns), ("--report --limit 1000", page)]:
+        TaskManager.Tasks.date_cache = False
+        results[f"{name}, no cache"] = time_it(function)
+        TaskManager.Tasks.date_cache = True
+        results[f"{name}, empty cache"] = time_it(cold(function))
+        results[f"{name}, filled cache"] = time_it(function)
+    return results
+
+
+def bench_create(n_tasks):
+    """ Creation of 'n_tasks' Task objects ('--add' with a due date): a fresh 'tzlocal()' per date (previous implementation)
+    vs. the local timezone resolved once by 'myDates.local_timezone'"""
+    rows = [(f"task {task_ID}", task_ID % 3 + 1, f"{task_ID % 12 + 1:02d}/01/2032", task_ID) for task_ID in range(1, n_tasks+1)]
+
+    def create():
+        return [TaskManager.Task(*row) for row in rows]
+
+    local_timezone = myDates.local_timezone
+    myDates.local_timezone = tzlocal
+    try:
+        results = {"fresh tzlocal() per date (previous)": time_it(create)}
+    finally:
+        myDates.local_timezone = local_timezone
+    results["cached local timezone"] = time_it(create)
+    return results
+
+
+def bench_parse(n_tasks):
+    """ Parsing of the '--due' dates of 'n_tasks' new tasks (dates within 3 years): validation plus parsing with 'strptime' (previous implementation),
+    'myDates.parse_date' without its memo cache (fast path only), and with it"""
+    rng = random.Random(0)
+    dates = [f"{rng.randint(1, 12)}/{rng.randint(1, 28):02d}/{rng.randint(2023, 2025)}" for _ in range(n_tasks)]
+
+    def previous():
+        for date in dates:
+            if myDates.datetime.datetime.strptime(date.strip(), "%m/%d/%Y"):
+                myDates.datetime.datetime.strptime(date, "%m/%d/%Y")
+
+    def fast_path():
+        for date in dates:
+            myDates.parse_date.__wrapped__(date, True)
+
+    def memoized():
+        myDates.parse_date.cache_clear()
+        for date in dates:
+            myDates.parse_date(date, True)
+
+    return {"strptime twice (previous)": time_it(previous),
+            "parse_date, fast path only": time_it(fast_path),
+            "parse_date, fast path + memo": time_it(memoized)}
+
+
+class LegacyTask(object):
+    """ A task as represented by previous versions of the app: per-instance '__dict__', aware datetime objects with their own 'tzlocal()', an 'age' string"""
+    def __init__(self, name, priority, task_ID, created_ts, due_ts, completed_ts):
+        self.name, self.priority, self.task_ID = name, priority, task_ID
+        self.created_dt = datetime.fromtimestamp(created_ts, tzlocal())
+        self.due_dt = datetime.fromtimestamp(due_ts, tzlocal()) if due_ts is not None else None
+        self.completed_dt = datetime.fromtimestamp(completed_ts, tzlocal()) if completed_ts is not None else None
+        self.age = "0d"
+
+
+def bench_memory(n_tasks):
+    """ Bytes per task (traced by 'tracemalloc') of the tasks container: list of legacy tasks plus list of IDs (previous implementation),
+    dict of slotted 'Task' objects, and 'TaskColumns' column store"""
+
+    tz = TaskManager.Task.tz_index(myDates.date_localtz(datetime.now()).tzinfo)
+
+    def bytes_per_task(build):
+        rows = list(synthetic_rows(n_tasks))
+        tracemalloc.start()
+        container = build(rows)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del container
+        return size / n_tasks
+
+    def build_legacy(rows):
+        tasks = [LegacyTask(*row) for row in rows]
+        return tasks, [task.task_ID for task in tasks]
+
+    def build_slots(rows):
+        return {row[2]: synthetic_task(row, tz) for row in rows}
+
+    def build_columns(rows):
+        return TaskManager.TaskColumns(synthetic_task(row, tz) for row in rows)
+
+    return {"list of legacy tasks + IDs (previous)": bytes_per_task(build_legacy),
+            "dict of slotted Task": bytes_per_task(build_slots),
+            "TaskColumns column store": bytes_per_task(build_columns)}
+
+
+def bench_archive(n_tasks):
+    """ Loading the store and '--list' (~30% of the synthetic tasks are unfinished): a snapshot holding all the tasks (previous implementation) 
+    vs. one holding the unfinished tasks only, the finished ones being in the archive (read by '--report')"""
+    tasks = synthetic_tasks(n_tasks)
+    tasks.pickle_tasks()
+    with open("previous.pickle", "wb") as file:
+        pickle.dump({"tasks": {task.task_ID: task for task in tasks.all_tasks()}}, file)
+
+    def load_previous():
+        with open("previous.pickle", "rb") as file:
+            return pickle.load(file)
+
+    return {"load, all tasks (previous)": time_it(load_previous),
+            "Tasks() load, unfinished tasks": time_it(TaskManager.Tasks),
+            "Tasks() + --list --limit 50": time_it(lambda: TaskManager.Tasks().list_tasks(limit=50)),
+            "Tasks() + --report --limit 50": time_it(lambda: TaskManager.Tasks().report_tasks(limit=50))}
+
+
+def add_tasks(n_adds, sync_mode, worker):
+    """ Writer process of 'concurrent_writers': adds 'n_adds' tasks, one run of todo.py --add each (lock, load, add, unlock, sync)"""
+    TaskManager.Tasks.sync_mode = sync_mode
+    for i in range(n_adds):
+        with TaskManager.Tasks.lock():
+            tasks = TaskManager.open_tasks()
+            tasks.add(f"task {worker}-{i}")
+        tasks.sync()
+
+
+def concurrent_writers(n_processes, n_adds, sync_mode=None):
+    """ Runs 'n_processes' writer processes adding 'n_adds' tasks each to the store in the current directory, concurrently.
+    Returns: (float): wall time in seconds until all the writers are done"""
+    processes = [multiprocessing.Process(target=add_tasks, args=(n_adds, sync_mode, worker)) for worker in range(n_processes)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    wall = time.perf_counter() - start
+    if any(process.exitcode != 0 for process in processes):
+        raise RuntimeError("a writer process failed")
+    return wall
+
+
+def bench_writers(n_tasks, n_processes=8):
+    """ Throughput (tasks added per second) of 8 concurrent writer processes adding 'n_tasks' tasks in total to a store, 
+    for each 'Tasks.sync_mode': no fsync, one fsync per add, and group commit (concurrent adds sharing one fsync)"""
+    results = {}
+    for name, sync_mode in [("no fsync", None), ("fsync per add", "fsync"), ("group commit", "group")]:
+        for filename in [TaskManager.Tasks.filename, TaskManager.Tasks.journal_filename, TaskManager.Tasks.sync_filename]:
+            if os.path.isfile(filename):
+                os.remove(filename)
+        n_adds = max(n_tasks // n_processes, 1)
+        wall = concurrent_writers(n_processes, n_adds, sync_mode)
+        if len(TaskManager.Tasks().tasks) != n_processes * n_adds:
+            raise RuntimeError(f"{name}: updates were lost")
+        results[name] = n_processes * n_adds / wall
+    return results
+
+
+def bench_batch(n_tasks):
+    """ Adding 'n_tasks' tasks: one command at a time, each saved to the journal (as 'n_tasks' runs of todo.py --add, without the process 
+    start-ups) vs. one '--batch' run saving them once"""
+    import todo
+    lines = [f'--add "task {i}" --due 12/01/2032 --priority {i % 3 + 1}' for i in range(n_tasks)]
+
+    def one_at_a_time():
+        tasks = TaskManager.Tasks()
+        for i in range(n_tasks):
+            tasks.add(f"task {i}", i % 3 + 1, "12/01/2032")
+
+    def batch():
+        todo.run_batch(TaskManager.Tasks(), lines)
+
+    def clear():
+        for filename in [TaskManager.Tasks.filename, TaskManager.Tasks.journal_filename]:
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+    results = {}
+    for name, function in [("--add one at a time", one_at_a_time), ("--batch", batch)]:
+        clear()
+        results[name] = time_it(function, repeat=1)
+    return results
+
+
+def bench_store(n_tasks):
+    """ Loading the snapshot (~30% of the synthetic tasks are unfinished, the others are in the archive): 'pickle.load' of a pickled snapshot 
+    vs. the binary format of TaskManagerStore.py, uncompressed and compressed, and 'Tasks()' with each. The file sizes are in the names"""
+    import TaskManagerStore
+    tasks = synthetic_tasks(n_tasks)
+    results = {}
+    for snapshot_format, compression in [("pickle", None), ("binary", None), ("binary", "zlib"), ("binary", "lzma")]:
+        tasks.snapshot_format, tasks.snapshot_compression = snapshot_format, compression
+        tasks.generation -= 1
+        tasks.pickle_tasks()
+        name = f"{snapshot_format}{', ' + compression if compression else ''} ({os.path.getsize(tasks.filename) / 2**20:.1f} MB)"
+
+        def load():
+            with open(tasks.filename, "rb") as file:
+                return pickle.load(file) if snapshot_format == "pickle" else TaskManagerStore.load_snapshot(file)
+
+        results[f"{'pickle.load' if snapshot_format == 'pickle' else 'load_snapshot'}, {name}"] = time_it(load)
+        results[f"Tasks(), {name}"] = time_it(TaskManager.Tasks)
+    return results
+
+
+def bench_import_export(n_tasks):
+    """ '--import' of a CSV and a JSON Lines file of 'n_tasks' synthetic tasks into an empty list (saved once), then '--export' of them to each format"""
+    from myRecords import write_records
+    tasks = synthetic_tasks(n_tasks)
+    for filename in ["tasks.csv", "tasks.jsonl"]:
+        write_records(filename, map(tasks.task_to_record, tasks.sorted_tasks()), TaskManager.Tasks.export_fields)
+    del tasks
+
+    def clear():
+        for filename in [TaskManager.Tasks.filename, TaskManager.Tasks.journal_filename, TaskManager.Tasks.archive_filename]:
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+    results = {}
+    for filename in ["tasks.csv", "tasks.jsonl"]:
+        clear()
+        start = time.perf_counter()
+        msg, worked = TaskManager.Tasks().import_tasks(filename)
+        results[f"--import {filename}"] = time.perf_counter() - start
+        if not worked:
+            raise RuntimeError(msg)
+
+    tasks = TaskManager.Tasks()
+    for filename in ["export.csv", "export.jsonl"]:
+        results[f"--export {filename}"] = time_it(lambda: tasks.export_tasks(filename), repeat=1)
+    return results
+
+
+def bench_due(n_tasks):
+    """ Tasks due within a week ('--due-after' today '--due-before' in 6 days): filtering the due dates of the whole '--list' (previous way of
+    finding them) vs. 'Tasks.due_tasks', the range of the open order found by bisection. Also the '--overdue' tasks (most of the synthetic ones)"""
+    tasks = synthetic_tasks(n_tasks)
+    today = datetime.now()
+    due_after, due_before = today.strftime("%m/%d/%Y"), (today + timedelta(days=6)).strftime("%m/%d/%Y")
+    start_ts, end_ts = tasks.due_range(due_before, due_after)[0]
+    header_attributes = {'ID': 'task_ID', 'Age': 'age', 'Due Date': 'due_dt_str', 'Priority': 'priority', 'Task':'name'}
+
+    def filter_list():
+        selected = [task for task in tasks.select_tasks(open_only=True) if task.due_ts is not None and start_ts <= task.due_ts < end_ts]
+        return tasks.tabulate_tasks(header_attributes, selected)
+
+    def due_tasks(**options):
+        tasks.age_updated = False
+        return tasks.due_tasks(**options)
+
+    return {"filter --list, due in a week": time_it(filter_list),
+            "--due-after --due-before, due in a week": time_it(lambda: due_tasks(due_before=due_before, due_after=due_after)),
+            "--overdue --limit 50": time_it(lambda: due_tasks(overdue=True, limit=50))}
+
+
+def bench_stats(n_tasks):
+    """ '--stats': the summary read from the statistics kept by the mutations vs. '--stats --rebuild', recomputing them in one pass over all 
+    the tasks (as a '--report' scan would). Also the cost the statistics add to each '--add' and '--done'"""
+    tasks = synthetic_tasks(n_tasks)
+    tasks.load_statistics()
+    tasks.deferred_writes = True
+
+    def add_done(n=1000):
+        for _ in range(n):
+            tasks.apply_record(("add", TaskManager.Task("walk dog", 2, None, tasks.max_ID + 1)))
+            tasks.apply_record(("done", tasks.max_ID, myDates.date_localtz(datetime.now())))
+
+    results = {"--stats": time_it(tasks.report_stats), "--stats --rebuild": time_it(lambda: tasks.report_stats(rebuild=True), repeat=1)}
+    results["1000 --add and --done, with statistics"] = time_it(add_done)
+    tasks.statistics = None
+    results["1000 --add and --done, without statistics"] = time_it(add_done)
+    return results
+
+
+def bench_cache(n_tasks):
+    """ Runs of todo.py printing a page of 50 tasks with '--list' and '--report' on a saved store: from the tasks ('--no-cache') vs. from the
+    output cache (a hit: the tasks are not loaded). Wall times of the whole process, as seen by the user"""
+    tasks = synthetic_tasks(n_tasks)
+    tasks.pickle_tasks()
+    del tasks
+
+    results = {}
+    for options in [("--list", "--limit", "50"), ("--report", "--limit", "50")]:
+        name = " ".join(options)
+        results[f"{name} --no-cache"] = min(run_todo(*options, "--no-cache")[0] for _ in range(3))
+        run_todo(*options)
+        results[f"{name}, cached"] = min(run_todo(*options)[0] for _ in range(3))
+    return results
+
+
+def bench_query(n_tasks):
+    """ Names of all the tasks (open and archived) matching 1, 10 and 100 '--query' terms: one substring search per term and name (previous 
+    implementation) vs. 'mySearch.QueryMatcher', the terms compiled into one matcher testing each name once. Also with '--ignore-case' and '--regex'"""
+    from mySearch import QueryMatcher
+    names = [row[0] for row in synthetic_rows(n_tasks)]
+    words = ["walk", "dog", "buy", "eggs", "study", "finals", "call", "mom", "pay", "bills", "gym", "report", "travel", "gift", "clean"]
+    # pairs of words in the order absent from the names first, so most terms do not match (as when searching for several things at once)
+    pairs = [f"{first}{second}" for first in words for second in words]
+
+    results = {}
+    for n_terms in [1, 10, 100]:
+        terms = pairs[:n_terms - 1] + ["gift"]
+        results[f"{n_terms} terms, per term"] = time_it(lambda: [name for name in names if any(term in name for term in terms)], repeat=1)
+        for options in [{}, {"ignore_case": True}, {"regex": True}]:
+            match = QueryMatcher(terms, **options).match
+            label = "".join(f" --{option.replace('_', '-')}" for option in options)
+            results[f"{n_terms} terms, matcher{label}"] = time_it(lambda: [name for name in names if match(name)], repeat=1)
+    return results
+
+
+# each benchmark takes the number of synthetic tasks and returns {name: seconds} (or {name: bytes} for 'memory')
+benchmarks = {"set_age": bench_set_age, "memory": bench_memory, "report": bench_report, "dates": bench_dates, "create": bench_create, "parse": bench_parse,
+              "archive": bench_archive, "writers": bench_writers,
+              "batch": bench_batch, "store": bench_store,
+              "import_export": bench_import_export, "due": bench_due,
+              "stats": bench_stats, "cache": bench_cache, "matcher": bench_query}
+
+#\SECTION
+
+#===========================================================================
+#SECTION benchmark suite
+#===========================================================================
+
+todo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "todo.py")
+
+# times below this many seconds are not compared against the baseline (timer noise)
+min_compared_seconds = 0.001
+
+# runs 'todo.py' (argv[1]) and writes its peak resident memory in kB to stderr. 
+# Obs.: read from 'VmHWM' in /proc (Linux only); 'getrusage' would also count the memory of the benchmark process it was forked from
+todo_wrapper = """
+import os, runpy, sys
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+try:
+    runpy.run_path(sys.argv[0], run_name="__main__")
+finally:
+    if os.path.isfile("/proc/self/status"):
+        with open("/proc/self/status") as file:
+            print(*[line.split()[1] for line in file if line.startswith("VmHWM")], file=sys.stderr)
+"""
+
+
+def run_todo(*options):
+    """ Runs 'todo.py' with the given options in the current directory. Returns its wall time (seconds) and peak resident memory (bytes, None if unknown)"""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-c", todo_wrapper, todo_path, *options], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    wall = time.perf_counter() - start
+    peak = process.stderr.split()[-1] if process.stderr.strip() else None
+    return wall, int(peak) * 1024 if peak and peak.isdigit() else None
+
+
+def suite_size(n_tasks, repeat=3):
+    """ Runs the suite on a synthetic store of 'n_tasks' tasks saved in the current directory.
+
+    Returns: (dict): {'seconds': {operation: best wall time}, 'bytes': {measure: bytes}}
+    """
+    seconds, memory = {}, {}
+
+    tasks = synthetic_tasks(n_tasks)
+    seconds["pickle_tasks"] = time_it(tasks.pickle_tasks, repeat)
+
+    tracemalloc.start()
+    tasks = TaskManager.Tasks()
+    memory["Tasks() peak traced"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    seconds["Tasks() load"] = time_it(TaskManager.Tasks, repeat)
+
+    def reset_age(method, *args, **kwargs):
+        def run():
+            tasks.age_updated = False
+            method(*args, **kwargs)
+        return run
+
+    seconds["list_tasks"] = time_it(reset_age(tasks.list_tasks), repeat)
+    seconds["report_tasks"] = time_it(reset_age(tasks.report_tasks), repeat)
+    seconds["query_tasks"] = time_it(reset_age(tasks.query_tasks, ["eggs", "mom"], sort_list=True), repeat)
+
+    # mutations: each repetition works on a different task
+    open_IDs = iter([task.task_ID for task in tasks.select_tasks(open_only=True)])
+    deleted_IDs = iter(list(tasks.tasks_ID)[::-1])
+    seconds["add"] = time_it(lambda: tasks.add("buy gift", 2, "12/01/2032"), repeat)
+    seconds["done"] = time_it(lambda: tasks.done(next(open_IDs)), repeat)
+    seconds["delete"] = time_it(lambda: tasks.delete(next(deleted_IDs)), repeat)
+    seconds["reset_IDs"] = time_it(tasks.reset_IDs, repeat)
+    tasks.pickle_tasks()
+
+    # end to end: a new process for each command, as the user runs it. 
+    # The listings bypass the output cache, or every run after the first would print the cached output (timed in 'bench_cache')
+    for options in (["--add", "buy gift", "--due", "12/01/2032"], ["--list", "--limit", "20"], ["--list"]):
+        command = "todo.py " + " ".join(options)
+        no_cache = ["--no-cache"] if "--list" in options else []
+        runs = [run_todo(*options, *no_cache) for _ in range(repeat)]
+        seconds[command] = min(wall for wall, _ in runs)
+        if runs[0][1] is not None:
+            memory[f"{command} peak RSS"] = max(peak for _, peak in runs)
+
+    return {"seconds": seconds, "bytes": memory}
+
+
+def compare_results(results, baseline, threshold):
+    """ Compares the results of a suite against a baseline (both as saved by 'run_suite').
+
+    Returns: (list): the regressions, as strings: measures more than 'threshold' (e.g., 0.25 = 25%) above the baseline. 
+             Times under 'min_compared_seconds' in both runs are not compared.
+    """
+    regressions = []
+    for size, measures in results["sizes"].items():
+        for kind, values in measures.items():
+            for name, value in values.items():
+                base = baseline["sizes"].get(size, {}).get(kind, {}).get(name)
+                if base is None or value is None or base <= 0:
+                    continue
+                if kind == "seconds" and max(value, base) < min_compared_seconds:
+                    continue
+                if value > base * (1 + threshold):
+                    regressions.append(f"{int(size):,} tasks, {name}: {value:.6g} {kind} vs. {base:.6g} in the baseline (+{value/base - 1:.0%})")
+    return regressions
+
+
+def run_suite(sizes, output=None, baseline=None, threshold=0.25, repeat=3):
+    """ Runs the suite over synthetic stores of each size, prints the results and saves them as JSON in 'output'.
+    If a 'baseline' JSON file is given, compares against it and exits with status 1 if any measure regressed more than 'threshold'.
+    """
+    results = {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+               "platform": platform.platform(), "repeat": repeat, "sizes": {}}
+
+    cwd = os.getcwd()
+    for n_tasks in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            os.chdir(directory)
+            try:
+                results["sizes"][str(n_tasks)] = suite_size(n_tasks, repeat)
+            finally:
+                os.chdir(cwd)
+
+        print(f"\nsuite, {n_tasks:,} tasks (best of {repeat})\n")
+        for name, value in results["sizes"][str(n_tasks)]["seconds"].items():
+            print(f"  {name:<50} {value*1000:>12.2f} ms")
+        for name, value in results["sizes"][str(n_tasks)]["bytes"].items():
+            print(f"  {name:<50} {value/2**20:>12.2f} MB")
+
+    if output:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResults saved to {output}")
+
+    if baseline:
+        with open(baseline) as file:
+            regressions = compare_results(results, json.load(file), threshold)
+        if regressions:
+            print(f"\nRegressions of more than {threshold:.0%} against {baseline}:")
+            print(*(f"  {regression}" for regression in regressions), sep="\n")
+            sys.exit(1)
+        print(f"\nNo regressions of more than {threshold:.0%} against {baseline}")
+    print()
+
+#\SECTION
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks for the todo app')
+    parser.add_argument('benchmark', choices = sorted(benchmarks) + ["suite"], help = 'benchmark to run')
+    parser.add_argument('--tasks', type = int, default = 1_000_000, help = 'number of tasks in the synthetic list. Defaults to 1,000,000')
+
+    # suite options
+    parser.add_argument('--sizes', type = str, default = "1000,10000,100000", 
+                        help = 'suite: comma-separated numbers of tasks of the synthetic stores (e.g., 1000,10000,100000,1000000,10000000). Defaults to 1000,10000,100000')
+    parser.add_argument('--output', type = str, help = 'suite: JSON file to save the results to')
+    parser.add_argument('--baseline', type = str, help = 'suite: JSON file of a previous run to compare against')
+    parser.add_argument('--threshold', type = float, default = 0.25, 
+                        help = 'suite: relative slowdown over the baseline that fails the run (exit status 1). Defaults to 0.25 (25%%)')
+    parser.add_argument('--repeat', type = int, default = 3, help = 'suite: repetitions of each measure (the best is kept). Defaults to 3')
+    args = parser.parse_args()
+
+    if args.benchmark == "suite":
+        run_suite([int(size) for size in args.sizes.split(",")], args.output, args.baseline, args.threshold, args.repeat)
+        return
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            results = benchmarks[args.benchmark](args.tasks)
+        finally:
+            os.chdir(cwd)
+
+    print(f"\n{args.benchmark}, {args.tasks:,} tasks\n")
+    for name, value in results.items():
+        if args.benchmark == "memory":
+            print(f"  {name:<40} {value:>10.1f} bytes/task")
+        elif args.benchmark == "writers":
+            print(f"  {name:<40} {value:>10.1f} adds/s")
+        else:
+            print(f"  {name:<40} {value*1000:>10.1f} ms (best of 3)")
+    print()
+
+
+if __name__ == "__main__":
+    main()
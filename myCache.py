@@ -0,0 +1,100 @@
+# Moises Shalimay Andrade
+# Auxiliary module with an on-disk cache of values by key (one file per entry), with expiry dates and size-bounded eviction
+
+import hashlib
+import os
+import pickle
+import time
+
+#=======================================================================
+#SECTION on-disk cache
+#=======================================================================
+
+class FileCache(object):
+    """ Cache of pickled values by key (a string), kept in a directory with one file per entry, so separate processes (e.g., runs of a
+    command-line app) share it. Entries are written to a temporary file renamed over the entry, so a reader never sees a partial one.
+    When the entries pass 'max_bytes' in total, the least recently used are removed (recency is the modification time of the files,
+    updated on each hit). Any error reading or writing the cache is a miss: the cache can be deleted at any time.
+
+    Attributes:
+     - directory (str): directory of the entries, created on the first write
+     - max_bytes (int): bound of the total size of the entries. Values larger than it are not cached.
+
+    Examples:
+        cache = FileCache(".cache", 1 << 20)
+        cache.put("list", "table", expires=time.time() + 60)
+        cache.get("list") -> 'table' (None after 60 seconds, or for any other key)
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        """ Returns the file of the entry of a key (named by its hash)"""
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def get(self, key):
+        """ Returns the value cached for a key, or None if there is none (or it expired)"""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                entry_key, expires, value = pickle.load(file)
+        except Exception:
+            return None
+
+        # obs.: the key is saved along, so two keys with the same hash never share an entry
+        if entry_key != key:
+            return None
+        if expires is not None and time.time() >= expires:
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value, expires=None):
+        """ Caches a value for a key until 'expires' (seconds since the epoch; None: never), then evicts the least recently used entries
+        past 'self.max_bytes'. Returns True if the value was cached."""
+        data = pickle.dumps((key, expires, value), protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return False
+
+        path = self.path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary_path, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, path)
+        except OSError:
+            self.remove(temporary_path)
+            return False
+        self.evict()
+        return True
+
+    def evict(self):
+        """ Removes the least recently used entries until they take at most 'self.max_bytes'"""
+        try:
+            entries = [(entry.stat().st_mtime_ns, entry.stat().st_size, entry.path) for entry in os.scandir(self.directory)
+                       if entry.is_file() and not entry.name.endswith(".tmp")]
+        except OSError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+#\SECTION
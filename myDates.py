@@ -1,13 +1,12 @@
 # Moises Shalimay S Andrade
 # This is an auxiliary module to deal with datetime validation, conversion and arithmetics
 
-from myNumbers import *
 import datetime
-import dateutil
-from dateutil.tz import tzlocal, UTC, tzrange
-import pytz
-from tzlocal import get_localzone, get_localzone_name
-from zoneinfo import ZoneInfo
+from functools import lru_cache
+from dateutil.tz import tzlocal, UTC
+
+# Obs.: 'tzlocal' (package) and 'myNumbers' are only needed by a fallback and deprecated functions, so they are imported there;
+# importing this module stays cheap for the 'todo' app.
 
 def valid_date(date:str, remove_whitespace=False, dt_format="%m/%d/%Y"):
     """ Checks if string can be represented as a datetime object and returns a boolean
@@ -17,44 +16,67 @@ def valid_date(date:str, remove_whitespace=False, dt_format="%m/%d/%Y"):
         remove_whitespace: remove whitespaces before checking?  
     """       
 
-    if remove_whitespace:
-        date = date.strip()
-
     # if able to convert the string to a python datetime in the passed format, string is date, True; else, False
-    try:
-        datetime.datetime.strptime(date, dt_format)
-        return True
-    except:
-        return False
+    return parse_date(date, remove_whitespace, dt_format)[1] is None
 
-def date_localtz(date_naive:str):
-    """ Tries to retrieve the user's system local timezone and assigns it to a naive datetime object
 
-    Args: date_naive (datetime): a datetime object without tzinfo
+@lru_cache(maxsize=4096)
+def parse_date(date:str, remove_whitespace=False, dt_format="%m/%d/%Y"):
+    """ Converts a string to a naive datetime object in one pass, validating it. Memoized: repeated date strings are parsed once.
+
+    Args: as in 'valid_date'
+
+    Returns:
+        (datetime) | None: the parsed date | None if the string is not a date in the format
+        (str) | None: None if the string was parsed | an error message
     
-    Returns: date (datetime): If successful, aware datetime object with tzinfo = user's system local time; returns back 'date_naive' 
+    Examples:
+        parse_date('12/31/2022') -> (datetime.datetime(2022, 12, 31, 0, 0), None)
+        parse_date('31/12/2022') -> (None, "'31/12/2022' is not a valid date in the format %m/%d/%Y")
     """
+    try:
+        if remove_whitespace:
+            date = date.strip()
 
-    # Local timezone retrievement might be affected by the user OS, python version, personal configurations, etc.
-    # Until latest releases of 'dateutil' (as of 2022), no direct method existed to retrieve this information. Some python versions might not be supported by this method.
-    # Therefore, implementation strategy: tries to retrieve user local timezone through three methods.
-     
+        # fast path for the app's format: 1-2 digits month and day, 4 digits year. Same results as 'strptime', which handles any other string.
+        if dt_format == "%m/%d/%Y":
+            parts = date.split("/")
+            if (len(parts) == 3 and date.isascii() and all(part.isdigit() for part in parts)
+                    and 0 < len(parts[0]) <= 2 and 0 < len(parts[1]) <= 2 and len(parts[2]) == 4):
+                return datetime.datetime(int(parts[2]), int(parts[0]), int(parts[1])), None
+
+        return datetime.datetime.strptime(date, dt_format), None
+    except (TypeError, ValueError, AttributeError):
+        return None, f"'{date}' is not a valid date in the format {dt_format}"
+
+#=====================================================================================
+#SECTION local timezone
+#=====================================================================================
+
+# the user's local timezone, resolved once per process and shared by all dates (see 'local_timezone')
+local_tzinfo = None
+
+
+def resolve_local_timezone():
+    """ Tries to retrieve the user's system local timezone as a tzinfo object. Returns None if no method worked.
+
+    Local timezone retrievement might be affected by the user OS, python version, personal configurations, etc.
+    Until latest releases of 'dateutil' (as of 2022), no direct method existed to retrieve this information. Some python versions might not be supported by this method.
+    Therefore, implementation strategy: tries to retrieve user local timezone through three methods.
+    """
     try:
         # method 1: 'dateutil' direct method (PEP 495 compatible, 2020)
-        date = date_naive.replace(tzinfo=tzlocal())
-        return date
+        local_tz = tzlocal()
+        datetime.datetime.now(local_tz)
+        return local_tz
     except:
         try:
             print("\nUnable to convert with dateutils. Trying with pytz method.\n")
 
             # method 2: pytz + localize (previous to PEP 495)
-
             # retrieves pytz object through 'tzlocal.get_localzone()' method. Obs.: might not be able to correctly identify the timezone used by the OS
-            local_tzinfo = get_localzone()
-
-            # turns the date_naive object aware to the timezone in 'local_tzinfo' through pytz.localize(...)
-            date = local_tzinfo.localize(date_naive)
-            return date
+            from tzlocal import get_localzone
+            return get_localzone()
 
         except:
             print("\nUnable to convert with with pytz method. Trying with datetime method\n")
@@ -64,15 +86,50 @@ def date_localtz(date_naive:str):
                 # computes the datetime from current time and retrieves its timezone info
                     # obs.: this dont work: date = datetime.datetime.now(); date.astimezone().tzinfo 
                     #       it seems that when a datetime.datetime.now() is assigned to a variable, it is assigned as naive date
-                        
-                local_tzinfo = datetime.datetime.now().astimezone().tzinfo
-                # replace the naive_object tzinfo by local_tzinfo
-                date = date_naive.replace(tzinfo=local_tzinfo)
-                return date
+                return datetime.datetime.now().astimezone().tzinfo
             except:
-                # no method worked, return original date
+                # no method worked
                 print("\nUnable to convert include timezone. Returning the original date.\n")
-                return date_naive
+                return None
+
+
+def local_timezone():
+    """ Returns the user's local timezone (see 'resolve_local_timezone'). Resolved on the first call only; later calls return the same object"""
+    global local_tzinfo
+    if local_tzinfo is None:
+        local_tzinfo = resolve_local_timezone()
+    return local_tzinfo
+
+
+def refresh_local_timezone():
+    """ Resolves the user's local timezone again, e.g., in a long-running process after the system timezone changed. Returns the new timezone"""
+    global local_tzinfo
+
+    # obs.: the 'time' module only reads the system timezone again after 'time.tzset()' (not available on Windows)
+    import time
+    if hasattr(time, "tzset"):
+        time.tzset()
+    local_tzinfo = resolve_local_timezone()
+    return local_tzinfo
+
+
+def date_localtz(date_naive:str):
+    """ Assigns the user's system local timezone to a naive datetime object
+
+    Args: date_naive (datetime): a datetime object without tzinfo
+    
+    Returns: date (datetime): If successful, aware datetime object with tzinfo = user's system local time; returns back 'date_naive' 
+    """
+    local_tz = local_timezone()
+    if local_tz is None:
+        return date_naive
+
+    # timezones of 'pytz' are assigned with 'localize' (previous to PEP 495)
+    if hasattr(local_tz, "localize"):
+        return local_tz.localize(date_naive)
+    return date_naive.replace(tzinfo=local_tz)
+
+#\SECTION
 
 
 def date_diff_absolute(dt1, dt2):
@@ -88,6 +145,20 @@ def date_diff_absolute(dt1, dt2):
     return tdelta
 
 
+def date_to_epoch(date):
+    """ Converts an aware datetime object to seconds since the epoch (UTC). Returns None if 'date' is None"""
+    if date is None:
+        return None
+    return date.timestamp()
+
+
+def epoch_to_date(epoch):
+    """ Converts seconds since the epoch (UTC) to an aware datetime object in the user's local timezone. Returns None if 'epoch' is None"""
+    if epoch is None:
+        return None
+    return datetime.datetime.fromtimestamp(epoch, tz=local_timezone() or UTC)
+
+
 #=====================================================================================
 #SECTION Working on
 #=====================================================================================
@@ -123,6 +194,7 @@ def abbreviate_tz(tz_name, max_len = 10, desired_len = 5):
 #SECTION DEPRECATED
 #=====================================================================================
 def valid_day(day, min_day = 1, max_day= 31):
+    from myNumbers import str_is_integer
     if str_is_integer(day,False,False):
         day = int(day)
         if day >= min_day and day <= max_day:
@@ -130,6 +202,7 @@ def valid_day(day, min_day = 1, max_day= 31):
     return False
 
 def valid_month(month, min_month = 1, max_month= 12):
+    from myNumbers import str_is_integer
     if str_is_integer(month,False,False):
         month = int(month)
         if month >= min_month and month <= max_month:
@@ -138,6 +211,7 @@ def valid_month(month, min_month = 1, max_month= 12):
 
 
 def valid_year(year, min_year = 0, max_year= 99999):
+    from myNumbers import str_is_integer
     if str_is_integer(year,False,False):
         year = int(year)
         if year >= min_year and year <= max_year:
@@ -33,3 +33,12 @@ class TimeConversionError(Exception):
 
 
 
+
+class LockTimeoutError(Exception):
+    """Error denoting a lock file could not be acquired in time (e.g., held by another process)"""
+    def __init__(self, message):
+        self.message = message 
+
+    def __str__(self):
+        if self.message:
+            return f"LockTimeoutError:{self.message}"
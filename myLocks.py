@@ -0,0 +1,83 @@
+# Moises Shalimay Andrade
+# Auxiliary module with advisory file locks, to serialize processes working on the same files
+
+import os
+import time
+from importlib import import_module
+
+from myErrors import LockTimeoutError
+
+try:
+    fcntl = import_module("fcntl")
+except ImportError:
+    # obs.: 'fcntl' is only available on Unix; elsewhere the locks do nothing
+    fcntl = None
+
+#=======================================================================
+#SECTION File locks
+#=======================================================================
+
+class FileLock(object):
+    """ Advisory lock ('flock') on a lock file, used as a context manager. Processes taking the lock on the same file are serialized:
+    an exclusive lock waits for all other locks to be released; shared locks only wait for exclusive ones.
+    Obs.: advisory means only processes using the lock are serialized; the lock file itself holds no data.
+
+    Attributes:
+     - filename (str): path of the lock file. Created if it does not exist.
+     - exclusive (bool): exclusive (writers) or shared (readers) lock
+     - timeout (float|None): seconds to wait for the lock before raising 'LockTimeoutError'. None waits forever.
+     - file (file object|None): the open lock file while the lock is held
+
+    Examples:
+        with FileLock(".app.lock", exclusive=True, timeout=30):
+            data = load(); save(modify(data))
+    """
+
+    # seconds between two tries to take a lock held by another process (doubling up to the maximum)
+    min_poll, max_poll = 0.0005, 0.01
+
+    def __init__(self, filename, exclusive=True, timeout=None):
+        self.filename = filename
+        self.exclusive = exclusive
+        self.timeout = timeout
+        self.file = None
+
+    def acquire(self):
+        """ Takes the lock, waiting for other processes to release it. Raises 'LockTimeoutError' after 'self.timeout' seconds"""
+        self.file = open(self.filename, 'a')
+        if fcntl is None:
+            return
+
+        operation = fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH
+        if self.timeout is None:
+            fcntl.flock(self.file, operation)
+            return
+
+        deadline, poll = time.monotonic() + self.timeout, self.min_poll
+        while True:
+            try:
+                fcntl.flock(self.file, operation | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    self.file.close()
+                    self.file = None
+                    raise LockTimeoutError(f"could not lock {os.path.abspath(self.filename)} within {self.timeout} seconds")
+                time.sleep(poll)
+                poll = min(poll * 2, self.max_poll)
+
+    def release(self):
+        """ Releases the lock (closing the lock file releases it)"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+#\SECTION
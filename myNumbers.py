@@ -28,7 +28,7 @@ def str_is_integer(astring:str, consider_floats = True, consider_fractions = Tru
         str_is_integer('2.5', consider_floats=True|False) -> False
     """
 
-    if not all(consider_floats, consider_fractions):
+    if not all((consider_floats, consider_fractions)):
         try: 
             int(astring)
             return True
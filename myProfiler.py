@@ -0,0 +1,134 @@
+# Moises Shalimay Andrade
+# Auxiliary module to measure the wall time, calls and memory allocated by the phases of a program
+
+import time
+
+#=======================================================================
+#SECTION Phase profiler
+#=======================================================================
+
+class NoPhase(object):
+    """ Context manager doing nothing. Returned by a disabled 'Profiler', so instrumented code costs one call when not profiled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+no_phase = NoPhase()
+
+
+class Phase(object):
+    """ Context manager measuring one run of a phase of a 'Profiler'. See 'Profiler.phase'"""
+    __slots__ = ("profiler", "name", "start", "start_bytes", "peak_bytes")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.enter(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.exit(self)
+        return False
+
+
+class Profiler(object):
+    """ Records the wall time, number of calls and memory allocated ('tracemalloc') by named phases of a program.
+
+    Phases are marked with 'with profiler.phase(name): ...' and may be nested (the time and memory of a phase include its inner phases).
+    A disabled profiler returns a shared context manager doing nothing, so instrumented code costs close to nothing when not profiled.
+
+    Attributes:
+     - enabled (bool): measure the phases? Set by 'start' and 'stop'.
+     - trace_memory (bool): measure allocated memory with 'tracemalloc'? Tracing slows python down, so times are higher when set.
+     - phases (dict): for each phase, in order of first run: {'calls': int, 'seconds': float, 'allocated_bytes': int, 'peak_bytes': int}, where
+                      'allocated_bytes' is the memory still allocated at the end of the runs (summed) and 'peak_bytes' the highest memory in use
+                      during a run, above the memory in use at its start.
+
+    Examples:
+        profiler = Profiler(); profiler.start()
+        with profiler.phase("load"): data = load()
+        profiler.stop(); print(profiler.summary())
+    """
+
+    def __init__(self, trace_memory=True):
+        self.enabled = False
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.stack = []
+        self.started_tracing = False
+
+    def start(self):
+        """ Enables the profiler (and starts 'tracemalloc' if 'trace_memory' and not tracing yet)"""
+        if self.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+        self.enabled = True
+
+    def stop(self):
+        """ Disables the profiler (and stops 'tracemalloc' if started by it). The measures are kept in 'self.phases'"""
+        self.enabled = False
+        if self.started_tracing:
+            import tracemalloc
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def phase(self, name):
+        """ Returns a context manager measuring the code it runs as phase 'name'"""
+        if not self.enabled:
+            return no_phase
+        return Phase(self, name)
+
+    def enter(self, phase):
+        """ Starts measuring a run of a phase (called by 'Phase.__enter__')"""
+        self.phases.setdefault(phase.name, {"calls": 0, "seconds": 0.0, "allocated_bytes": 0, "peak_bytes": 0})
+        if self.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak of the enclosing phase so far is saved before resetting it for the inner phase
+            if self.stack:
+                self.stack[-1].peak_bytes = max(self.stack[-1].peak_bytes, peak)
+            tracemalloc.reset_peak()
+            phase.start_bytes, phase.peak_bytes = current, current
+        self.stack.append(phase)
+        phase.start = time.perf_counter()
+
+    def exit(self, phase):
+        """ Records a run of a phase (called by 'Phase.__exit__')"""
+        seconds = time.perf_counter() - phase.start
+        self.stack.pop()
+        stats = self.phases[phase.name]
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+
+        if self.trace_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            phase.peak_bytes = max(phase.peak_bytes, peak)
+            stats["allocated_bytes"] += current - phase.start_bytes
+            stats["peak_bytes"] = max(stats["peak_bytes"], phase.peak_bytes - phase.start_bytes)
+            if self.stack:
+                self.stack[-1].peak_bytes = max(self.stack[-1].peak_bytes, phase.peak_bytes)
+
+    def summary(self):
+        """ Returns the measures of the phases as a table to print"""
+        lines = [f"{'Phase':<30} {'Calls':>7} {'Time (ms)':>12} {'Allocated (kB)':>15} {'Peak (kB)':>12}"]
+        lines.append("-" * len(lines[0]))
+        for name, stats in self.phases.items():
+            memory = f"{stats['allocated_bytes']/1024:>15.1f} {stats['peak_bytes']/1024:>12.1f}" if self.trace_memory else f"{'-':>15} {'-':>12}"
+            lines.append(f"{name:<30} {stats['calls']:>7} {stats['seconds']*1000:>12.3f} {memory}")
+        return "\n" + "\n".join(lines) + "\n"
+
+    def to_json(self):
+        """ Returns the measures of the phases as a JSON string"""
+        import json
+        return json.dumps({"trace_memory": self.trace_memory, "phases": self.phases}, indent=2)
+
+#\SECTION
@@ -0,0 +1,70 @@
+# Moises Shalimay Andrade
+# Auxiliary module to stream records (dicts) from and to CSV and JSON Lines files
+
+import csv
+import json
+
+#=======================================================================
+#SECTION Streaming readers and writers
+#=======================================================================
+
+def file_format(filename):
+    """ Returns the format of a records file by its extension: 'csv' for '.csv' files, 'jsonl' (one JSON object per line) for any other"""
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+
+def read_records(filename):
+    """ Yields the records of a CSV (with a header line) or JSON Lines file, one at a time, so memory does not grow with the file.
+    Empty CSV cells are left out of the records. Empty lines are skipped.
+
+    Yields:
+        (int): the line number of the record in the file
+        (dict|None): the record, or None if the line is not a valid record (e.g., not a JSON object)
+
+    Examples:
+        for line_number, record in read_records("tasks.csv"): print(line_number, record)  -> 2 {'name': 'walk dog', 'priority': '2'}
+    """
+    with open(filename, newline="", encoding="utf-8") as file:
+        if file_format(filename) == "csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, {field: value for field, value in record.items() if value not in ("", None) and field is not None}
+        else:
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield line_number, record if isinstance(record, dict) else None
+
+
+def write_records(filename, records, fields):
+    """ Writes records to a CSV (with a header line) or JSON Lines file as they are generated, so memory does not grow with the file.
+    Missing values (None) are written as empty CSV cells or JSON nulls.
+
+    Args:
+        filename (str): the file, replaced if it exists; the format is given by the extension (see 'file_format')
+        records (iterable): the records (dicts)
+        fields (list): the fields of the records, in the order to write them
+
+    Returns: n_records (int): the number of records written
+    """
+    n_records = 0
+    with open(filename, "w", newline="", encoding="utf-8") as file:
+        if file_format(filename) == "csv":
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            for record in records:
+                writer.writerow([record.get(field) for field in fields])
+                n_records += 1
+        else:
+            encode = json.JSONEncoder(ensure_ascii=False).encode
+            for record in records:
+                file.write(encode({field: record.get(field) for field in fields}))
+                file.write("\n")
+                n_records += 1
+    return n_records
+
+#\SECTION
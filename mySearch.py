@@ -0,0 +1,199 @@
+# Moises Shalimay Andrade
+# Auxiliary module with data structures to search strings
+
+import re
+from collections import deque
+
+#=======================================================================
+#SECTION Inverted index
+#=======================================================================
+
+class NgramIndex(object):
+    """ Inverted index of the n-grams (substrings of length n) of texts identified by keys, for substring search.
+
+    A text containing a term also contains all the n-grams of the term, so the keys posted under all of them are the only candidates to contain it.
+    Candidates are then checked with the 'in' operator, so results are the same as a full scan with 'term in text'.
+
+    Attributes:
+     - n (int): length of the n-grams
+     - postings (dict): for each n-gram, the set of keys of the texts containing it. Texts shorter than 'n' are posted under the whole text.
+
+    Examples:
+        index = NgramIndex(3); index.add(1, "walk dog"); index.add(2, "buy eggs")
+        index.search(["dog", "egg"], {1: "walk dog", 2: "buy eggs"}.get) -> {1, 2}
+    """
+
+    def __init__(self, n=3):
+        self.n = n
+        self.postings = {}
+
+    def grams(self, text):
+        """ Returns the set of n-grams of a text (the text itself if shorter than 'n')"""
+        if len(text) < self.n:
+            return {text}
+        return {text[i:i+self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, key, text):
+        """ Posts 'key' under each n-gram of 'text'"""
+        for gram in self.grams(text):
+            self.postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key, text):
+        """ Removes 'key' from the postings of each n-gram of 'text' (the text 'key' was added with)"""
+        for gram in self.grams(text):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+
+    def candidates(self, term):
+        """ Returns the set of keys whose text may contain 'term' (a superset of the keys whose text contains it)"""
+
+        # a term of length >= n: intersection of the postings of its n-grams, starting by the smallest
+        if len(term) >= self.n:
+            postings = sorted((self.postings.get(gram, set()) for gram in self.grams(term)), key=len)
+            return set(postings[0]).intersection(*postings[1:])
+
+        # a shorter term is inside some n-gram of the text (or is inside the text itself, if shorter than 'n'):
+        # union of the postings of the n-grams containing the term. Obs.: scans the n-grams, not the texts.
+        return set().union(*(keys for gram, keys in self.postings.items() if term in gram))
+
+    def search(self, terms, get_text, match=None):
+        """ Returns the set of keys whose text contains any of the terms. The candidates of all the terms are gathered first, 
+        so each text is checked once, whatever the number of terms.
+
+        Args:
+            terms (list): the search terms
+            get_text (callable): returns the text of a key
+            match (callable, optional): tells if a text contains any of the terms (e.g., 'QueryMatcher(terms).match'). Defaults to the 'in' operator on each term.
+        """
+        if match is None:
+            match = lambda text: any(term in text for term in terms)
+        candidates = set().union(*(self.candidates(term) for term in terms))
+        return {key for key in candidates if match(get_text(key))}
+
+#\SECTION
+
+#=======================================================================
+#SECTION Multi-pattern matchers
+#=======================================================================
+
+class AhoCorasick(object):
+    """ Aho-Corasick automaton of a set of strings: tells if a text contains any of them in a single pass over the text's characters, 
+    whatever the number of strings.
+
+    The automaton is a trie of the strings whose states also move on the characters that leave the trie (through the failure links,
+    resolved once when it is built), so a text is read with one dict lookup per character and no backtracking.
+
+    Attributes:
+     - transitions (list): for each state, a dict of the next state by character. Characters not in it go back to the start (state 0).
+     - accepting (list): for each state, True if the characters read so far end with one of the strings
+
+    Examples:
+        automaton = AhoCorasick(["dog", "eggs"])
+        automaton.match("walk dog") -> True; automaton.match("buy milk") -> False
+    """
+
+    def __init__(self, strings):
+        # trie of the strings
+        trie, self.accepting = [{}], [False]
+        for string in strings:
+            state = 0
+            for character in string:
+                if character not in trie[state]:
+                    trie.append({})
+                    self.accepting.append(False)
+                    trie[state][character] = len(trie) - 1
+                state = trie[state][character]
+            self.accepting[state] = True
+
+        # breadth-first: the failure state of each state (the longest proper suffix of its string in the trie) is resolved before it, 
+        # so its transitions are the failure state's updated with its own
+        self.transitions = [dict(trie[0])] + [None] * (len(trie) - 1)
+        queue = deque((state, 0) for state in trie[0].values())
+        while queue:
+            state, failure = queue.popleft()
+            self.accepting[state] = self.accepting[state] or self.accepting[failure]
+            self.transitions[state] = {**self.transitions[failure], **trie[state]}
+            for character, next_state in trie[state].items():
+                queue.append((next_state, self.transitions[failure].get(character, 0)))
+
+    def match(self, text):
+        """ Returns True if the text contains any of the strings"""
+        transitions, accepting = self.transitions, self.accepting
+        if accepting[0]:
+            return True
+        state = 0
+        for character in text:
+            state = transitions[state].get(character, 0)
+            if accepting[state]:
+                return True
+        return False
+
+
+# backreferences in a regular expression: '\1' to '\99' or '(?P=name)'
+backreference = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class QueryMatcher(object):
+    """ Search terms compiled into one matcher, which tells if a text contains any of the terms (or, with 'regex', matches any of them) 
+    by testing the text once, instead of once per term.
+
+    Literal terms are compiled into a single regular expression of alternatives (the 're' module runs it in C; fastest for a few terms), 
+    or, from 'automaton_min_terms' terms on, into an Aho-Corasick automaton (one step per character of the text, whatever the number of terms).
+    Regular expressions are combined into one alternation, compiled once (except those that cannot be combined, e.g., with backreferences).
+
+    Attributes:
+     - terms (list): the search terms
+     - ignore_case (bool): match regardless of case (literals and texts are compared case-folded, 'str.casefold', so 'STRASSE' matches 'straße'; 
+       regular expressions use 're.IGNORECASE')
+     - regex (bool): the terms are regular expressions, searched anywhere in the texts
+     - literal (bool): the terms are literals compared with their case, so the texts containing them are also found by an 'NgramIndex'
+     - match (callable): returns a true value if a text matches
+     - automaton_min_terms (int): number of literal terms from which the automaton is used
+
+    Raises: ValueError: if a term is not a valid regular expression (with 'regex')
+
+    Examples:
+        QueryMatcher(["dog", "egg"]).match("walk dog") -> True (a match object)
+        QueryMatcher(["DOG"], ignore_case=True).match("walk dog") -> True; QueryMatcher([r"^walk\b"], regex=True).match("walk dog") -> True
+    """
+
+    automaton_min_terms = 32
+
+    def __init__(self, terms, ignore_case=False, regex=False):
+        self.terms = list(terms)
+        self.ignore_case = ignore_case
+        self.regex = regex
+        self.literal = not ignore_case and not regex
+
+        # literals (case-folded, as the texts, to ignore case: faster than 're.IGNORECASE', ~3x for 10 terms, and folds e.g. 'ß' into 'ss')
+        if not regex:
+            strings = [term.casefold() for term in self.terms] if ignore_case else self.terms
+            if len(strings) >= self.automaton_min_terms:
+                search = AhoCorasick(strings).match
+            else:
+                search = re.compile("|".join(map(re.escape, strings))).search
+            self.match = (lambda text: search(text.casefold())) if ignore_case else search
+            return
+
+        flags = re.IGNORECASE if ignore_case else 0
+        patterns = []
+        for term in self.terms:
+            try:
+                patterns.append(re.compile(term, flags))
+            except re.error as error:
+                raise ValueError(f"\nPlease input valid regular expressions with --regex. '{term}': {error}\n")
+
+        # obs.: the groups of the terms are numbered along the alternation, so terms with backreferences (or global flags such as '(?i)', 
+        # only valid at the start of an expression) cannot be combined: they are searched one at a time
+        combined = None
+        if not any(backreference.search(term) for term in self.terms):
+            try:
+                combined = re.compile("|".join(f"(?:{term})" for term in self.terms), flags)
+            except re.error:
+                pass
+        self.match = combined.search if combined is not None else lambda text: any(pattern.search(text) for pattern in patterns)
+
+#\SECTION
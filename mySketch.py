@@ -0,0 +1,89 @@
+# Moises Shalimay Andrade
+# Auxiliary module with a streaming quantile sketch: approximate quantiles of a stream of numbers in bounded memory, with removals
+
+import math
+
+#=======================================================================
+#SECTION quantile sketch
+#=======================================================================
+
+class QuantileSketch(object):
+    """ Streaming quantile sketch of non-negative numbers with a relative accuracy guarantee (a log-bucketed histogram, as in DDSketch).
+
+    Values are counted in buckets whose bounds grow geometrically: bucket i holds the values in (gamma**(i-1), gamma**i].
+    Any quantile is returned within 'accuracy' relative error of the exact one, whatever the number of values. Memory grows with the log
+    of the range of the values, not with their number: ~1,100 buckets span 1 second to 100 years at 1% accuracy.
+    Unlike sampling sketches, a value can be removed exactly as it was added (e.g., when a completed task is deleted).
+
+    Attributes:
+     - accuracy (float): relative accuracy of the quantiles
+     - gamma (float): ratio between the bounds of consecutive buckets, (1 + accuracy) / (1 - accuracy)
+     - buckets (dict): number of values by bucket index. Empty buckets are dropped.
+     - zeros (int): number of values below 'min_value', counted as 0
+     - count (int): number of values
+     - total (int|float): sum of the values (for the mean)
+     - min_value (float): smallest value told apart from 0
+
+    Examples:
+        sketch = QuantileSketch()
+        for value in [10, 20, 30, 40, 1000]: sketch.add(value)
+        sketch.quantile(0.5) -> 29.9 (30 within 1%); sketch.mean() -> 220.0
+    """
+
+    min_value = 1.0
+
+    def __init__(self, accuracy=0.01):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0
+
+    def index(self, value):
+        """ Returns the index of the bucket of a value (at least 'min_value')"""
+        return math.ceil(math.log(value, self.gamma))
+
+    def add(self, value, n=1):
+        """ Counts a value 'n' times (a negative 'n' removes it; see 'self.remove')"""
+        if value < self.min_value:
+            self.zeros += n
+        else:
+            key = self.index(value)
+            bucket = self.buckets.get(key, 0) + n
+            if bucket:
+                self.buckets[key] = bucket
+            else:
+                del self.buckets[key]
+        self.count += n
+        self.total += value * n
+
+    def remove(self, value):
+        """ Removes a value added before. Obs.: removing a value never added leaves the sketch inconsistent"""
+        self.add(value, -1)
+
+    def quantile(self, q):
+        """ Returns the q-quantile (0 <= q <= 1) of the values, within 'self.accuracy' relative error, or None if there are no values.
+        Runs in time proportional to the number of buckets, not of values."""
+        if self.count <= 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # the estimate with the lowest relative error to any value in the bucket
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma**max(self.buckets) / (self.gamma + 1)
+
+    def mean(self):
+        """ Returns the exact mean of the values, or None if there are no values"""
+        return self.total / self.count if self.count > 0 else None
+
+    def __eq__(self, other):
+        return isinstance(other, QuantileSketch) and vars(self) == vars(other)
+
+#\SECTION
@@ -0,0 +1,755 @@
+import os
+import pickle
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import myDates
+import TaskManager
+from TaskManager import Tasks, open_tasks
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    """ Runs every test in an empty directory, so the app's files do not touch the repository ones"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_journal_replay():
+    tasks = Tasks()
+    tasks.add("walk dog", 2, "12/01/2032")
+    tasks.add("buy eggs")
+    tasks.done(1)
+    tasks.add("study finals")
+    tasks.delete(3)
+
+    # mutations are journaled; no snapshot was written
+    assert not os.path.isfile(Tasks.filename)
+    assert os.path.isfile(Tasks.journal_filename)
+
+    tasks = Tasks()
+    assert list(tasks.tasks_ID) == [1, 2]
+    assert tasks.get_task(1).completed_dt is not None
+    assert tasks.get_task(1).priority == 2
+    assert tasks.max_ID == 2
+
+
+def test_journal_compaction(monkeypatch):
+    monkeypatch.setattr(Tasks, "journal_max_bytes", 1)
+    tasks = Tasks()
+    tasks.add("walk dog")
+    tasks.add("buy eggs")
+
+    # passing the threshold folds the journal into a fresh snapshot
+    assert os.path.isfile(Tasks.filename)
+    assert not os.path.isfile(Tasks.journal_filename)
+    assert list(Tasks().tasks_ID) == [1, 2]
+
+
+def test_journal_torn_write():
+    tasks = Tasks()
+    tasks.add("walk dog")
+    with open(Tasks.journal_filename, 'ab') as file:
+        file.write(pickle.dumps(("delete", 1))[:-3])
+
+    tasks = Tasks()
+    assert list(tasks.tasks_ID) == [1]
+    tasks.add("buy eggs")
+    assert list(Tasks().tasks_ID) == [1, 2]
+
+
+def test_stale_journal_ignored():
+    tasks = Tasks()
+    tasks.add("walk dog")
+    stale_journal = open(Tasks.journal_filename, 'rb').read()
+    tasks.pickle_tasks()
+
+    # a journal of a previous generation is not replayed over the new snapshot
+    with open(Tasks.journal_filename, 'wb') as file:
+        file.write(stale_journal)
+    assert list(Tasks().tasks_ID) == [1]
+
+
+def test_sqlite_backend_migration(monkeypatch):
+    tasks = Tasks()
+    tasks.add("walk dog", 1, "12/01/2032")
+    tasks.add("buy eggs", 3)
+    tasks.done(1)
+
+    monkeypatch.setattr(Tasks, "backend", "sqlite")
+    tasks = open_tasks()
+    assert os.path.isfile(Tasks.sqlite_filename)
+    assert [task.name for task in tasks.select_tasks()] == ["walk dog", "buy eggs"]
+    assert [task.name for task in tasks.select_tasks(open_only=True)] == ["buy eggs"]
+
+    tasks.add("make eggs", 2)
+    msg, worked = tasks.query_tasks(["eggs"], sort_list=True)
+    assert worked and msg.index("buy eggs") < msg.index("make eggs")
+
+    # the migration happens only once; later changes are kept in the database
+    assert open_tasks().max_ID == 3
+
+
+def test_ID_index():
+    tasks = Tasks()
+    for name in ["walk dog", "buy eggs", "make eggs", "study finals"]:
+        tasks.add(name)
+
+    tasks.delete(1)
+    tasks.delete(2)
+    assert (tasks.min_ID, tasks.max_ID) == (3, 4)
+    assert tasks.valid_ID(2)[0] is False
+    assert tasks.get_task(4).name == "study finals"
+
+    tasks = Tasks()
+    assert (tasks.min_ID, tasks.max_ID) == (3, 4)
+    tasks.reset_IDs()
+    assert list(tasks.tasks_ID) == [1, 2]
+    assert [task.task_ID for task in tasks.tasks.values()] == [1, 2]
+    assert (tasks.min_ID, tasks.max_ID) == (1, 2)
+
+
+def test_legacy_pickle(store_dir):
+    # files written by previous versions of the app hold lists of tasks and IDs
+    legacy_store = os.path.join(os.path.dirname(__file__), ".todo.pickle")
+    with open(legacy_store, 'rb') as file, open(Tasks.filename, 'wb') as copy:
+        copy.write(file.read())
+
+    tasks = Tasks()
+    assert tasks.tasks[1].name == "workout"
+    assert (tasks.min_ID, tasks.max_ID) == (1, 1)
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_binary_snapshot(monkeypatch, compression):
+    import TaskManagerStore
+    monkeypatch.setattr(Tasks, "snapshot_compression", compression)
+    tasks = Tasks()
+    for name, priority, due in [("walk dog", 2, "12/01/2032"), ("buy eggs", 3, None), ("café ☕", 1, "01/15/2030"), ("go", 1, None)]:
+        tasks.add(name, priority, due)
+    tasks.done(2)
+    tasks.pickle_tasks()
+
+    def loaded():
+        tasks = Tasks()
+        return ([(task.task_ID, task.name, task.priority, task.created_ts, task.due_ts, task.slot) for task in tasks.tasks.values()], 
+                tasks.open_order, tasks.query_index.postings, list(tasks.created_epochs), tasks.max_ID)
+
+    with open(Tasks.filename, 'rb') as file:
+        assert TaskManagerStore.is_binary_snapshot(file)
+    binary = loaded()
+
+    # the same data as a pickled snapshot; the converter switches formats
+    assert TaskManagerStore.convert("pickle")[1]
+    with open(Tasks.filename, 'rb') as file:
+        assert not TaskManagerStore.is_binary_snapshot(file)
+    assert loaded() == binary
+    assert TaskManagerStore.convert("binary", compression)[1]
+    assert loaded() == binary
+    assert Tasks().query_tasks(["café"])[1]
+
+
+@pytest.mark.parametrize("filename", ["tasks.csv", "tasks.jsonl"])
+def test_import_export(filename):
+    tasks = Tasks()
+    tasks.add("walk dog", 2, "12/01/2032")
+    tasks.add("buy eggs, milk", 3)
+    tasks.add("study finals", 1, "01/15/2030")
+    tasks.done(2)
+    assert tasks.export_tasks(filename) == (f"\nExported 3 tasks to {filename}\n", True)
+    exported = [tasks.task_to_record(task) for task in tasks.sorted_tasks()]
+    assert [record["id"] for record in exported] == [3, 1, 2]
+
+    # imported into a list with one task: new IDs after it, same dates and completion
+    os.remove(Tasks.journal_filename)
+    tasks = Tasks()
+    tasks.add("call mom")
+    msg, worked = tasks.import_tasks(filename)
+    assert worked and "IDs 2 to 4" in msg
+    tasks = Tasks()
+    assert [{**tasks.task_to_record(task), "id": None} for task in tasks.sorted_tasks() if task.task_ID > 1] == [{**record, "id": None} for record in exported]
+    assert tasks.get_task(4).completed_dt is not None and 4 not in tasks.tasks
+
+
+@pytest.mark.parametrize("backend", ["pickle", "sqlite"])
+def test_import_large(monkeypatch, backend):
+    # more tasks than fit in 'journal_max_bytes', applied in several chunks
+    monkeypatch.setattr(Tasks, "backend", backend)
+    monkeypatch.setattr(Tasks, "journal_max_bytes", 64 * 100)
+    monkeypatch.setattr(Tasks, "import_chunk_size", 30)
+    with open("tasks.jsonl", "w") as file:
+        file.writelines(f'{{"name": "task {index}", "priority": {index % 3 + 1}}}\n' for index in range(250))
+
+    tasks = open_tasks()
+    tasks.add("walk dog")
+    msg, worked = tasks.import_tasks("tasks.jsonl")
+    assert worked and "Imported 250 tasks (IDs 2 to 251)" in msg
+
+    tasks = open_tasks()
+    assert tasks.max_ID == 251 and tasks.get_task(251).name == "task 249"
+    assert tasks.statistics.open == 251
+
+
+def test_import_invalid_records():
+    with open("tasks.jsonl", "w") as file:
+        file.write('{"name": "walk dog", "priority": 2}\nnot json\n{"name": "x", "priority": 5}\n{"name": "y", "due": "31/12/2030"}\n'
+                   '{"priority": 1}\n{"name": "z", "created": "yesterday"}\n\n{"name": "buy eggs", "due": "12/01/2032"}\n')
+    msg, worked = Tasks().import_tasks("tasks.jsonl")
+    assert worked and "Imported 2 tasks (IDs 1 to 2)" in msg and "5 invalid records" in msg
+    assert [line.split(":")[0] for line in msg.splitlines() if line.startswith("Line")] == ["Line 2", "Line 3", "Line 4", "Line 5", "Line 6"]
+    assert Tasks().get_task(2).due_dt.strftime(Tasks.dt_format) == "12/01/2032"
+    assert Tasks().import_tasks("missing.csv")[1] is False
+
+    # priorities are whole numbers, or strings of one (as in CSV files); floats and booleans are not truncated
+    with open("priorities.jsonl", "w") as file:
+        file.write('{"name": "a", "priority": 2.7}\n{"name": "b", "priority": true}\n{"name": "c", "priority": "2.0"}\n'
+                   '{"name": "d", "priority": 2.0}\n{"name": "e", "priority": "3"}\n{"name": "f", "priority": 1}\n')
+    msg, worked = Tasks().import_tasks("priorities.jsonl")
+    assert "Imported 2 tasks (IDs 3 to 4)" in msg and "4 invalid records" in msg
+    assert [(task.name, task.priority) for task in Tasks().select_tasks(sort_list=False)][-2:] == [("e", 3), ("f", 1)]
+
+
+@pytest.mark.parametrize("backend", ["pickle", "sqlite"])
+def test_statistics(monkeypatch, backend):
+    monkeypatch.setattr(Tasks, "backend", backend)
+    with open("tasks.jsonl", "w") as file:
+        for days in range(1, 11):
+            file.write(f'{{"name": "old {days}", "created": "2022-01-01T00:00:00+00:00", "completed": "2022-01-{days + 1:02d}T00:00:00+00:00"}}\n')
+    tasks = open_tasks()
+    tasks.import_tasks("tasks.jsonl")
+    for task_ID in range(11, 31):
+        tasks.add(f"task {task_ID}", task_ID % 3 + 1, "01/01/2020" if task_ID % 4 else None)
+    for task_ID in [11, 12, 13]:
+        tasks.done(task_ID)
+    for task_ID in [1, 14, 20]:
+        tasks.delete(task_ID)
+
+    # kept up to date by each mutation, also after loading the store (the journal replayed over the snapshot)
+    for tasks in [tasks, open_tasks()]:
+        statistics = tasks.statistics
+        assert statistics == TaskManager.TaskStats(tasks.all_tasks())
+        assert statistics.open == 15 and statistics.completed == 12 and statistics.open_by_priority == {1: 6, 2: 5, 3: 4}
+        assert tasks.count_overdue() == 12
+        # completion times: 2 to 10 days, plus 3 completed now (0); the median (rank 5.5 of 12) within the accuracy of the sketch
+        assert statistics.completion_time.quantile(0.5) == pytest.approx(4 * 86400, rel=0.01)
+
+    msg, worked = tasks.report_stats(rebuild=True)
+    assert worked and "they match" in msg and "Overdue tasks" in msg
+
+    # statistics gone wrong are replaced and saved by a rebuild
+    tasks.statistics.completed += 1
+    assert tasks.rebuild_statistics()[1] is False
+    assert open_tasks().statistics == TaskManager.TaskStats(tasks.all_tasks())
+
+
+def test_statistics_legacy_snapshot():
+    tasks = Tasks()
+    tasks.add("walk dog", 2)
+    tasks.add("buy eggs")
+    tasks.done(1)
+    tasks.statistics = None
+    tasks.pickle_tasks()
+    with open(Tasks.filename, "rb") as file:
+        assert b"statistics" in file.read()
+
+    # snapshots without statistics compute them on first use, and keep them up to date from then on
+    tasks = Tasks()
+    tasks.statistics = None
+    tasks.add("call mom", 3)
+    assert tasks.load_statistics().open_by_priority == {1: 1, 3: 1}
+    tasks.delete(1)
+    assert tasks.statistics == TaskManager.TaskStats(tasks.all_tasks())
+
+
+def test_query_index():
+    tasks = Tasks()
+    for name in ["walk dog", "buy eggs", "make eggs", "go", "dog show"]:
+        tasks.add(name)
+    tasks.done(5)
+    tasks.delete(3)
+
+    def query(*terms):
+        return [task.name for task in Tasks().select_tasks(open_only=True, queries=list(terms))]
+
+    # same matches as a substring search, including terms shorter than the n-grams
+    assert query("dog", "egg") == ["walk dog", "buy eggs"]
+    assert query("g") == ["walk dog", "buy eggs", "go"]
+    assert query("go") == ["go"]
+    assert query("make") == []
+    assert query("k d") == ["walk dog"]
+
+
+@pytest.mark.parametrize("backend", ["pickle", "sqlite"])
+def test_query_matcher(monkeypatch, backend):
+    monkeypatch.setattr(Tasks, "backend", backend)
+    tasks = open_tasks()
+    for name in ["Walk Dog", "buy eggs", "make EGGS", "go", "dog show", "call mom"]:
+        tasks.add(name)
+    tasks.done(5)
+
+    def query(*terms, **options):
+        return [task.name for task in tasks.select_tasks(open_only=True, queries=list(terms), **options)]
+
+    assert query("dog", "egg") == ["buy eggs"]
+    assert query("dog", "egg", ignore_case=True) == ["Walk Dog", "buy eggs", "make EGGS"]
+    assert query("^(go|call)", "s$", regex=True) == ["buy eggs", "go", "call mom"]
+    assert query("^w.*DOG", regex=True, ignore_case=True) == ["Walk Dog"]
+    assert query("a.e", regex=True) == ["make EGGS"]
+    assert query("a.e") == []
+    assert [task.name for task in tasks.select_tasks(queries=["DOG"], archived=True, ignore_case=True)] == ["dog show"]
+
+    # many literal terms are matched by an automaton instead of a regular expression, with the same results
+    many = [f"term {index}" for index in range(50)]
+    assert query(*many, "Eggs") == []
+    assert query(*many, "Eggs", ignore_case=True) == ["buy eggs", "make EGGS"]
+    assert query(*many, "go") == ["go"]
+
+    # ignoring case folds the terms and names, beyond lower case
+    tasks.add("Straße fair")
+    assert query("STRASSE", ignore_case=True) == query("strasse", *many, ignore_case=True) == ["Straße fair"]
+    assert query("STRASSE") == []
+
+    msg, worked = tasks.query_tasks(["(dog"], regex=True)
+    assert not worked and "Please input valid regular expressions with --regex. '(dog'" in msg
+
+
+def test_open_order():
+    tasks = Tasks()
+    tasks.add("walk dog", 1, "12/01/2032")
+    tasks.add("buy eggs", 3)
+    tasks.add("make eggs", 2, "12/01/2032")
+    tasks.add("study finals", 1, "01/15/2030")
+    tasks.add("go to the beach", 2)
+    tasks.done(4)
+    tasks.delete(1)
+    tasks.add("call mom", 3, "12/01/2032")
+
+    def listed(tasks):
+        return [task.name for task in tasks.select_tasks(open_only=True)]
+
+    expected = ["call mom", "make eggs", "buy eggs", "go to the beach"]
+    assert listed(tasks) == expected
+    assert listed(Tasks()) == expected
+
+    # same order as a full sort of the unfinished tasks
+    sorted_tasks = tasks.sort_tasks(tasks.tasks.values())
+    assert expected == [task.name for task in sorted_tasks if task.completed_dt is None]
+
+    tasks.reset_IDs()
+    assert [task.task_ID for task in tasks.select_tasks(open_only=True)] == [5, 2, 1, 4]
+    assert listed(Tasks()) == expected
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_set_age(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(Tasks, "use_numpy", False)
+
+    tasks = Tasks()
+    tasks.add("walk dog")
+    tasks.add("buy eggs")
+    tasks.delete(1)
+    tasks.tasks[2].created_dt -= timedelta(days=3, hours=1)
+    tasks.build_created_epochs()
+
+    tasks.set_age()
+    assert tasks.tasks[2].age == "3d"
+    assert tasks.tasks[2].age == f"{myDates.date_diff_absolute(datetime.now(timezone.utc), tasks.tasks[2].created_dt).days}d"
+    # the age changes to 4d in 23 hours
+    assert tasks.age_expiry == pytest.approx(time.time() + 23 * 3600, abs=5)
+
+
+def test_output_cache(monkeypatch):
+    from myCache import FileCache
+    tasks = Tasks()
+    tasks.add("walk dog")
+    key = Tasks.output_cache_key({"list": True})
+    assert key is not None and Tasks.cached_output(key) is None
+    msg = tasks.list_tasks()
+    tasks.cache_output(key, [msg])
+    assert Tasks.cached_output(key) == [msg]
+
+    # any change of the tasks changes the key, even if the files keep their size and modification time; an expired output is a miss
+    def key_same_stat():
+        with monkeypatch.context() as patch:
+            patch.setattr(os, "stat", lambda path: os.stat_result((0,) * 10))
+            return Tasks.output_cache_key({"list": True})
+
+    keys = [key_same_stat()]
+    tasks.add("buy eggs")
+    assert Tasks.output_cache_key({"list": True}) != key
+    keys.append(key_same_stat())
+    tasks.pickle_tasks()
+    assert Tasks.output_cache_key({"list": True}) != key
+    keys.append(key_same_stat())
+    assert len(set(keys)) == 3
+    tasks.age_expiry = time.time() - 1
+    tasks.cache_output(key, [msg])
+    assert Tasks.cached_output(key) is None
+
+    # the least recently used outputs are evicted past the size bound
+    cache = FileCache("cache", 1000)
+    for i in range(5):
+        assert cache.put(f"key {i}", "x" * 300)
+        os.utime(cache.path(f"key {i}"), ns=(i * 10**9, i * 10**9))
+    cache.put("key 5", "x" * 300)
+    assert [cache.get(f"key {i}") is not None for i in range(6)] == [False, False, False, True, True, True]
+    assert cache.put("large", "x" * 2000) is False
+
+    monkeypatch.setattr(Tasks, "output_cache", False)
+    assert Tasks.output_cache_key({"list": True}) is None
+
+
+def test_compact_task():
+    tasks = Tasks()
+    tasks.add("walk dog", 2, "12/01/2032")
+    task = tasks.tasks[1]
+
+    assert not hasattr(task, "__dict__")
+    assert isinstance(task.created_ts, int) and isinstance(task.due_ts, int)
+    assert task.due_dt.strftime(Tasks.dt_format) == "12/01/2032"
+    assert task.due_dt.tzinfo is TaskManager.Task.tz_table[task.tz]
+
+    # all dates share one timezone object in the pickled file
+    tasks.add("buy eggs")
+    tasks.pickle_tasks()
+    tasks = Tasks()
+    assert tasks.tasks[1].tz == tasks.tasks[2].tz
+
+
+def test_column_store(monkeypatch):
+    def run_commands():
+        tasks = Tasks()
+        tasks.add("walk dog", 1, "12/01/2032")
+        tasks.add("buy eggs", 3)
+        tasks.add("make eggs", 2, "12/01/2032")
+        tasks.add("study finals", 1, "01/15/2030")
+        tasks.done(4)
+        tasks.delete(1)
+        tasks.add("call mom", 3, "12/01/2032")
+        return Tasks()
+
+    expected = [(task.task_ID, task.name, task.age) for task in run_commands().select_tasks()]
+    os.remove(Tasks.journal_filename)
+
+    monkeypatch.setattr(Tasks, "column_store", True)
+    tasks = run_commands()
+    assert isinstance(tasks.tasks, TaskManager.TaskColumns)
+    assert [(task.task_ID, task.name, task.age) for task in tasks.select_tasks()] == expected
+    # the ages set for all the tasks are not kept in the columns; listings still set them
+    tasks.set_age()
+    assert [(task.task_ID, task.name, task.age) for task in tasks.select_tasks()] == expected
+    assert tasks.get_task(4).completed_dt is not None
+    # the completed task 4 is in the archive
+    assert 1 not in tasks.tasks and len(tasks.tasks) == 3
+
+    tasks.reset_IDs()
+    assert list(tasks.tasks_ID) == [1, 2, 3, 4]
+    assert [task.name for task in tasks.select_tasks(open_only=True)] == ["call mom", "make eggs", "buy eggs"]
+
+    # the file can be loaded back as a dict of Task objects
+    monkeypatch.setattr(Tasks, "column_store", False)
+    assert [task.name for task in Tasks().select_tasks(open_only=True)] == ["call mom", "make eggs", "buy eggs"]
+
+
+@pytest.mark.parametrize("backend", ["pickle", "sqlite"])
+def test_select_page(monkeypatch, backend):
+    monkeypatch.setattr(Tasks, "backend", backend)
+    tasks = open_tasks()
+    for task_ID in range(1, 31):
+        tasks.add(f"task {task_ID}", task_ID % 3 + 1, f"12/{task_ID % 7 + 1:02d}/2032" if task_ID % 4 else None)
+    for task_ID in range(1, 31, 5):
+        tasks.done(task_ID)
+
+    def IDs(tasks_list):
+        return [task.task_ID for task in tasks_list]
+
+    # pages are slices of the full listing, whether selected from the open order, a heap or the database
+    for open_only, queries in [(True, None), (False, None), (True, ["task 1", "task 2"])]:
+        full = IDs(tasks.select_tasks(open_only=open_only, queries=queries))
+        page, remaining = tasks.select_page(open_only, queries, limit=4, offset=3)
+        assert IDs(page) == full[3:7]
+        assert remaining == len(full) - 7
+
+        # the cursor continues after the last task of a page
+        page, remaining = tasks.select_page(open_only, queries, limit=4, after=full[6])
+        assert IDs(page) == full[7:11]
+        assert remaining == max(len(full) - 11, 0)
+
+    # unsorted pages follow the ID order, even where the database scans an index in due date order
+    for open_only, queries in [(True, None), (True, ["task 1", "task 2"])]:
+        full = IDs(tasks.select_tasks(open_only=open_only, queries=queries, sort_list=False))
+        assert full == sorted(full)
+        page, _ = tasks.select_page(open_only, queries, limit=4, sort_list=False)
+        assert IDs(page) == full[:4]
+        page, _ = tasks.select_page(open_only, queries, limit=4, after=full[3], sort_list=False)
+        assert IDs(page) == full[4:8]
+
+    assert "Next page: --limit 4 --after" in tasks.list_tasks(limit=4)
+    assert "Next page" not in tasks.list_tasks()
+    assert "Please input a task task_ID between" in tasks.report_tasks(after=99)
+
+
+@pytest.mark.parametrize("backend", ["pickle", "sqlite"])
+def test_due_tasks(monkeypatch, backend):
+    monkeypatch.setattr(Tasks, "backend", backend)
+    tasks = open_tasks()
+    today = datetime.now()
+    for task_ID in range(1, 41):
+        due = (today + timedelta(days=task_ID % 10 - 5)).strftime("%m/%d/%Y") if task_ID % 6 else None
+        tasks.add(f"task {task_ID}", task_ID % 3 + 1, due)
+    tasks.done(3)
+
+    def IDs(tasks_list):
+        return [task.task_ID for task in tasks_list]
+
+    def day(days):
+        return (today + timedelta(days=days)).strftime("%m/%d/%Y")
+
+    # a range of due dates is the subsequence of '--list' with the due dates in it (ends included); no due date is after all dates
+    listing = tasks.select_tasks(open_only=True)
+    def expected(first=None, last=None):
+        return [task.task_ID for task in listing if (first is None or task.due_dt is None or task.due_dt.date() >= first.date()) and 
+                                                    (last is None or (task.due_dt is not None and task.due_dt.date() <= last.date()))]
+
+    for due_before, due_after, first, last in [(day(0), None, None, today), (None, day(2), today + timedelta(days=2), None),
+                                               (day(1), day(-2), today + timedelta(days=-2), today + timedelta(days=1)), (day(-3), day(3), None, None)]:
+        page, remaining = tasks.select_page(open_only=True, due_range=tasks.due_range(due_before, due_after)[0])
+        assert IDs(page) == (expected(first, last) if first or last else [])
+        assert remaining == 0
+
+    overdue, _ = tasks.select_page(open_only=True, due_range=tasks.due_range(overdue=True)[0])
+    assert IDs(overdue) == expected(last=today - timedelta(days=1)) and overdue and 3 not in IDs(overdue)
+
+    # pages and cursors stay within the range
+    full = expected(first=today)
+    page, remaining = tasks.select_page(open_only=True, limit=3, offset=2, due_range=tasks.due_range(due_after=day(0))[0])
+    assert IDs(page) == full[2:5] and remaining == len(full) - 5
+    page, remaining = tasks.select_page(open_only=True, limit=3, after=full[4], due_range=tasks.due_range(due_after=day(0))[0])
+    assert IDs(page) == full[5:8] and remaining == len(full) - 8
+
+    msg, worked = tasks.due_tasks(overdue=True, limit=2)
+    assert worked and "Next page: --limit 2 --after" in msg
+    assert tasks.due_tasks(due_before="31/31/2022") == ("\nFor 'due before' please input a date in the format mm/dd/yyyy. Examples: 12/31/2022, 1/1/2022\n", False)
+
+
+def test_date_cache(monkeypatch):
+    tasks = Tasks()
+    tasks.add("walk dog", 2, "12/01/2032")
+    tasks.add("buy eggs", 1, "12/01/2032")
+    tasks.done(1)
+
+    def printed(tasks):
+        return [(task.due_dt_str, task.created_dt_str, task.completed_dt_str) for task in tasks.all_tasks()]
+
+    expected = [(tasks.due_dt_to_str(task.due_dt), tasks.created_dt_to_str(task.created_dt), tasks.completed_dt_to_str(task.completed_dt))
+                for task in tasks.all_tasks()]
+    assert printed(tasks) == expected
+    assert expected[0][0] == "12/01/2032" and expected[1][2] == "-"
+
+    # a change of configuration is part of the cache key
+    monkeypatch.setattr(Tasks, "dt_format", "%d/%m/%Y")
+    monkeypatch.setattr(Tasks, "print_tz", False)
+    assert printed(tasks)[0][0] == "01/12/2032"
+    assert printed(tasks)[0][1] == tasks.get_task(1).created_dt.strftime("%a %b %d %H:%M:%S %Y")
+
+    # bypassing the cache gives the same strings
+    hits = TaskManager.format_timestamp.cache_info().hits
+    cached = printed(tasks)
+    assert TaskManager.format_timestamp.cache_info().hits > hits
+    monkeypatch.setattr(Tasks, "date_cache", False)
+    assert printed(tasks) == cached
+
+
+def test_date_cache_dst():
+    from zoneinfo import ZoneInfo
+    from dateutil.tz import tzstr
+
+    # days around the end of daylight saving time (01:00-02:00 happens twice), at 02:00 and at 02:07 EDT
+    for tzinfo in [ZoneInfo("America/New_York"), tzstr("EST5EDT,M3.2.0/2:07,M11.1.0/2:07")]:
+        tz = TaskManager.Task.tz_index(tzinfo)
+        transition = int(datetime(2022, 11, 6, 1, 30, tzinfo=tzinfo).timestamp()) + 1800
+        for ts in list(range(transition - 3600, transition + 3600, 61)) + list(range(transition - 2*86400, transition + 2*86400, 3607)):
+            expected = Tasks.format_date(datetime.fromtimestamp(ts, tzinfo), Tasks.dt_format, True, True)
+            assert TaskManager.format_timestamp(ts, tz, Tasks.dt_format, True, True) == expected
+
+
+def test_add_parsed_due_date():
+    tasks = Tasks()
+    assert tasks.add("walk dog", 1, " 12/01/2032 ")[1]
+    assert tasks.tasks[1].due_dt_str == "12/01/2032"
+    assert tasks.add("buy eggs", 1, "13/01/2032") == (
+        "\nFor 'due date' please input a date in the format mm/dd/yyyy. Examples: 12/31/2022, 12/1/2022, 01/1/2022, 1/1/2022\n", False)
+    assert list(tasks.tasks_ID) == [1]
+
+
+def test_profiler(monkeypatch):
+    from myProfiler import Profiler, no_phase
+    tasks = Tasks()
+    tasks.add("walk dog", 2, "12/01/2032")
+    tasks.add("buy eggs")
+
+    # disabled (default): instrumented code gets the shared no-op context manager and nothing is recorded
+    assert Tasks.profiler.phase("set_age") is no_phase
+    tasks.report_tasks()
+    assert Tasks.profiler.phases == {}
+
+    profiler = Profiler()
+    monkeypatch.setattr(Tasks, "profiler", profiler)
+    profiler.start()
+    with profiler.phase("total"):
+        tasks = Tasks()
+        tasks.report_tasks()
+        tasks.report_tasks()
+    profiler.stop()
+
+    assert list(profiler.phases)[0] == "total"
+    assert {"replay journal", "filter", "sort_tasks", "set_age", "tabulate_tasks (cells)", "tabulate"} <= set(profiler.phases)
+    assert profiler.phases["tabulate"]["calls"] == 2 and profiler.phases["total"]["calls"] == 1
+    # nested phases are included in the enclosing ones
+    assert profiler.phases["total"]["seconds"] >= profiler.phases["tabulate"]["seconds"]
+    assert profiler.phases["total"]["peak_bytes"] >= profiler.phases["tabulate"]["peak_bytes"] > 0
+    assert "tabulate" in profiler.summary() and '"set_age"' in profiler.to_json()
+
+
+def test_archive():
+    tasks = Tasks()
+    for name in ["walk dog", "buy eggs", "make eggs", "study finals"]:
+        tasks.add(name)
+    tasks.done(1)
+    tasks.done(3)
+    assert list(tasks.tasks) == [2, 4]
+    tasks.pickle_tasks()
+
+    # loading and listing the open tasks do not read the archive
+    tasks = Tasks()
+    tasks.list_tasks()
+    tasks.query_tasks(["eggs"])
+    assert tasks.archived_tasks is None and (tasks.min_ID, tasks.max_ID) == (1, 4)
+
+    # the report and archive queries do
+    assert [task.task_ID for task in tasks.select_tasks(sort_list=False)] == [1, 2, 3, 4]
+    assert [task.name for task in tasks.select_tasks(queries=["eggs"], archived=True)] == ["make eggs"]
+    assert "was completed in" in tasks.done(3)[0]
+
+    # deleting an archived task, and records appended to the archive after the last snapshot (e.g., before a crash) are ignored
+    tasks.delete(1)
+    tasks = Tasks()
+    assert tasks.tasks_ID == [2, 3, 4] and tasks.min_ID == 2
+    with open(Tasks.archive_filename, 'ab') as file:
+        file.write(pickle.dumps([("put", tasks.get_task(2))]))
+    assert Tasks().tasks_ID == [2, 3, 4]
+
+    # IDs are reset over both tiers
+    tasks.reset_IDs()
+    tasks = Tasks()
+    assert tasks.tasks_ID == [1, 2, 3] and list(tasks.tasks) == [1, 3]
+    assert tasks.get_task(2).name == "make eggs" and tasks.max_ID == 3
+
+
+def test_delete_min_ID_lazy_archive():
+    tasks = Tasks()
+    for name in ["walk dog", "buy eggs", "make eggs", "study finals"]:
+        tasks.add(name)
+    tasks.done(2)
+    tasks.done(4)
+    tasks.pickle_tasks()
+
+    # deleting the task with the lowest ID moves 'min_ID' to the next one, open or archived, without reading the archive
+    tasks = Tasks()
+    tasks.delete(1)
+    assert tasks.archived_tasks is None and tasks.min_ID == 2
+    tasks.delete(3)
+    assert tasks.archived_tasks is None and tasks.min_ID == 2
+    tasks.delete(2)
+    tasks.delete(4)
+    assert tasks.min_ID == 0 and Tasks().min_ID == 0
+
+
+def test_reset_IDs_single_write(monkeypatch):
+    tasks = Tasks()
+    for task_ID in range(1, 51):
+        tasks.add(f"task {task_ID}")
+    for task_ID in range(1, 51, 3):
+        tasks.delete(task_ID)
+    tasks.done(50)
+    tasks.pickle_tasks()
+
+    # files opened for writing by the reset: the version token, the renumbered archive and one snapshot, whatever the number of tasks
+    opened = []
+    def spy_open(file, mode='r', *args, **kwargs):
+        if mode != 'rb':
+            opened.append(file)
+        return open(file, mode, *args, **kwargs)
+    with monkeypatch.context() as patch:
+        patch.setattr(TaskManager, "open", spy_open, raising=False)
+        tasks.reset_IDs()
+    assert opened == [Tasks.version_filename, Tasks.archive_filename, Tasks.filename + ".tmp"]
+
+    # old IDs no task has now resolve to the new ones, after a restart too; current IDs win
+    tasks = Tasks()
+    assert tasks.tasks_ID == list(range(1, 34))
+    assert tasks.get_task(33).name == "task 50"
+    assert tasks.done(50)[0].startswith("\nTask 50 is now task 33 (IDs were reset)\n\nTask 33, 'task 50', was completed")
+    assert tasks.delete(48) == ("\nTask 48 is now task 32 (IDs were reset)\nDeleted task 32", True)
+    assert tasks.delete(2)[0] == "Deleted task 2" and tasks.get_task(1).name == "task 2"
+
+    # aliases expire
+    tasks.aliases = {old_ID: (new_ID, 0) for old_ID, (new_ID, expiry) in tasks.aliases.items()}
+    assert "Please input a task task_ID between" in tasks.delete(49)[0]
+
+
+def test_archive_compaction(monkeypatch):
+    monkeypatch.setattr(Tasks, "archive_max_dead_bytes", 100)
+    tasks = Tasks()
+    for task_ID in range(1, 201):
+        tasks.add(f"task {task_ID}")
+        tasks.done(task_ID)
+    tasks.pickle_tasks()
+    full_size = os.path.getsize(Tasks.archive_filename)
+    assert not tasks.archive_compaction_due()
+
+    # deleting most archived tasks makes a compaction due; the first one is written after the archive of the snapshot on disk
+    for task_ID in range(1, 181):
+        tasks.delete(task_ID)
+    assert tasks.archive_compaction_due()
+    tasks.pickle_tasks()
+    assert (tasks.archive_records, tasks.archive_dead) == (20, 0) and tasks.archive_offset == full_size
+
+    # the next one moves it to the start of the file, which is cut after it
+    tasks = Tasks()
+    assert tasks.archive_compaction_due()
+    tasks.pickle_tasks()
+    assert tasks.archive_offset == 0 and os.path.getsize(Tasks.archive_filename) == tasks.archive_size < full_size // 5
+    assert not tasks.archive_compaction_due()
+    tasks = Tasks()
+    assert [task.name for task in tasks.select_tasks(archived=True, sort_list=False)] == [f"task {task_ID}" for task_ID in range(181, 201)]
+
+
+def test_reset_IDs_interrupted(monkeypatch):
+    tasks = Tasks()
+    for name in ["walk dog", "buy eggs", "make eggs"]:
+        tasks.add(name)
+    tasks.delete(1)
+    tasks.done(2)
+    tasks.pickle_tasks()
+
+    # a crash after the renumbered archive is written, before the snapshot: the previous snapshot still reads its archive
+    def crash(file, mode='r', *args, **kwargs):
+        if file == Tasks.filename + ".tmp":
+            raise KeyboardInterrupt
+        return open(file, mode, *args, **kwargs)
+    with monkeypatch.context() as patch:
+        patch.setattr(TaskManager, "open", crash, raising=False)
+        with pytest.raises(KeyboardInterrupt):
+            tasks.reset_IDs()
+    tasks = Tasks()
+    assert tasks.tasks_ID == [2, 3] and tasks.get_task(2).name == "buy eggs"
+
+    # an interrupted reset does not break the next ones, which reuse the space before the current archive
+    tasks.reset_IDs()
+    tasks.reset_IDs()
+    tasks = Tasks()
+    assert tasks.tasks_ID == [1, 2] and tasks.get_task(1).name == "buy eggs" and tasks.archive_offset == 0
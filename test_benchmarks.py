@@ -0,0 +1,39 @@
+import pytest
+
+import benchmarks
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    """ Runs every test in an empty directory, so the app's files do not touch the repository ones"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_suite_size():
+    results = benchmarks.suite_size(50, repeat=1)
+    assert {"Tasks() load", "add", "done", "delete", "list_tasks", "report_tasks", "query_tasks", "reset_IDs", "pickle_tasks",
+            "todo.py --list"} <= set(results["seconds"])
+    assert all(seconds > 0 for seconds in results["seconds"].values())
+    assert results["bytes"]["Tasks() peak traced"] > 0
+
+
+def test_compare_results():
+    baseline = {"sizes": {"1000": {"seconds": {"load": 0.010, "add": 0.0001}, "bytes": {"peak": 1000}}}}
+    results = {"sizes": {"1000": {"seconds": {"load": 0.012, "add": 0.0005}, "bytes": {"peak": 2000}},
+                         "10000": {"seconds": {"load": 1.0}, "bytes": {}}}}
+
+    # 'add' is under the noise floor and the 10,000 tasks store has no baseline
+    regressions = benchmarks.compare_results(results, baseline, threshold=0.25)
+    assert len(regressions) == 1 and "peak" in regressions[0]
+    assert len(benchmarks.compare_results(results, baseline, threshold=0.1)) == 2
+
+
+@pytest.mark.parametrize("sync_mode", [None, "group"])
+def test_concurrent_writers_no_lost_updates(sync_mode):
+    from TaskManager import Tasks
+    benchmarks.concurrent_writers(n_processes=4, n_adds=10, sync_mode=sync_mode)
+
+    tasks = Tasks()
+    assert list(tasks.tasks_ID) == list(range(1, 41))
+    assert {task.name for task in tasks.all_tasks()} == {f"task {worker}-{i}" for worker in range(4) for i in range(10)}
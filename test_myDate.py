@@ -26,3 +26,31 @@ def test_valid_date_false():
 
 
 
+
+
+def test_local_timezone_cached():
+    date = date_localtz(datetime.datetime(2022, 7, 1))
+    assert date.tzinfo is local_timezone()
+    assert date_localtz(datetime.datetime(2022, 12, 1)).tzinfo is date.tzinfo
+    assert epoch_to_date(0).tzinfo is date.tzinfo
+
+    # the refresh hook resolves the timezone again
+    refreshed = refresh_local_timezone()
+    assert local_timezone() is refreshed
+    assert refreshed == date.tzinfo
+
+
+def test_parse_date_fast_path():
+    # same results as 'strptime' for the app's format
+    for date in ['12/31/2022', '1/1/2022', '01/7/2000', '02/29/2024', '02/29/2023', '13/01/2022', '00/10/2022', '10/00/2022',
+                 '1/1/22', '001/01/2022', '01/01/02022', '1 /1/2022', ' 1/1/2022', '1/ 1/2022', '１/1/2022', '1/1/2022/', '', '//']:
+        try:
+            expected = datetime.datetime.strptime(date, "%m/%d/%Y")
+        except ValueError:
+            expected = None
+        assert parse_date(date)[0] == expected
+        assert (parse_date(date)[1] is None) == (expected is not None)
+
+    assert parse_date(' 12/31/2022 ', remove_whitespace=True) == (datetime.datetime(2022, 12, 31), None)
+    assert parse_date('31/12/2022', dt_format="%d/%m/%Y") == (datetime.datetime(2022, 12, 31), None)
+    assert parse_date(None)[0] is None
@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+todo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "todo.py")
+
+# fast-start budget of the write-only options: total 'python -X importtime' self time of the modules imported on top of the interpreter's startup.
+# Measured ~50ms here (~200ms before the heavy imports were made lazy); the budget leaves room for slower machines.
+import_budget_us = 100_000
+
+# modules only needed to print tasks or by fallbacks; write-only options must not import them
+heavy_modules = ["tabulate", "numpy", "pytz", "tzlocal", "zoneinfo", "sqlite3", "socket"]
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    """ Runs every test in an empty directory, so the app's files do not touch the repository ones"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def imported_modules(*argv):
+    """ Runs python with '-X importtime' and returns {module name: self import time in microseconds}"""
+    process = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True, check=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            self_us, _, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = int(self_us)
+    return modules
+
+
+@pytest.mark.parametrize("options", [["--add", "walk dog", "--due", "12/01/2032", "--priority", "2"], ["--done", "1"], ["--del", "1"]])
+def test_write_only_options_fast_start(options):
+    subprocess.run([sys.executable, todo_path, "--add", "buy eggs"], capture_output=True, check=True)
+
+    startup = imported_modules("-c", "pass")
+    modules = {name: us for name, us in imported_modules(todo_path, *options).items() if name not in startup}
+
+    assert "TaskManager" in modules
+    assert [name for name in modules if name.split(".")[0] in heavy_modules] == []
+    assert sum(modules.values()) < import_budget_us
+
+
+def test_list_imports_table_rendering():
+    subprocess.run([sys.executable, todo_path, "--add", "buy eggs"], capture_output=True, check=True)
+    assert "tabulate" in imported_modules(todo_path, "--list")
+
+
+def test_profile_json():
+    import json
+    subprocess.run([sys.executable, todo_path, "--add", "buy eggs"], capture_output=True, check=True)
+    process = subprocess.run([sys.executable, todo_path, "--report", "--profile", "json"], capture_output=True, text=True, check=True)
+
+    # the table goes to the standard output, the measures to the standard error
+    assert "buy eggs" in process.stdout
+    phases = json.loads(process.stderr)["phases"]
+    assert {"total", "open_tasks", "run_commands", "set_age", "tabulate"} <= set(phases)
+
+
+def test_output_cache():
+    import json
+    subprocess.run([sys.executable, todo_path, "--add", "buy eggs"], capture_output=True, check=True)
+
+    def list_tasks(*options):
+        process = subprocess.run([sys.executable, todo_path, "--list", "--profile", "json", *options], capture_output=True, text=True, check=True)
+        return process.stdout, set(json.loads(process.stderr)["phases"])
+
+    # a second '--list' prints the cached output, without loading the tasks; until they change
+    output, phases = list_tasks()
+    assert "buy eggs" in output and "open_tasks" in phases
+    assert list_tasks() == (output, {"total", "cached_output"})
+    subprocess.run([sys.executable, todo_path, "--add", "walk dog"], capture_output=True, check=True)
+    output, phases = list_tasks()
+    assert "walk dog" in output and "open_tasks" in phases
+    assert "open_tasks" in list_tasks("--no-cache")[1]
+
+
+def test_parse_batch_line():
+    import todo
+    assert todo.parse_batch_line('--add "walk dog" --due 12/01/2032 --priority 2') == ({"add": "walk dog", "due": "12/01/2032", "priority": 2}, "")
+    assert todo.parse_batch_line("--add it\\'s") == ({"add": "it's"}, "")
+    assert todo.parse_batch_line('{"del": 3}') == ({"delete": 3}, "")
+    assert todo.parse_batch_line("--done one")[1] != ""
+    assert todo.parse_batch_line("--due 12/01/2032")[1] != ""
+    assert todo.parse_batch_line('{"done": 1, "del": 2}')[1] != ""
+
+
+def test_batch():
+    from TaskManager import Tasks
+    lines = ['--add "walk dog" --priority 3', '{"add": "buy eggs", "due": "12/01/2032"}', "", "# comment", "--done 1", "--del 7", '{"delete": 2}']
+    process = subprocess.run([sys.executable, todo_path, "--batch", "-", "--flush-every", "2"], input="\n".join(lines), 
+                             capture_output=True, text=True, check=True)
+
+    assert process.stdout.splitlines()[:2] == ["Line 1: Created task 1", "Line 2: Created task 2"]
+    assert "Line 6:" in process.stdout and "Batch: 4 commands worked, 1 failed" in process.stdout
+    tasks = Tasks()
+    assert list(tasks.tasks_ID) == [1] and tasks.get_task(1).completed_dt is not None
@@ -0,0 +1,113 @@
+import argparse
+import os
+import threading
+import time
+
+import pytest
+
+import todo_daemon
+from TaskManager import Tasks
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    """ Runs every test in an empty directory, so the app's files do not touch the repository ones"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def command(**options):
+    """ Namespace as returned by 'todo.parse_args()' with the given options set"""
+    args = dict(add=None, done=None, delete=None, due=None, priority=None, list=False, report=False, query=None, resetID=False,
+                limit=None, offset=None, page=None, after=None, archived=False, batch=None, flush_every=None,
+                import_file=None, export_file=None, due_before=None, due_after=None, overdue=False, ignore_case=False, regex=False, stats=False, rebuild=False, no_cache=False,
+                profile=None)
+    args.update(options)
+    return argparse.Namespace(**args)
+
+
+def test_no_daemon_running():
+    assert todo_daemon.send_command(command(list=True)) is None
+
+
+def test_daemon_commands_and_coalesced_writes():
+    server = todo_daemon.TasksServer(flush_interval=60)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    while not os.path.exists(todo_daemon.socket_filename):
+        time.sleep(0.01)
+
+    assert todo_daemon.send_command(command(add="walk dog")) == ["\nCreated task 1\n"]
+    assert todo_daemon.send_command(command(add="buy eggs", priority=3)) == ["\nCreated task 2\n"]
+    msgs = todo_daemon.send_command(command(done=1, list=True))
+    assert "buy eggs" in msgs[1] and "walk dog" not in msgs[1]
+
+    # writes are deferred to the background thread; nothing saved yet
+    assert not os.path.exists(Tasks.journal_filename)
+
+    client = todo_daemon.connect()
+    with client:
+        todo_daemon.send_message(client, ("stop", None))
+        todo_daemon.receive_message(client)
+    thread.join()
+
+    # pending changes are saved when the daemon stops
+    tasks = Tasks()
+    assert list(tasks.tasks_ID) == [1, 2]
+    assert tasks.get_task(1).completed_dt is not None
+    assert not os.path.exists(todo_daemon.socket_filename)
+
+
+def test_daemon_survives_broken_clients():
+    import socket
+    import struct
+    server = todo_daemon.TasksServer(flush_interval=60)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    while not os.path.exists(todo_daemon.socket_filename):
+        time.sleep(0.01)
+
+    # a frame cut short, a message that is not pickled, and a client leaving before its reply
+    for data in [struct.pack("!I", 100) + b"abc", struct.pack("!I", 5) + b"hello", b"\x00"]:
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        client.connect(todo_daemon.socket_filename)
+        client.sendall(data)
+        client.close()
+    client = todo_daemon.connect()
+    todo_daemon.send_message(client, ("run", command(add="walk dog")))
+    client.close()
+
+    assert "walk dog" in todo_daemon.send_command(command(list=True))[0]
+
+    client = todo_daemon.connect()
+    with client:
+        todo_daemon.send_message(client, ("stop", None))
+        todo_daemon.receive_message(client)
+    thread.join()
+    assert list(Tasks().tasks_ID) == [1]
+
+
+def test_daemon_profile():
+    import json
+    import subprocess
+    import sys
+    server = todo_daemon.TasksServer(flush_interval=60)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    while not os.path.exists(todo_daemon.socket_filename):
+        time.sleep(0.01)
+
+    # a profiled command is run by the daemon (which holds the lock of the tasks), not left waiting for the lock
+    todo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "todo.py")
+    try:
+        todo_daemon.send_command(command(add="buy eggs"))
+        process = subprocess.run([sys.executable, todo_path, "--list", "--profile", "json"], capture_output=True, text=True, check=True, timeout=10)
+        assert "buy eggs" in process.stdout
+        assert {"total", "run_commands", "tabulate"} <= set(json.loads(process.stderr)["phases"])
+        assert "run_commands" in todo_daemon.send_command(command(list=True, profile="text"))[1]
+    finally:
+        client = todo_daemon.connect()
+        with client:
+            todo_daemon.send_message(client, ("stop", None))
+            todo_daemon.receive_message(client)
+        thread.join()
@@ -1,7 +1,9 @@
-import TaskManager
-import myNumbers
 import argparse
-import random
+import sys
+
+# Obs.: fast start. Only the modules every run needs are imported here; 'TaskManager' is imported when no daemon is running,
+# and the table rendering ('tabulate', 'numpy') only when tasks are printed. Budget checked by 'test_todo.py'.
+import todo_daemon
 
 
 def parse_args():
@@ -38,10 +40,77 @@ def parse_args():
     parser.add_argument('--query', type = str, required = False, nargs = "+", 
                         help = 'Search your tasks by name. Accepts mutliple search arguments. Inputes are terms to search for tasks. Example: --query "wife" "run" "travel"')    
 
+    parser.add_argument('--archived', action='store_true', required = False,
+                        help = 'Searches the completed tasks (kept in the archive) with --query instead of the unfinished ones. Example: --query "dog" --archived')
+
+    parser.add_argument('--ignore-case', action='store_true', required = False, dest = 'ignore_case',
+                        help = 'Matches the --query terms regardless of case. Example: --query "dog" --ignore-case')
+
+    parser.add_argument('--regex', action='store_true', required = False,
+                        help = """The --query terms are regular expressions (Python syntax), searched anywhere in the names. 
+                        Example: --query "^buy" "gift (wife|mom)" --regex""")
+
+    # due-before, due-after, overdue: list the unfinished tasks due in a range of dates
+    parser.add_argument('--due-before', type = str, required = False, dest = 'due_before',
+                        help = 'Lists the unfinished tasks due on or before a date (mm/dd/yyyy), in the order of --list. Example: --due-before 12/31/2022')
+
+    parser.add_argument('--due-after', type = str, required = False, dest = 'due_after',
+                        help = """Lists the unfinished tasks due on or after a date (mm/dd/yyyy), in the order of --list. Tasks with no due date are listed last. 
+                        Example: --due-after 01/01/2023 --due-before 01/31/2023""")
+
+    parser.add_argument('--overdue', action='store_true', required = False,
+                        help = 'Lists the unfinished tasks whose due date has passed, in the order of --list.')
+
+    # stats, rebuild: summary statistics of the tasks
+    parser.add_argument('--stats', action='store_true', required = False,
+                        help = 'Prints statistics of your tasks: unfinished tasks by priority, overdue tasks, completed tasks and the time taken to complete them.')
+
+    parser.add_argument('--rebuild', action='store_true', required = False,
+                        help = 'Recomputes the --stats from all your tasks first, to verify the kept ones. Example: --stats --rebuild')
+
+    # limit, offset, page, after: print one page of the tasks of --list, --report and --query
+    parser.add_argument('--limit', type = int, required = False,
+                        help = 'Maximum number of tasks printed by --list, --report or --query. Example: --list --limit 10')
+
+    parser.add_argument('--offset', type = int, required = False,
+                        help = 'Number of tasks to skip before printing with --list, --report or --query. Example: --report --limit 10 --offset 20')
+
+    parser.add_argument('--page', type = int, required = False,
+                        help = 'Page of tasks to print with --list, --report or --query, starting at 1. Pages have --limit tasks (defaults to 20). Example: --list --page 2')
+
+    parser.add_argument('--after', type = int, required = False,
+                        help = 'Prints the tasks after the task with this ID in --list, --report or --query (e.g., the last ID of the previous page). Example: --list --limit 10 --after 42')
+
     # additional option to reset the IDs of the tasks. Useful to 'reindex' tasks after many are added/deleted (reindexing each time the app runs is also an option, but this is prefered bcs the user might want to memorize IDs)
     parser.add_argument('--resetID', action='store_true' , required = False, 
                         help = 'Resets the IDs of your tasks. Useful for restarting the indexation of your list after using it for some time.')
 
+    # batch: runs many --add, --done and --del commands, one per line of a file, loading and saving the tasks once
+    parser.add_argument('--batch', type = str, required = False,
+                        help = """Runs the commands in a file (or the standard input, with -), one per line: --add (with --due and --priority), --done or --del 
+                        as in the command line, or as a JSON object. Prints the result of each line. Examples: --batch commands.txt\n --batch - < commands.jsonl""")
+
+    parser.add_argument('--flush-every', type = int, required = False, dest = 'flush_every',
+                        help = 'Saves the changes of --batch every N commands (by default, once at the end). Example: --batch commands.txt --flush-every 1000')
+
+    # import, export: bulk transfer of tasks from/to CSV or JSON Lines files
+    parser.add_argument('--import', type = str, required = False, dest = 'import_file',
+                        help = """Adds the tasks of a CSV (.csv) or JSON Lines file, with the fields name, priority, due (mm/dd/yyyy), created and completed 
+                        (ISO 8601 dates). Invalid records are reported and skipped. Example: --import tasks.csv""")
+
+    parser.add_argument('--export', type = str, required = False, dest = 'export_file',
+                        help = 'Writes all your tasks to a CSV (.csv) or JSON Lines file, in the order of --report. Example: --export tasks.jsonl')
+
+    # no-cache: bypasses the output cache of --list and --report
+    parser.add_argument('--no-cache', action='store_true', required = False, dest = 'no_cache',
+                        help = """Prints --list or --report from the tasks, instead of the output of a previous run saved while the tasks did not change 
+                        (the output cache). Example: --list --no-cache""")
+
+    # profile: measures the phases of the run
+    parser.add_argument('--profile', type = str, required = False, nargs = '?', const = 'text', choices = ['text', 'json'],
+                        help = """Prints the wall time, calls and allocated memory of each phase of the run (loading, selecting, sorting, tabulating...) after the output, 
+                        as a table (default) or JSON. If a daemon is running, the command is measured in the daemon (without loading the tasks). Examples: --report --profile\n --list --profile json""")
+
     return parser.parse_args()
     
 def validate_args(args):
@@ -53,8 +122,8 @@ def validate_args(args):
     """
 
     error_msg = ""
-    # cast the user inputs to a list
-    inputs = list(vars(args).values())
+    # cast the user inputs to a list ('--profile' alone runs no option)
+    inputs = [value for option, value in vars(args).items() if option not in ('profile', 'no_cache')]
 
     # test if any input was given in the terminal. If none (eg.: --python3 todo.py), delivers an error message
     if not any(inputs):
@@ -69,11 +138,48 @@ def validate_args(args):
             if not args.add:
                 error_msg += "\nPlease --add a task to insert a priority\n"
 
+        if args.batch and (args.add or args.done or args.delete):
+            error_msg += "\nPlease put the --add, --done and --del commands in the --batch file\n"
+
+        if args.flush_every is not None and not args.batch:
+            error_msg += "\nPlease run a --batch to use --flush-every\n"
+
+        if args.flush_every is not None and args.flush_every < 1:
+            error_msg += "\nPlease input a --flush-every of at least 1\n"
+
+        if args.rebuild and not args.stats:
+            error_msg += "\nPlease ask for the --stats to --rebuild them\n"
+
+        if args.archived and not args.query:
+            error_msg += "\nPlease --query tasks to search the --archived ones\n"
+
+        if (args.ignore_case or args.regex) and not args.query:
+            error_msg += "\nPlease --query tasks to use --ignore-case or --regex\n"
+
+        # tests if the paging options were given along with a command printing tasks and have valid values
+        paging = {'--limit': args.limit, '--offset': args.offset, '--page': args.page, '--after': args.after}
+        due_options = args.due_before is not None or args.due_after is not None or args.overdue
+        if any(value is not None for value in paging.values()) and not (args.list or args.report or args.query or due_options):
+            error_msg += "\nPlease --list, --report or --query tasks (or use --due-before, --due-after or --overdue) to use --limit, --offset, --page or --after\n"
+
+        if args.limit is not None and args.limit < 1:
+            error_msg += "\nPlease input a --limit of at least 1\n"
+
+        if args.offset is not None and args.offset < 0:
+            error_msg += "\nPlease input a non-negative --offset\n"
+
+        if args.page is not None and args.page < 1:
+            error_msg += "\nPlease input a --page of at least 1\n"
+
+        if args.page is not None and args.offset is not None:
+            error_msg += "\nPlease use either --page or --offset\n"
+
         # add more tests here as needed
     return error_msg
 
 
 """# Unfold here for debugging without the terminal
+import random
 class args:
     pass
 
@@ -87,7 +193,236 @@ args.done = None #5
 args.list = None #True
 args.report = None# True
 args.query = None #['dog', '2']
-args.resetID = True"""
+args.archived = False
+args.ignore_case, args.regex = False, False
+args.resetID = True
+args.limit, args.offset, args.page, args.after = None, None, None, None
+args.batch, args.flush_every = None, None
+args.import_file, args.export_file = None, None
+args.due_before, args.due_after, args.overdue = None, None, False
+args.stats, args.rebuild = False, False
+args.no_cache = False
+args.profile = None"""
+
+
+#===========================================================================
+#SECTION batch mode
+#===========================================================================
+
+# options accepted in the lines of a '--batch' file, by their command-line name (JSON lines use the names after the dashes, or 'delete')
+batch_options = {"--add": "add", "--due": "due", "--priority": "priority", "--done": "done", "--del": "delete"}
+
+# lines of whole words and quoted words without escapes, split with a regular expression; 'shlex' (~10x slower) splits the others
+simple_line = r"""\s*(?:(?:"[^"]*"|'[^']*'|[^\s"'\\]+)(?:\s+|$))*"""
+simple_word = r""""([^"]*)"|'([^']*)'|([^\s"']+)"""
+
+def read_batch(filename):
+    """ Reads the lines of a '--batch' file ('-' for the standard input). 
+    Obs.: read by the client, so a running daemon (todo_daemon.py), with another working directory and standard input, gets the lines themselves.
+
+    Returns: lines (list): the lines of the file
+    """
+    if filename == "-":
+        return sys.stdin.read().splitlines()
+    with open(filename) as file:
+        return file.read().splitlines()
+
+
+def parse_batch_line(line):
+    """ Parses one line of a '--batch' file: options as in the command line (e.g., --add "walk dog" --due 12/01/2032 --priority 2), 
+    or a JSON object (e.g., {"add": "walk dog", "due": "12/01/2032", "priority": 2}, {"done": 5}, {"del": 3}).
+
+    Args: line (str): the line, not empty
+
+    Returns:
+        options (dict): the options of the line, by their 'argparse' destination ('add', 'due', 'priority', 'done', 'delete')
+        error_msg (str): a string containing an appropriate error message in case the line is not valid
+    """
+    options = {}
+    if line.startswith("{"):
+        import json
+        try:
+            items = json.loads(line)
+        except ValueError:
+            return options, "not a valid JSON object"
+        if not isinstance(items, dict):
+            return options, "not a valid JSON object"
+        for key, value in items.items():
+            option = batch_options.get(f"--{key}", "delete" if key == "delete" else None)
+            if option is None:
+                return options, f"unknown option '{key}'"
+            options[option] = value
+    else:
+        import re
+        if re.fullmatch(simple_line, line):
+            words = ["".join(groups) for groups in re.findall(simple_word, line)]
+        else:
+            import shlex
+            try:
+                words = shlex.split(line)
+            except ValueError as error:
+                return options, f"could not split the line ({error})"
+        for i in range(0, len(words), 2):
+            if words[i] not in batch_options:
+                return options, f"unknown option '{words[i]}'"
+            if i + 1 == len(words):
+                return options, f"please input a value for {words[i]}"
+            options[batch_options[words[i]]] = words[i+1]
+
+    # the same checks as 'validate_args', for one command
+    if len([option for option in ("add", "done", "delete") if option in options]) != 1:
+        return options, "please give one of --add, --done or --del"
+    if "add" in options and not str(options["add"]).strip():
+        return options, "please input the name of the task to --add"
+    if ("due" in options or "priority" in options) and "add" not in options:
+        return options, "please --add a task to insert a due date or a priority"
+    for option in ("priority", "done", "delete"):
+        if option in options:
+            try:
+                options[option] = int(options[option])
+            except (TypeError, ValueError):
+                return options, f"please input a whole number for --{'del' if option == 'delete' else option}"
+    return options, ""
+
+
+def run_batch(tasks, lines, flush_every=None):
+    """ Runs the commands of a '--batch' file on a 'Tasks' object. The changes are saved once at the end (as in 'todo_daemon.py', 
+    with 'tasks.deferred_writes'), or every 'flush_every' commands.
+
+    Args:
+        tasks (TaskManager.Tasks): the list of tasks to work on
+        lines (list): the lines of the file (see 'parse_batch_line'). Empty lines and lines starting with '#' are skipped.
+        flush_every (int, optional): number of commands between two saves. Defaults to None (saved at the end).
+
+    Returns: msgs (list): the messages to print in the terminal: the result of each line and a summary
+    """
+    msgs = []
+    n_worked, n_failed = 0, 0
+
+    # a daemon saves the changes itself; they are only saved here if 'tasks' saves each change otherwise
+    deferred_writes = tasks.deferred_writes
+    tasks.deferred_writes = True
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            options, error_msg = parse_batch_line(line)
+            if error_msg:
+                msg, worked = f"\nInvalid command: {error_msg}\n", False
+            elif "add" in options:
+                msg, worked = tasks.add(str(options["add"]), options.get("priority"), options.get("due"))
+            elif "done" in options:
+                msg, worked = tasks.done(options["done"])
+            else:
+                msg, worked = tasks.delete(options["delete"])
+            msgs.append(f"Line {line_number}: {msg.strip()}")
+
+            if worked:
+                n_worked += 1
+            else:
+                n_failed += 1
+            if flush_every and (n_worked + n_failed) % flush_every == 0:
+                tasks.flush()
+    finally:
+        tasks.deferred_writes = deferred_writes
+        if not deferred_writes:
+            tasks.flush()
+
+    msgs.append(f"\nBatch: {n_worked} commands worked, {n_failed} failed\n")
+    return msgs
+
+#\SECTION
+
+
+def cached_command(args):
+    """ Returns the options of a run only printing tasks with '--list' and/or '--report' (and the paging options), whose output is kept 
+    in the output cache (see 'TaskManager.Tasks.output_cache'), or None for any other run.
+
+    Args: args (argparse.Namespace): the parsed (and validated) arguments given by the user
+    """
+    command = {option: getattr(args, option) for option in ('list', 'report', 'limit', 'offset', 'page', 'after')}
+    others = [value for option, value in vars(args).items() if option not in command and option not in ('profile', 'no_cache')]
+    if not (args.list or args.report) or any(others) or args.no_cache:
+        return None
+    return command
+
+
+def run_commands(tasks, args):
+    """ Runs the options given by the user on a 'Tasks' object.
+
+    Args:
+        tasks (TaskManager.Tasks): the list of tasks to work on
+        args (argparse.Namespace): the parsed (and validated) arguments given by the user
+
+    Returns: msgs (list): the messages to print in the terminal, in order
+    """
+    msgs = []
+
+    # page of the tasks to print: '--page' is translated to an offset of whole pages of '--limit' tasks (or 'tasks.page_size')
+    limit, offset = args.limit, args.offset or 0
+    if args.page is not None:
+        limit = limit or tasks.page_size
+        offset = (args.page - 1) * limit
+    paging = dict(limit=limit, offset=offset, after=args.after)
+
+    # '--batch': the lines of the file (see 'main'); run before the options printing tasks
+    if args.batch is not None:
+        msgs.extend(run_batch(tasks, args.batch, args.flush_every))
+
+    # calls the appropriate method depending on the user input.
+    # Each Tasks method returns an appropiate 'msg' to print in the terminal either in case of success or failure of the operation (e.g.: did not find the ID of a task, invalid dates)
+      # Note 1: implementation allows for multiple inputs in the terminal (if all valid). For example, < --add "go to the beach"  --del 9 > will add and delete a task.
+      # Note 2: '--add' '--priority' and '--due' date dont have to come in order.  
+      # Note 3: I separated in one block for each option in case one wants to add option-specific code (example, specific error handling for '--list'). 
+                # As all methods return a standard output (a string 'msg'), can have just one block if necessary.  
+      # Note 4: 'worked' is a boolean indicating if the operation was sucessful. Not used, but included because might be useful in future extensions of the app          
+    if args.import_file:
+        msg, worked = tasks.import_tasks(args.import_file)
+        msgs.append(msg)
+
+    if args.add:
+        msg, worked = tasks.add(args.add, args.priority, args.due)
+        msgs.append(msg)
+
+    if args.delete:
+        msg, worked = tasks.delete(args.delete)
+        msgs.append(msg)
+
+    if args.done:
+        msg, worked = tasks.done(args.done)
+        msgs.append(msg)
+
+    if args.list:
+        msg = tasks.list_tasks(**paging)
+        msgs.append(msg)
+
+    if args.due_before is not None or args.due_after is not None or args.overdue:
+        msg, worked = tasks.due_tasks(args.due_before, args.due_after, args.overdue, **paging)
+        msgs.append(msg)
+
+    if args.report:
+        msg = tasks.report_tasks(**paging)
+        msgs.append(msg)
+
+    if args.query:
+        msg, worked = tasks.query_tasks(args.query, sort_list=True, archived=args.archived, ignore_case=args.ignore_case, regex=args.regex, **paging)
+        msgs.append(msg)
+
+    if args.stats:
+        msg, worked = tasks.report_stats(args.rebuild)
+        msgs.append(msg)
+
+    if args.resetID:
+        msg, worked = tasks.reset_IDs()
+        msgs.append(msg)
+
+    if args.export_file:
+        msg, worked = tasks.export_tasks(args.export_file)
+        msgs.append(msg)
+
+    return msgs
 
 
 def main():
@@ -102,45 +437,61 @@ def main():
         exit()
 
     else:
-        tasks = TaskManager.Tasks()
-
-        # calls the appropriate method depending on the user input.
-        # Each Tasks method returns an appropiate 'msg' to print in the terminal either in case of success or failure of the operation (e.g.: did not find the ID of a task, invalid dates)
-          # Note 1: implementation allows for multiple inputs in the terminal (if all valid). For example, < --add "go to the beach"  --del 9 > will add and delete a task.
-          # Note 2: '--add' '--priority' and '--due' date dont have to come in order.  
-          # Note 3: I separated in one block for each option in case one wants to add option-specific code (example, specific error handling for '--list'). 
-                    # As all methods return a standard output (a string 'msg'), can have just one block if necessary.  
-          # Note 4: 'worked' is a boolean indicating if the operation was sucessful. Not used, but included because might be useful in future extensions of the app          
-        if args.add:
-            msg, worked = tasks.add(args.add, args.priority, args.due)
-            print(msg)     
-
-        if args.delete:
-            msg, worked = tasks.delete(args.delete)
-            print(msg)
-
-        if args.done:
-            msg, worked = tasks.done(args.done)
+        # if a daemon (todo_daemon.py) is running, it runs the options on the tasks it keeps in memory. 
+        # Otherwise, falls back to loading the tasks in this process; 'TaskManager' is only imported then.
+        # with '--profile', a daemon measures the command it runs and returns the measures along with the messages
+        if args.batch:
+            try:
+                args.batch = read_batch(args.batch)
+            except OSError as error:
+                print(f"\nCould not read the --batch file: {error}\n")
+                exit()
+        msgs = todo_daemon.send_command(args)
+        report = None
+        if msgs is not None and args.profile:
+            msgs, report = msgs
+        if msgs is None:
+            import TaskManager
+            from myErrors import LockTimeoutError
+            profiler = TaskManager.Tasks.profiler
+            if args.profile:
+                profiler.start()
+
+            # the tasks files are locked from loading to saving, so concurrent runs do not lose each other's changes. 
+            # Options only printing tasks share the lock with each other.
+            exclusive = any([args.add, args.done, args.delete, args.resetID, args.batch is not None, args.import_file, args.rebuild])
+            command = cached_command(args)
+            try:
+                with profiler.phase("total"):
+                    with TaskManager.Tasks.lock(exclusive):
+                        # '--list' and '--report' print the output of a previous run if the tasks (and the day) did not change since, without loading them
+                        cache_key = TaskManager.Tasks.output_cache_key(command) if command else None
+                        msgs = tasks = None
+                        if cache_key:
+                            with profiler.phase("cached_output"):
+                                msgs = TaskManager.Tasks.cached_output(cache_key)
+                        if msgs is None:
+                            with profiler.phase("open_tasks"):
+                                tasks = TaskManager.open_tasks()
+                            with profiler.phase("run_commands"):
+                                msgs = run_commands(tasks, args)
+                            if cache_key:
+                                tasks.cache_output(cache_key, msgs)
+                    # group commit: the changes are forced to the disk after the lock is released (see 'Tasks.sync')
+                    if tasks is not None:
+                        tasks.sync()
+            except LockTimeoutError as error:
+                msgs = [f"\nThe task list is in use by another process (e.g., the todo daemon). Please try again.\n{error}\n"]
+            profiler.stop()
+            if args.profile:
+                report = profiler.summary() if args.profile == 'text' else profiler.to_json()
+
+        for msg in msgs:
             print(msg)
 
-        if args.list:
-            msg = tasks.list_tasks()
-            print(msg)
-
-        if args.report:
-            msg = tasks.report_tasks()
-            print(msg)
-
-        if args.query:
-            msg, worked = tasks.query_tasks(args.query, sort_list=True)
-            print(msg)
-
-        if args.resetID:
-            msg, worked = tasks.reset_IDs()
-            print(msg)
+        # the measures go to the standard error, so the output of the options stays unchanged
+        if args.profile:
+            print(report, file=sys.stderr)
         
 if __name__ == "__main__":
     main()
-
-    
-    
\ No newline at end of file
@@ -0,0 +1,240 @@
+# Optional resident server for the 'todo' app.
+# The server keeps a 'Tasks' object in memory and runs the options forwarded by 'todo.py' through a local Unix socket,
+# so each call of 'todo.py' skips the loading of the tasks and the imports of 'TaskManager' and 'myDates'.
+# Mutations are saved to the disk by a background thread, coalescing the ones arriving within 'flush_interval' seconds into one write.
+# The server holds the lock of the tasks files while it runs (see 'Tasks.lock'): it is their only writer, as 'todo.py' forwards its options to it.
+#
+# Usage:
+#   python todo_daemon.py &          starts the server for the tasks in the current directory
+#   python todo_daemon.py --stop     stops it (pending mutations are saved first)
+# When no server is running, 'todo.py' runs the options in its own process as usual.
+
+import argparse
+import os
+import pickle
+import struct
+import sys
+
+socket_filename = ".todo.sock"
+flush_interval = 0.5
+
+
+#===========================================================================
+#SECTION messages between client and server
+#===========================================================================
+
+def send_message(connection, message):
+    """ Sends a python object through a socket, pickled and prefixed by its length"""
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    connection.sendall(struct.pack("!I", len(data)) + data)
+
+
+def receive_message(connection):
+    """ Receives a python object sent by 'send_message'. Raises ConnectionError if the connection is closed mid-message, 
+    pickle.UnpicklingError if the message is not a pickled object"""
+    length = struct.unpack("!I", receive_bytes(connection, 4))[0]
+    data = receive_bytes(connection, length)
+    try:
+        return pickle.loads(data)
+    except pickle.UnpicklingError:
+        raise
+    except Exception as error:
+        # unpickling malformed data may raise most exceptions (e.g., EOFError, KeyError, AttributeError)
+        raise pickle.UnpicklingError(f"malformed message: {error!r}") from error
+
+
+def receive_bytes(connection, size):
+    """ Receives exactly 'size' bytes from a socket. Raises ConnectionError if the other side closes the connection before"""
+    data = b""
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError(f"connection closed after {len(data)} of {size} bytes of a message")
+        data += chunk
+    return data
+
+
+def connect(socket_path=socket_filename):
+    """ Connects to a running server. Returns the connected socket, or None if no server is running"""
+    if not os.path.exists(socket_path):
+        return None
+
+    # imported here: without a server, 'todo.py' only pays for the check above
+    import socket
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        # socket file left by a server that did not shut down properly
+        client.close()
+        return None
+    return client
+
+
+def send_command(args, socket_path=socket_filename):
+    """ Client side: forwards the parsed arguments of 'todo.py' to a running server.
+
+    Args: args (argparse.Namespace): the parsed (and validated) arguments given by the user
+
+    Returns: (list) | (tuple) | None: the messages to print in the terminal | with '--profile', (the messages, the measures of the command 
+             in the server, formatted as asked) | None if no server is running
+    """
+    client = connect(socket_path)
+    if client is None:
+        return None
+
+    # obs.: once the command is sent, errors are raised instead of falling back, so a command is never run twice
+    with client:
+        send_message(client, ("run", args))
+        return receive_message(client)
+
+#\SECTION
+
+#===========================================================================
+#SECTION server
+#===========================================================================
+
+class TasksServer(object):
+    """ Server keeping a 'Tasks' object in memory and running the options sent by 'send_command'.
+
+    Attributes:
+     - socket_path (str): path of the Unix socket the server listens on
+     - flush_interval (float): seconds between two saves of the pending mutations to the disk
+     - tasks (TaskManager.Tasks): the list of tasks, with 'deferred_writes' set
+     - lock (threading.Lock): serializes the commands and the background saves
+     - store_lock (myLocks.FileLock): exclusive lock of the tasks files, held from loading the tasks until the server stops
+    """
+
+    def __init__(self, socket_path=socket_filename, flush_interval=flush_interval):
+        # the server pays for the heavy imports once
+        import threading
+        import TaskManager
+
+        self.socket_path = socket_path
+        self.flush_interval = flush_interval
+        self.store_lock = TaskManager.Tasks.lock(exclusive=True)
+        self.store_lock.acquire()
+        self.tasks = TaskManager.open_tasks()
+        self.tasks.deferred_writes = True
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.flusher = threading.Thread(target=self.flush_loop, daemon=True)
+
+    def serve_forever(self):
+        """ Listens on 'self.socket_path' and runs the commands received, one at a time, until a 'stop' message"""
+        if connect(self.socket_path) is not None:
+            raise RuntimeError(f"\nA todo daemon is already running on {self.socket_path}\n")
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        # only the user can connect to the socket
+        import socket
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        server.listen()
+
+        self.flusher.start()
+        try:
+            with server:
+                while not self.stopped.is_set():
+                    connection, _ = server.accept()
+                    with connection:
+                        try:
+                            self.handle(connection)
+                        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError) as error:
+                            # a client that disconnects mid-message or before its reply (ConnectionError, BrokenPipeError: OSErrors), 
+                            # or sends a malformed message (not a pickled (command, args) pair), only loses its connection; 
+                            # the server keeps accepting the others
+                            print(f"todo daemon: dropped a connection: {error!r}", file=sys.stderr)
+        finally:
+            self.stopped.set()
+            with self.lock:
+                self.tasks.flush()
+                self.tasks.sync()
+            self.store_lock.release()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def handle(self, connection):
+        """ Runs one message received from a client and sends back the messages to print"""
+        import myDates
+        import todo
+        from myProfiler import Profiler
+
+        command, args = receive_message(connection)
+        if command == "stop":
+            self.stopped.set()
+            send_message(connection, ["\nTodo daemon stopped\n"])
+            return
+
+        # '--profile' measures the command in the server, with a profiler of its own so the measures are of this command only
+        profiler = Profiler() if args.profile else None
+        with self.lock:
+            # ages change with the current date, so they are recomputed for each command; 
+            # the system timezone may also have changed since the server started
+            self.tasks.age_updated = False
+            myDates.refresh_local_timezone()
+            if profiler is not None:
+                self.tasks.profiler = profiler
+                profiler.start()
+            try:
+                with self.tasks.profiler.phase("total"), self.tasks.profiler.phase("run_commands"):
+                    msgs = todo.run_commands(self.tasks, args)
+            except Exception as error:
+                msgs = [f"\nThe todo daemon could not run the command: {error!r}\n"]
+            finally:
+                if profiler is not None:
+                    profiler.stop()
+                    del self.tasks.profiler
+
+        if profiler is not None:
+            send_message(connection, (msgs, profiler.summary() if args.profile == 'text' else profiler.to_json()))
+        else:
+            send_message(connection, msgs)
+
+    def flush_loop(self):
+        """ Background thread: saves the pending mutations every 'self.flush_interval' seconds"""
+        while not self.stopped.wait(self.flush_interval):
+            with self.lock:
+                self.tasks.flush()
+                self.tasks.sync()
+
+#\SECTION
+
+
+def main():
+    """ Starts or stops the server"""
+    parser = argparse.ArgumentParser(description='Resident server for the todo app')
+    parser.add_argument('--socket', type = str, default = socket_filename,
+                        help = f'Path of the Unix socket. Defaults to {socket_filename} in the current directory')
+    parser.add_argument('--flush-interval', type = float, default = flush_interval, dest = 'flush_interval',
+                        help = f'Seconds between two saves of the changes to the disk. Defaults to {flush_interval}')
+    parser.add_argument('--stop', action = 'store_true', help = 'Stops a running server')
+    args = parser.parse_args()
+
+    if args.stop:
+        client = connect(args.socket)
+        if client is None:
+            print("\nNo todo daemon is running\n")
+            return
+        with client:
+            send_message(client, ("stop", None))
+            print(*receive_message(client))
+        return
+
+    # a SIGTERM (e.g., 'kill') stops the server as '--stop' does, saving the pending changes
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        TasksServer(args.socket, args.flush_interval).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()